@@ -0,0 +1,116 @@
+"""
+Benchmark the indexed conflict check as the booking tables grow.
+
+Run from the api directory:
+
+    python -m benchmarks.conflicts [--rows 1000000] [--step 100000]
+
+The check runs against a throwaway SQLite database (not db.sqlite3) with the
+indexes from the booking_conflict_indexes migration and the same range
+queries as crud.Conflict.find. After each step of rows is loaded, a sample of
+check-then-insert bookings is timed; the per-insert latency should stay flat
+while the tables grow.
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from crud.FreeBusy import MAX_MEETING_DURATION
+
+SCHEMA = """
+CREATE TABLE meetings (id INTEGER PRIMARY KEY, organizer TEXT, starts_at TEXT, ends_at TEXT);
+CREATE TABLE participants (id INTEGER PRIMARY KEY, participant_id INTEGER, meeting_id INTEGER, starts_at TEXT, ends_at TEXT);
+CREATE TABLE availabilitys (id INTEGER PRIMARY KEY, user_id INTEGER, start_date TEXT, end_date TEXT);
+CREATE INDEX meetings_organizer_starts_at_index ON meetings (organizer, starts_at);
+CREATE INDEX participants_participant_id_starts_at_index ON participants (participant_id, starts_at);
+CREATE INDEX availabilitys_user_id_start_date_end_date_index ON availabilitys (user_id, start_date, end_date);
+"""
+
+HOSTED = """SELECT id FROM meetings WHERE organizer = ? AND starts_at >= ? AND starts_at < ? AND ends_at > ?"""
+ATTENDED = """SELECT meeting_id FROM participants WHERE participant_id = ? AND starts_at >= ? AND starts_at < ? AND ends_at > ?"""
+LEAVES = """SELECT id FROM availabilitys WHERE user_id = ? AND start_date <= ? AND end_date >= ?"""
+
+def booking(users, days):
+    """
+    Generate a random booking.
+
+    Args:
+        users (int): Number of users to pick from.
+        days (int): Length of the window the booking falls in.
+
+    Returns:
+        tuple: The user ID, the start and the end of the booking.
+    """
+    start = datetime(2024, 1, 1) + timedelta(minutes=15 * random.randrange(days * 96))
+    end = start + timedelta(minutes=random.choice((15, 30, 60, 90)))
+    return random.randrange(users), str(start), str(end)
+
+def load(connection, rows, users, days, first_id):
+    """
+    Insert meetings, one participant per meeting, and a few leave records.
+
+    Args:
+        connection (sqlite3.Connection): The benchmark database.
+        rows (int): Number of meetings to insert.
+        users (int): Number of users.
+        days (int): Length of the window the bookings fall in.
+        first_id (int): ID of the first meeting inserted.
+    """
+    meetings, participants, leaves = [], [], []
+    for meeting_id in range(first_id, first_id + rows):
+        user_id, starts_at, ends_at = booking(users, days)
+        meetings.append((meeting_id, "user%d@example.com" % user_id, starts_at, ends_at))
+        participants.append((random.randrange(users), meeting_id, starts_at, ends_at))
+        if meeting_id % 100 == 0:
+            leaves.append((user_id, starts_at[:10], starts_at[:10]))
+    connection.executemany("INSERT INTO meetings VALUES (?, ?, ?, ?)", meetings)
+    connection.executemany("INSERT INTO participants (participant_id, meeting_id, starts_at, ends_at) VALUES (?, ?, ?, ?)", participants)
+    connection.executemany("INSERT INTO availabilitys (user_id, start_date, end_date) VALUES (?, ?, ?)", leaves)
+    connection.commit()
+
+def checkedInsert(connection, user_id, starts_at, ends_at, meeting_id):
+    """
+    Check a booking for conflicts and insert it, as crud.Meeting.add does.
+
+    Returns:
+        int: The number of conflicts found.
+    """
+    lower = str(datetime.fromisoformat(starts_at) - MAX_MEETING_DURATION)
+    found = connection.execute(HOSTED, ("user%d@example.com" % user_id, lower, ends_at, starts_at)).fetchall()
+    found += connection.execute(ATTENDED, (user_id, lower, ends_at, starts_at)).fetchall()
+    found += connection.execute(LEAVES, (user_id, ends_at[:10], starts_at[:10])).fetchall()
+    connection.execute("INSERT INTO meetings VALUES (?, ?, ?, ?)", (meeting_id, "user%d@example.com" % user_id, starts_at, ends_at))
+    connection.commit()
+    return len(found)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the indexed conflict check.")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--step", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--samples", type=int, default=1000, help="checked inserts timed per step")
+    args = parser.parse_args()
+
+    random.seed(0)
+    directory = tempfile.mkdtemp()
+    connection = sqlite3.connect(os.path.join(directory, "conflicts.sqlite3"))
+    connection.executescript(SCHEMA)
+    next_id = 1
+    print("%10s %14s %14s" % ("meetings", "us/insert", "conflicts"))
+    while next_id <= args.rows:
+        load(connection, args.step, args.users, args.days, next_id)
+        next_id += args.step
+        conflicts = 0
+        began = time.perf_counter()
+        for _ in range(args.samples):
+            user_id, starts_at, ends_at = booking(args.users, args.days)
+            conflicts += checkedInsert(connection, user_id, starts_at, ends_at, next_id)
+            next_id += 1
+        elapsed = (time.perf_counter() - began) * 1e6 / args.samples
+        print("%10d %14.1f %14d" % (next_id - 1, elapsed, conflicts))
+    connection.close()
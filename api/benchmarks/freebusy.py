@@ -0,0 +1,68 @@
+"""
+Benchmark the free/busy interval index.
+
+Run from the api directory:
+
+    python -m benchmarks.freebusy [--users 1000] [--meetings 10000]
+
+Busy intervals are generated in memory (each meeting gets a random set of
+attendees) so the run measures index construction and merging only, not
+database access.
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from crud.FreeBusy import mergeIntervals, freeSlots, overlaps
+
+def generate(users, meetings, attendees, days):
+    """
+    Generate busy intervals for synthetic users.
+
+    Args:
+        users (int): Number of users.
+        meetings (int): Number of meetings.
+        attendees (int): Attendees per meeting.
+        days (int): Length of the window the meetings fall in.
+
+    Returns:
+        tuple: The window start, the window end and the intervals keyed by user.
+    """
+    start = datetime(2024, 1, 1)
+    end = start + timedelta(days=days)
+    intervals = {user_id: [] for user_id in range(users)}
+    for _ in range(meetings):
+        meeting_start = start + timedelta(minutes=15 * random.randrange(days * 96))
+        meeting_end = meeting_start + timedelta(minutes=random.choice((15, 30, 60, 90)))
+        for user_id in random.sample(range(users), attendees):
+            intervals[user_id].append((meeting_start, meeting_end))
+    return start, end, intervals
+
+def timed(function, *args):
+    began = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - began) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the free/busy interval index.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--meetings", type=int, default=10000)
+    parser.add_argument("--attendees", type=int, default=5)
+    parser.add_argument("--days", type=int, default=28)
+    parser.add_argument("--duration", type=int, default=30, help="slot duration in minutes")
+    args = parser.parse_args()
+
+    random.seed(0)
+    start, end, intervals = generate(args.users, args.meetings, args.attendees, args.days)
+    index, index_ms = timed(lambda: {user_id: mergeIntervals(busy) for user_id, busy in intervals.items()})
+    busy, merge_ms = timed(lambda: mergeIntervals(interval for busy in index.values() for interval in busy))
+    free, free_ms = timed(freeSlots, busy, start, end, timedelta(minutes=args.duration))
+    probes = [start + timedelta(minutes=15 * random.randrange(args.days * 96)) for _ in range(10000)]
+    _, probe_ms = timed(lambda: [overlaps(index[user_id % args.users], probe, probe + timedelta(minutes=30)) for user_id, probe in enumerate(probes)])
+
+    print("users=%d meetings=%d intervals=%d" % (args.users, args.meetings, sum(len(busy) for busy in intervals.values())))
+    print("build per-user index: %8.2f ms" % index_ms)
+    print("merge across users:   %8.2f ms" % merge_ms)
+    print("free slots:           %8.2f ms (%d slots)" % (free_ms, len(free)))
+    print("10k overlap probes:   %8.2f ms" % probe_ms)
@@ -0,0 +1,226 @@
+"""
+Build a database of synthetic users, meetings, participants and leave records.
+
+Run from the api directory:
+
+    python -m benchmarks.generate --scale 100k [--database /tmp/bench.sqlite3]
+    python -m benchmarks.generate --scale 1k --connection postgres
+
+The schema is created by running databases/migrations against the chosen
+connection: a SQLite file (a fresh temporary one by default, never
+db.sqlite3 unless asked for), or the "postgres" or "mysql" connection of
+config/database.py. The tables must be empty; rows are written through
+crud.Bulk.insert in batches, so memory stays flat at any scale, and the
+agenda is then filled by crud.Agenda.rebuild.
+
+A scale is a number of users, with "k" and "m" suffixes; meetings,
+participant rows and leave records follow from the per-user ratios.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from config.database import DATABASES
+from config.timezones import TIMEZONES
+
+START = datetime(2024, 1, 1)
+BATCH_SIZE = 5000
+PASSWORD = "x"
+LOCATIONS = [(key.split(", ")[0].title(), key.split(", ")[1].upper(), zone) for key, zone in TIMEZONES["cities"].items()] + \
+    [("Springfield", abbreviation, zone) for abbreviation, (name, zone) in TIMEZONES["states"].items()]
+
+def parseScale(value):
+    """
+    Parse a scale such as ``1k``, ``100k`` or ``1m``.
+
+    Args:
+        value (str): The scale.
+
+    Returns:
+        int: The number of users.
+    """
+    value = value.strip().lower()
+    multiplier = {"k": 1000, "m": 1000000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+def configure(connection="sqlite", database=None):
+    """
+    Point the ORM at the database to benchmark and create its schema.
+
+    Must run before the first query, since connection pools are created on
+    first use.
+
+    Args:
+        connection (str): ``sqlite``, ``postgres`` or ``mysql``.
+        database (str, optional): The SQLite file; a new temporary file by default.
+
+    Returns:
+        str: A description of the database.
+    """
+    from masoniteorm.migrations import Migration
+    DATABASES["default"] = connection
+    if connection == "sqlite":
+        DATABASES["sqlite"]["database"] = database or os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    migration = Migration(connection=connection, migration_directory="databases/migrations", config_path="config/database")
+    migration.create_table_if_not_exists()
+    migration.migrate()
+    details = DATABASES[connection]
+    return details["database"] if connection == "sqlite" else "%s://%s:%s/%s" % (connection, details["host"], details["port"], details["database"])
+
+def batches(records, size=BATCH_SIZE):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def passwordHash(password):
+    """
+    Hash the password all generated users share, once, at the configured cost.
+
+    Args:
+        password (str): The password.
+
+    Returns:
+        str: The value to store.
+    """
+    from config.passwords import PASSWORDS
+    from crud import Passwords
+    salt = os.urandom(PASSWORDS["salt_bytes"])
+    key = Passwords.derive(password, salt, PASSWORDS["n"], PASSWORDS["r"], PASSWORDS["p"], PASSWORDS["key_bytes"])
+    return Passwords.encode(PASSWORDS["n"], PASSWORDS["r"], PASSWORDS["p"], salt, key)
+
+def users(count, rng, password):
+    for number in range(1, count + 1):
+        city, state, zone = rng.choice(LOCATIONS)
+        yield {"first_name": "User%d" % number, "middle_name": "", "surname": "Bench", "email": "user%d@example.com" % number,
+            "password": password, "cellphone": "555%07d" % number, "gender": rng.choice("mf"), "city": city, "state": state,
+            "zipcode": "", "timezone": zone}
+
+def meetings(count, zones, days, recurring, rng):
+    """
+    Generate meetings hosted by random users.
+
+    Args:
+        count (int): Number of meetings.
+        zones (List[str]): Timezone of each user, by ID less one.
+        days (int): Length of the window the meetings start in.
+        recurring (float): Share of meetings that are weekly series.
+        rng (Random): The random source.
+
+    Returns:
+        Generator[dict]: Meeting rows, in ID order.
+    """
+    from crud.Recurrence import seriesEnd
+    from crud.Timezone import toUTC
+    for number in range(1, count + 1):
+        organizer = rng.randrange(len(zones))
+        local = START + timedelta(days=rng.randrange(days), minutes=15 * rng.randrange(32, 72))
+        duration = rng.choice((15, 30, 30, 60, 60, 90))
+        starts_at = toUTC(local, zones[organizer])
+        row = {"title": "Meeting %d" % number, "date": local.strftime("%d/%m/%Y"), "time": local.strftime("%H:%M"),
+            "organizer": "user%d@example.com" % (organizer + 1), "duration": duration, "timezone": zones[organizer],
+            "starts_at": starts_at, "ends_at": str(datetime.fromisoformat(starts_at) + timedelta(minutes=duration)),
+            "recurrence": "FREQ=WEEKLY;COUNT=12" if rng.random() < recurring else None}
+        row["series_ends_at"] = seriesEnd(SimpleNamespace(**row))
+        yield row
+
+def populate(user_count, meetings_per_user=2.0, participants_per_meeting=3, leaves_per_user=0.2, days=90, recurring=0.02, seed=0):
+    """
+    Fill empty tables with synthetic data.
+
+    IDs are assumed to start at 1, so the tables must be empty.
+
+    Args:
+        user_count (int): Number of users.
+        meetings_per_user (float): Meetings hosted per user, on average.
+        participants_per_meeting (int): Participant rows per meeting.
+        leaves_per_user (float): Leave records per user, on average.
+        days (int): Length of the window meetings and leave fall in.
+        recurring (float): Share of meetings that are weekly series.
+        seed (int): Seed of the random source.
+
+    Returns:
+        dict: The number of rows written to each table.
+
+    Raises:
+        SystemExit: If the users table is not empty.
+    """
+    from crud import Bulk
+    from crud import Agenda
+    from models.User import User
+    from models.Meeting import Meeting
+    from models.Participant import Participant
+    from models.Availability import Availability
+    if User.select("id").limit(1).get().count():
+        raise SystemExit("The users table is not empty; pass --reuse to benchmark the existing data.")
+    rng = random.Random(seed)
+    zones = []
+    for batch in batches(users(user_count, rng, passwordHash(PASSWORD))):
+        zones += [user["timezone"] for user in batch]
+        Bulk.insert(User, batch)
+
+    meeting_count = int(user_count * meetings_per_user)
+    ranges = []
+    for batch in batches(meetings(meeting_count, zones, days, recurring, rng)):
+        ranges += [(row["starts_at"], row["ends_at"]) if not row["recurrence"] else (None, None) for row in batch]
+        Bulk.insert(Meeting, batch)
+
+    def participants():
+        for meeting_id, (starts_at, ends_at) in enumerate(ranges, 1):
+            for participant_id in rng.sample(range(1, user_count + 1), min(participants_per_meeting, user_count)):
+                yield {"participant_id": participant_id, "meeting_id": meeting_id, "starts_at": starts_at, "ends_at": ends_at}
+    for batch in batches(participants()):
+        Bulk.insert(Participant, batch)
+
+    leave_count = int(user_count * leaves_per_user)
+    def leaves():
+        for _ in range(leave_count):
+            first = START + timedelta(days=rng.randrange(days))
+            last = first + timedelta(days=rng.randrange(5))
+            yield {"start_date": first.strftime("%d/%m/%Y"), "end_date": last.strftime("%d/%m/%Y"), "starts_on": str(first.date()),
+                "ends_on": str(last.date()), "reason": "Leave", "user_id": rng.randrange(1, user_count + 1)}
+    for batch in batches(leaves()):
+        Bulk.insert(Availability, batch)
+    return {"users": user_count, "meetings": meeting_count, "participants": meeting_count * min(participants_per_meeting, user_count),
+        "unavailability": leave_count, "agenda": Agenda.rebuild()}
+
+def addArguments(parser):
+    parser.add_argument("--scale", default="1k", help="number of users, e.g. 1k, 100k, 1m")
+    parser.add_argument("--connection", default="sqlite", choices=["sqlite", "postgres", "mysql"])
+    parser.add_argument("--database", help="SQLite file to use (default: a new temporary file)")
+    parser.add_argument("--meetings-per-user", type=float, default=2.0)
+    parser.add_argument("--participants-per-meeting", type=int, default=3)
+    parser.add_argument("--leaves-per-user", type=float, default=0.2)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--recurring", type=float, default=0.02, help="share of meetings that are weekly series")
+    parser.add_argument("--seed", type=int, default=0)
+
+def generate(args):
+    """
+    Configure the database and populate it from parsed arguments.
+
+    Args:
+        args (Namespace): Arguments added by ``addArguments``.
+
+    Returns:
+        tuple: The database description and the row counts.
+    """
+    database = configure(args.connection, args.database)
+    counts = populate(parseScale(args.scale), args.meetings_per_user, args.participants_per_meeting,
+        args.leaves_per_user, args.days, args.recurring, args.seed)
+    return database, counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a database of synthetic data.")
+    addArguments(parser)
+    args = parser.parse_args()
+    database, counts = generate(args)
+    print(database)
+    print(", ".join("%s=%d" % item for item in counts.items()))
@@ -0,0 +1,95 @@
+"""
+Load-test a running API at several concurrency levels.
+
+Start the server once per execution mode, e.g.
+
+    API_EXECUTION_MODE=sync  uvicorn main:app --port 8001
+    API_EXECUTION_MODE=async uvicorn main:app --port 8002
+
+then run from the api directory:
+
+    python -m benchmarks.load --target sync=http://127.0.0.1:8001 --target async=http://127.0.0.1:8002
+
+Each client sends requests back to back for the duration of a level; the
+report gives the throughput and the p50/p99 latency of every target at
+every level.
+"""
+
+import argparse
+import asyncio
+import time
+import httpx
+
+DEFAULT_PATHS = ["/users/?limit=20", "/meetings/?limit=20", "/participants/?limit=20", "/users/1/meetings"]
+
+def percentile(values, fraction):
+    """
+    Get a percentile of a list of numbers.
+
+    Args:
+        values (List[float]): The measurements.
+        fraction (float): The percentile as a fraction, e.g. ``0.99``.
+
+    Returns:
+        float: The measurement at that percentile, or 0 for no measurements.
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+async def client(http, paths, deadline, latencies, errors, offset):
+    index = offset
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        began = time.perf_counter()
+        try:
+            response = await http.get(path)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as error:
+            errors.append(error)
+            continue
+        latencies.append((time.perf_counter() - began) * 1000)
+
+async def level(url, paths, clients, seconds):
+    """
+    Run one concurrency level against a target.
+
+    Args:
+        url (str): Base URL of the running API.
+        paths (List[str]): Request paths, used round robin.
+        clients (int): Number of concurrent clients.
+        seconds (float): How long to keep sending requests.
+
+    Returns:
+        tuple: Requests per second, p50 and p99 latency in ms, and the error count.
+    """
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as http:
+        began = time.perf_counter()
+        deadline = began + seconds
+        await asyncio.gather(*(client(http, paths, deadline, latencies, errors, offset) for offset in range(clients)))
+        elapsed = time.perf_counter() - began
+    return len(latencies) / elapsed, percentile(latencies, 0.5), percentile(latencies, 0.99), len(errors)
+
+async def main(targets, paths, levels, seconds):
+    print("%-10s %8s %10s %10s %10s %8s" % ("target", "clients", "req/s", "p50 ms", "p99 ms", "errors"))
+    for clients in levels:
+        for name, url in targets:
+            throughput, p50, p99, errors = await level(url, paths, clients, seconds)
+            print("%-10s %8d %10.1f %10.1f %10.1f %8d" % (name, clients, throughput, p50, p99, errors))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the throughput and latency of running API servers.")
+    parser.add_argument("--target", action="append", required=True, help="name=url of a running server; repeat to compare")
+    parser.add_argument("--path", action="append", help="request path; repeat for several (default: list and meeting reads)")
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--seconds", type=float, default=20)
+    args = parser.parse_args()
+
+    targets = [tuple(target.split("=", 1)) for target in args.target]
+    asyncio.run(main(targets, args.path or DEFAULT_PATHS, args.clients, args.seconds))
@@ -0,0 +1,141 @@
+"""
+Benchmark password hashing and signup throughput.
+
+Run from the api directory:
+
+    python -m benchmarks.passwords [--workers 1 2 4 8] [--clients 32] [--seconds 5]
+
+Users are signed up through POST /users/ in-process, over an ASGI transport,
+against a throwaway SQLite database (not db.sqlite3), with remote geocoding
+stubbed out. Each mode of config.passwords runs for --seconds:
+
+- inline: the hash is computed on the event loop;
+- thread: in the database thread pool of crud.Executor.run;
+- process: in the "passwords" process pool, once per --workers count.
+
+The report gives the cost of one hash, then the signups per second, p50/p99
+latency and the longest event-loop stall of every run. Signups only scale
+with worker processes up to the number of cores, which is printed first.
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import time
+from benchmarks import generate
+from benchmarks.load import percentile
+from benchmarks.suite import newUser, stubGeocoding
+from config.executors import EXECUTORS
+from config.passwords import PASSWORDS
+from crud import Executor, Passwords
+
+TICK = 0.005
+
+async def ticker(deadline, stalls):
+    """
+    Measure how late the event loop wakes a sleeping coroutine.
+
+    Args:
+        deadline (float): ``perf_counter`` time to stop at.
+        stalls (List[float]): Receives each delay beyond ``TICK``, in ms.
+    """
+    while time.perf_counter() < deadline:
+        began = time.perf_counter()
+        await asyncio.sleep(TICK)
+        stalls.append((time.perf_counter() - began - TICK) * 1000)
+
+async def signup(http, context, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        began = time.perf_counter()
+        response = await http.post("/users/", json=newUser(context))
+        if response.status_code != 200:
+            errors.append(response.status_code)
+            continue
+        latencies.append((time.perf_counter() - began) * 1000)
+
+async def measure(app, context, clients, seconds):
+    """
+    Sign up users from concurrent clients for a while.
+
+    Args:
+        app (FastAPI): The application.
+        context (dict): The random source and sequence used by ``newUser``.
+        clients (int): Number of concurrent clients.
+        seconds (float): How long to run.
+
+    Returns:
+        dict: Throughput, percentiles, errors and the longest event-loop stall.
+    """
+    import httpx
+    latencies, errors, stalls = [], [], []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=60) as http:
+        began = time.perf_counter()
+        deadline = began + seconds
+        await asyncio.gather(ticker(deadline, stalls), *(signup(http, context, deadline, latencies, errors) for _ in range(clients)))
+        elapsed = time.perf_counter() - began
+    return {
+        "signups_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "errors": len(errors),
+        "max_loop_stall_ms": round(max(stalls, default=0.0), 1),
+    }
+
+def usePool(workers):
+    """
+    Replace the "passwords" process pool with one of ``workers`` processes.
+
+    The workers are started before returning, so spawning them is not
+    measured.
+
+    Args:
+        workers (int): Number of worker processes.
+    """
+    Executor.getProcessPool("passwords").shutdown()
+    Executor.getProcessPool.cache_clear()
+    EXECUTORS["passwords"]["max_workers"] = workers
+    asyncio.run(Passwords.makeMany(["warm-up"] * workers))
+
+def run(args):
+    """
+    Benchmark one hash, then signups in every mode.
+
+    Args:
+        args (Namespace): The parsed command line.
+
+    Returns:
+        dict: The results, keyed by mode and worker count.
+    """
+    if args.cost:
+        PASSWORDS["n"] = args.cost
+    print("%s, %d cores, scrypt n=%d r=%d p=%d" % (generate.configure(database=args.database), os.cpu_count() or 1, PASSWORDS["n"], PASSWORDS["r"], PASSWORDS["p"]))
+    stubGeocoding()
+    from main import app
+    began = time.perf_counter()
+    Passwords.derive("password", os.urandom(PASSWORDS["salt_bytes"]), PASSWORDS["n"], PASSWORDS["r"], PASSWORDS["p"], PASSWORDS["key_bytes"])
+    print("one hash: %.1f ms" % ((time.perf_counter() - began) * 1000))
+    context = {"rng": random.Random(0), "sequence": itertools.count(1)}
+    runs = [("inline", None), ("thread", None)] + [("process", workers) for workers in args.workers]
+    results = {}
+    for mode, workers in runs:
+        PASSWORDS["mode"] = mode
+        if workers:
+            usePool(workers)
+        name = mode if workers is None else "%s x%d" % (mode, workers)
+        results[name] = asyncio.run(measure(app, context, args.clients, args.seconds))
+        print("%-12s %8.1f signups/s  p50 %8.1f ms  p99 %8.1f ms  loop stall %7.1f ms  %d errors" % (name, results[name]["signups_per_second"],
+            results[name]["p50_ms"], results[name]["p99_ms"], results[name]["max_loop_stall_ms"], results[name]["errors"]))
+    Executor.getProcessPool("passwords").shutdown()
+    return results
+
+if __name__ == "__main__":
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark password hashing and signup throughput.")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, max(1, cores // 2), cores, cores * 2}), help="process pool sizes to run")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent signup clients")
+    parser.add_argument("--seconds", type=float, default=5, help="length of each run")
+    parser.add_argument("--cost", type=int, help="scrypt n, instead of the configured one")
+    parser.add_argument("--database", help="SQLite file to write; a new temporary file by default")
+    run(parser.parse_args())
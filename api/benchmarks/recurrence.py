@@ -0,0 +1,63 @@
+"""
+Benchmark lazy expansion of recurring meetings.
+
+Run from the api directory:
+
+    python -m benchmarks.recurrence [--series 1000] [--occurrences 1000]
+
+Each series is a meeting row in memory with a daily or weekly rule, so the
+run measures expansion only, not database access. Expanding a one week window
+should cost the same whatever the length of the series, while expanding every
+occurrence, as storing each one as its own row would need, grows with it.
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from crud.Recurrence import occurrences
+
+ZONES = ["America/New_York", "America/Chicago", "America/Denver", "America/Los_Angeles"]
+
+def generate(series, count):
+    """
+    Generate recurring meetings.
+
+    Args:
+        series (int): Number of series.
+        count (int): Occurrences per series.
+
+    Returns:
+        List[SimpleNamespace]: Meetings with the columns expansion reads.
+    """
+    start = datetime(2024, 1, 1)
+    return [SimpleNamespace(
+        starts_at=str(start + timedelta(minutes=15 * random.randrange(96))),
+        duration=random.choice((15, 30, 60)),
+        timezone=random.choice(ZONES),
+        recurrence="FREQ=%s;COUNT=%d" % (random.choice(("DAILY", "WEEKLY")), count),
+    ) for _ in range(series)]
+
+def timed(meetings, start, end):
+    began = time.perf_counter()
+    total = sum(1 for meeting in meetings for _ in occurrences(meeting, start, end))
+    return total, (time.perf_counter() - began) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark lazy expansion of recurring meetings.")
+    parser.add_argument("--series", type=int, default=1000)
+    parser.add_argument("--occurrences", type=int, default=1000)
+    parser.add_argument("--window", type=int, default=7, help="window length in days")
+    parser.add_argument("--offset", type=int, default=180, help="days from the first occurrence to the window")
+    args = parser.parse_args()
+
+    random.seed(0)
+    meetings = generate(args.series, args.occurrences)
+    start = datetime(2024, 1, 1) + timedelta(days=args.offset)
+    window, window_ms = timed(meetings, start, start + timedelta(days=args.window))
+    everything, everything_ms = timed(meetings, datetime.min, datetime.max)
+
+    print("series=%d occurrences per series=%d" % (args.series, args.occurrences))
+    print("window of %d days: %d occurrences in %.2f ms" % (args.window, window, window_ms))
+    print("whole series:      %d occurrences in %.2f ms" % (everything, everything_ms))
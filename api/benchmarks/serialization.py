@@ -0,0 +1,80 @@
+"""
+Benchmark the raw-row read path against model hydration and orm_mode.
+
+Run from the api directory:
+
+    python -m benchmarks.serialization [--rows 10000 100000]
+
+Users are written to a throwaway SQLite database (not db.sqlite3). For each
+size, every user is read and encoded two ways:
+
+- model: ``get()`` builds a model per row, ``UserResult.from_orm`` validates
+  it and FastAPI's ``jsonable_encoder`` and ``json`` encode the result, as a
+  route with ``response_model`` does;
+- raw: ``crud.Pagination.fetch`` returns the driver's dicts and
+  ``crud.Encoder.dumps`` encodes them, as the list routes now do.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from fastapi.encoders import jsonable_encoder
+from config.database import DATABASES
+from crud import Encoder, Pagination
+from models.User import User
+import schema
+
+def populate(path, rows):
+    """
+    Create a users table holding synthetic users.
+
+    Args:
+        path (str): Path of the SQLite database.
+        rows (int): Number of users.
+    """
+    columns = [column for column in schema.UserResult.__fields__ if column != "id"]
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, " + ", ".join(column + " TEXT" for column in columns) + ")")
+    connection.executemany("INSERT INTO users (" + ", ".join(columns) + ") VALUES (" + ", ".join("?" for _ in columns) + ")",
+        ([("user%d@example.com" % number if column == "email" else "%s %d" % (column, number)) for column in columns] for number in range(rows)))
+    connection.commit()
+    connection.close()
+
+def model(columns):
+    began = time.perf_counter()
+    rows = User.select(*columns).get()
+    hydrated = time.perf_counter()
+    results = [schema.UserResult.from_orm(row) for row in rows]
+    validated = time.perf_counter()
+    body = json.dumps(jsonable_encoder(results)).encode("utf-8")
+    encoded = time.perf_counter()
+    return body, {"query": hydrated - began, "validate": validated - hydrated, "encode": encoded - validated}
+
+def raw(columns):
+    began = time.perf_counter()
+    rows = Pagination.fetch(User.select(*columns))
+    fetched = time.perf_counter()
+    body = Encoder.dumps(rows)
+    encoded = time.perf_counter()
+    return body, {"query": fetched - began, "validate": 0.0, "encode": encoded - fetched}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the raw-row read path.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    columns = Pagination.columns(schema.UserResult)
+    print("encoder: " + ("orjson" if Encoder.orjson is not None else "json"))
+    for rows in args.rows:
+        directory = tempfile.mkdtemp()
+        DATABASES["sqlite"]["database"] = os.path.join(directory, "users-%d.sqlite3" % rows)
+        populate(DATABASES["sqlite"]["database"], rows)
+        for name, path in (("model", model), ("raw", raw)):
+            runs = sorted((path(columns) for _ in range(args.runs)), key=lambda run: sum(run[1].values()))
+            body, phases = runs[0]
+            print("rows=%-7d %-5s total %8.1f ms  (query %.1f, validate %.1f, encode %.1f)  %d bytes" % (
+                rows, name, sum(phases.values()) * 1000, phases["query"] * 1000, phases["validate"] * 1000, phases["encode"] * 1000, len(body)))
@@ -0,0 +1,49 @@
+"""
+Benchmark the slot recommendation engine.
+
+Run from the api directory:
+
+    python -m benchmarks.slots [--users 200] [--days 28]
+
+Busy intervals are generated in memory, as in benchmarks.freebusy, and users
+are spread over a few US timezones, so the run measures the bitset grid and
+the ranking only, not database access.
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from benchmarks.freebusy import generate
+from crud.FreeBusy import mergeIntervals
+from crud.Slots import recommend
+
+ZONES = ["America/New_York", "America/Chicago", "America/Denver", "America/Los_Angeles"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the slot recommendation engine.")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--meetings", type=int, default=4000)
+    parser.add_argument("--attendees", type=int, default=5)
+    parser.add_argument("--days", type=int, default=28)
+    parser.add_argument("--duration", type=int, default=60, help="slot duration in minutes")
+    parser.add_argument("--step", type=int, default=15, help="candidate spacing in minutes")
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    random.seed(0)
+    start, end, intervals = generate(args.users, args.meetings, args.attendees, args.days)
+    intervals = {user_id: mergeIntervals(busy) for user_id, busy in intervals.items()}
+    zones = {user_id: random.choice(ZONES) for user_id in intervals}
+    timings = []
+    for _ in range(args.runs):
+        began = time.perf_counter()
+        slots = recommend(intervals, zones, start, end, timedelta(minutes=args.duration), timedelta(minutes=args.step),
+            args.top, datetime.strptime("09:00", "%H:%M").time(), datetime.strptime("17:00", "%H:%M").time(), True)
+        timings.append((time.perf_counter() - began) * 1000)
+
+    print("users=%d days=%d intervals=%d" % (args.users, args.days, sum(len(busy) for busy in intervals.values())))
+    print("recommend: best %.2f ms, median %.2f ms" % (min(timings), sorted(timings)[len(timings) // 2]))
+    for slot in slots:
+        print("  %s  free=%d in_hours=%d outside=%d min" % (slot["start"], slot["free"], slot["in_hours"], slot["outside_minutes"]))
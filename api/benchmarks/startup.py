@@ -0,0 +1,140 @@
+"""
+Benchmark the cold start of a worker.
+
+Run from the api directory:
+
+    python -m benchmarks.startup [--runs 5] --output startup.json
+    python -m benchmarks.startup --output new.json --baseline startup.json
+
+Each run starts a fresh interpreter, as a new worker would be, against a
+throwaway SQLite database (not db.sqlite3), and records:
+
+- import_ms: importing main;
+- startup_ms: the app's startup event, which warms the worker;
+- ready_ms: from before the import to the first 200 from GET /ready;
+- first_signup_ms: the first POST /users/;
+- first_read_ms: the first GET /users/{user_id}/meetings.
+
+The median of each over --runs is reported. With --baseline, a measurement
+that grew by more than --threshold (and by at least MIN_REGRESSION_MS) is
+reported and the run exits with status 1, so CI can track cold start.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from benchmarks import generate
+
+MIN_REGRESSION_MS = 20.0
+METRICS = ("import_ms", "startup_ms", "ready_ms", "first_signup_ms", "first_read_ms")
+
+# Runs in the fresh interpreter; prints the measurements as JSON.
+CHILD = """
+import json, sys, time
+began = time.perf_counter()
+import main
+imported = time.perf_counter()
+from config.database import DATABASES
+DATABASES["sqlite"]["database"] = sys.argv[1]
+from fastapi.testclient import TestClient
+from benchmarks.suite import stubGeocoding
+stubGeocoding()
+times = {"import_ms": imported - began}
+with TestClient(main.app) as client:
+    started = time.perf_counter()
+    times["startup_ms"] = started - imported
+    assert client.get("/ready").status_code == 200
+    times["ready_ms"] = time.perf_counter() - began
+    user = {"first_name": "Cold", "middle_name": "", "surname": "Start", "email": "cold@example.com", "password": "x",
+        "cellphone": "5550000000", "gender": "f", "city": "Dallas", "state": "TX", "zipcode": "", "timezone": ""}
+    step = time.perf_counter()
+    assert client.post("/users/", json=user).status_code == 200
+    times["first_signup_ms"] = time.perf_counter() - step
+    step = time.perf_counter()
+    assert client.get("/users/1/meetings").status_code == 200
+    times["first_read_ms"] = time.perf_counter() - step
+print(json.dumps({name: round(seconds * 1000, 1) for name, seconds in times.items()}))
+"""
+
+def coldStart(database):
+    """
+    Start one fresh interpreter and time its way to the first requests.
+
+    Args:
+        database (str): The migrated SQLite file to serve.
+
+    Returns:
+        dict: The measurements in ms.
+    """
+    output = subprocess.run([sys.executable, "-c", CHILD, database], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def compare(baseline, results, threshold):
+    """
+    Find the measurements that regressed against a baseline.
+
+    Args:
+        baseline (dict): A saved result.
+        results (dict): The result to check.
+        threshold (float): Allowed relative slowdown, e.g. ``0.2`` for 20%.
+
+    Returns:
+        List[str]: A description of each regression.
+    """
+    regressions = []
+    for metric in METRICS:
+        before, current = baseline.get("median", {}).get(metric), results["median"][metric]
+        if before is not None and current > before * (1 + threshold) and current - before >= MIN_REGRESSION_MS:
+            regressions.append("%s %.1f ms -> %.1f ms" % (metric, before, current))
+    return regressions
+
+def run(args):
+    """
+    Build the database, then time --runs cold starts.
+
+    Args:
+        args (Namespace): The parsed command line.
+
+    Returns:
+        dict: The results.
+    """
+    database = generate.configure(database=args.database)
+    generate.populate(10)
+    runs = []
+    for _ in range(args.runs):
+        runs.append(coldStart(database))
+        print("  ".join("%s %7.1f" % (metric, runs[-1][metric]) for metric in METRICS))
+    median = {metric: round(statistics.median(measured[metric] for measured in runs), 1) for metric in METRICS}
+    print("median  " + "  ".join("%s %7.1f" % (metric, median[metric]) for metric in METRICS))
+    return {
+        "meta": {"database": database, "runs": args.runs, "cores": os.cpu_count(), "python": platform.python_version(),
+            "platform": platform.platform(), "started": datetime.utcnow().isoformat(timespec="seconds")},
+        "runs": runs,
+        "median": median,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of a worker.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start")
+    parser.add_argument("--database", help="SQLite file to write; a new temporary file by default")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="saved result to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown before flagging")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(json.load(file), results, args.threshold)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        print("%d regressions against %s" % (len(regressions), args.baseline))
+        sys.exit(1 if regressions else 0)
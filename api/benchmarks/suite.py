@@ -0,0 +1,332 @@
+"""
+Benchmark every route of the API against a synthetic database.
+
+Run from the api directory:
+
+    python -m benchmarks.suite --scale 1k --output results.json
+    python -m benchmarks.suite --scale 100k --output new.json --baseline results.json
+    python -m benchmarks.suite --results new.json --baseline results.json
+
+A run builds a database with benchmarks.generate (same options: --scale,
+--connection, --database, ...; pass --reuse to benchmark a database built
+earlier), stubs out remote geocoding, and then:
+
+- sends --requests requests to every route of main.app in-process through
+  TestClient, one at a time, recording latency percentiles, SQL queries per
+  request and the peak RSS of the process;
+- runs the read routes under concurrent load (--clients, --seconds) through
+  an in-process ASGI transport, recording throughput and percentiles.
+
+Routes without a request builder in REQUESTS are listed as skipped, so new
+routes show up in the report until they are given one. Results are written
+as JSON. With --baseline, each route's p50/p95 latency and query count and
+each load level's throughput are compared with a saved result, and the run
+exits with status 1 if any of them regressed by more than --threshold.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import random
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+from benchmarks import generate
+from benchmarks.load import client, percentile
+
+MIN_REGRESSION_MS = 1.0
+QUERIES = {"count": 0}
+
+def countQueries():
+    """
+    Count the statements sent through the ORM's connection classes.
+
+    The pooled drivers of config.pool inherit ``query`` from these classes,
+    so every statement the API runs is counted.
+    """
+    from masoniteorm.connections import SQLiteConnection, PostgresConnection, MySQLConnection
+    for connection_class in (SQLiteConnection, PostgresConnection, MySQLConnection):
+        def query(self, *args, original=connection_class.query, **kwargs):
+            QUERIES["count"] += 1
+            return original(self, *args, **kwargs)
+        connection_class.query = query
+
+def stubGeocoding():
+    """Resolve every location missing from the offline table without calling the geocoder."""
+    from crud import Timezone
+    Timezone.geocodeTimeZone = lambda key: "America/Chicago"
+
+def peakRSS():
+    """
+    Get the peak resident set size of this process.
+
+    Returns:
+        float: The peak RSS in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def window(context):
+    first = generate.START + timedelta(days=context["rng"].randrange(context["days"]))
+    return {"start_date": first.strftime("%d/%m/%Y"), "start_time": "00:00",
+        "end_date": (first + timedelta(days=7)).strftime("%d/%m/%Y"), "end_time": "00:00", "timezone": "America/Chicago"}
+
+def newUser(context):
+    number = next(context["sequence"])
+    city, state, zone = context["rng"].choice(generate.LOCATIONS)
+    return {"first_name": "New", "middle_name": "", "surname": "Bench", "email": "new%d@example.com" % number, "password": generate.PASSWORD,
+        "cellphone": "555", "gender": "m", "city": city, "state": state, "zipcode": "", "timezone": ""}
+
+def newMeeting(context):
+    local = generate.START + timedelta(days=context["rng"].randrange(context["days"]), minutes=15 * context["rng"].randrange(32, 72))
+    return {"title": "New", "date": local.strftime("%d/%m/%Y"), "time": local.strftime("%H:%M"),
+        "organizer": "user%d@example.com" % userId(context), "duration": 30}
+
+def newLeave(context):
+    first = generate.START + timedelta(days=context["rng"].randrange(context["days"]))
+    return {"start_date": first.strftime("%d/%m/%Y"), "end_date": first.strftime("%d/%m/%Y"), "reason": "Bench", "user_id": userId(context)}
+
+def newParticipant(context):
+    return {"participant_id": userId(context), "meeting_id": meetingId(context)}
+
+def userId(context):
+    return context["rng"].randrange(1, context["users"] + 1)
+
+def meetingId(context):
+    return context["rng"].randrange(1, context["meetings"] + 1)
+
+def leaveId(context):
+    return context["rng"].randrange(1, max(2, context["unavailability"] + 1))
+
+def cursor(context, table):
+    return context["rng"].randrange(max(1, context[table] - 100))
+
+REQUESTS = {
+    "GET /": lambda context: ("GET", "/", None),
+    "GET /users/": lambda context: ("GET", "/users/?cursor=%d" % cursor(context, "users"), None),
+    "POST /users/": lambda context: ("POST", "/users/", newUser(context)),
+    "GET /users/{user_id}": lambda context: ("GET", "/users/%d" % userId(context), None),
+    "GET /users/{user_id}/meetings": lambda context: ("GET", "/users/%d/meetings" % userId(context), None),
+    "POST /users/bulk": lambda context: ("POST", "/users/bulk", [newUser(context) for _ in range(100)]),
+    "POST /login": lambda context: ("POST", "/login", {"email": "user%d@example.com" % userId(context), "password": generate.PASSWORD}),
+    "GET /unavailability/": lambda context: ("GET", "/unavailability/?cursor=%d" % cursor(context, "unavailability"), None),
+    "POST /unavailability/": lambda context: ("POST", "/unavailability/", newLeave(context)),
+    "POST /unavailability/bulk": lambda context: ("POST", "/unavailability/bulk", [newLeave(context) for _ in range(100)]),
+    "GET /unavailability/{leave_id}": lambda context: ("GET", "/unavailability/%d" % leaveId(context), None),
+    "GET /user/{user_id}/unavailability/": lambda context: ("GET", "/user/%d/unavailability/" % userId(context), None),
+    "GET /participants/": lambda context: ("GET", "/participants/?cursor=%d" % cursor(context, "participants"), None),
+    "GET /participants/{meeting_id}": lambda context: ("GET", "/participants/%d" % meetingId(context), None),
+    "GET /participants/{participant_id}/meetings": lambda context: ("GET", "/participants/%d/meetings" % userId(context), None),
+    "POST /participants/": lambda context: ("POST", "/participants/", newParticipant(context)),
+    "POST /participants/bulk": lambda context: ("POST", "/participants/bulk", [newParticipant(context) for _ in range(100)]),
+    "GET /meetings/": lambda context: ("GET", "/meetings/?cursor=%d" % cursor(context, "meetings"), None),
+    "POST /meetings/": lambda context: ("POST", "/meetings/", newMeeting(context)),
+    "POST /meetings/bulk": lambda context: ("POST", "/meetings/bulk", [newMeeting(context) for _ in range(100)]),
+    "GET /meetings/batch": lambda context: ("GET", "/meetings/batch?ids=" + ",".join(str(meetingId(context)) for _ in range(20)), None),
+    "GET /meetings/{meeting_id}": lambda context: ("GET", "/meetings/%d" % meetingId(context), None),
+    "POST /freebusy/": lambda context: ("POST", "/freebusy/", dict(window(context), duration=30, user_ids=[userId(context) for _ in range(5)])),
+    "POST /slots/": lambda context: ("POST", "/slots/", dict(window(context), duration=30, user_ids=[userId(context) for _ in range(5)])),
+    "GET /export/{table}.{format}": lambda context: ("GET", "/export/%s.ndjson" % context["rng"].choice(["meetings", "participants", "unavailability"]), None),
+    "GET /sync": lambda context: ("GET", "/sync", None),
+    "GET /ready": lambda context: ("GET", "/ready", None),
+    "GET /metrics": lambda context: ("GET", "/metrics", None),
+    "GET /metrics/pool": lambda context: ("GET", "/metrics/pool", None),
+    "GET /metrics/cache": lambda context: ("GET", "/metrics/cache", None),
+}
+
+# Routes whose cost grows with the whole table; they get a tenth of the requests.
+EXPENSIVE = {"GET /export/{table}.{format}"}
+
+# Read routes used for the concurrent load phase.
+LOAD_ROUTES = ["GET /users/", "GET /users/{user_id}", "GET /users/{user_id}/meetings", "GET /meetings/{meeting_id}",
+    "GET /participants/{participant_id}/meetings", "GET /user/{user_id}/unavailability/", "GET /meetings/"]
+
+def routes(app):
+    """
+    List the routes of the API.
+
+    Args:
+        app (FastAPI): The application.
+
+    Returns:
+        List[str]: "METHOD path" of every route, in declaration order.
+    """
+    from fastapi.routing import APIRoute
+    return [method + " " + route.path for route in app.routes if isinstance(route, APIRoute) for method in sorted(route.methods)]
+
+def benchmarkRoutes(app, context, requests):
+    """
+    Time every route in-process, one request at a time.
+
+    Args:
+        app (FastAPI): The application.
+        context (dict): Row counts, days and the random source used by the request builders.
+        requests (int): Requests per route.
+
+    Returns:
+        dict: The measurements of each route, keyed by "METHOD path".
+    """
+    from fastapi.testclient import TestClient
+    measured = {}
+    with TestClient(app) as http:
+        for route in routes(app):
+            if route not in REQUESTS:
+                measured[route] = {"skipped": "no request builder in benchmarks.suite.REQUESTS"}
+                continue
+            count = max(1, requests // 10) if route in EXPENSIVE else requests
+            latencies, errors, sample = [], 0, None
+            queries = QUERIES["count"]
+            for _ in range(count):
+                method, url, body = REQUESTS[route](context)
+                began = time.perf_counter()
+                response = http.request(method, url, json=body, follow_redirects=False)
+                latencies.append((time.perf_counter() - began) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+                    sample = sample or "%d %s" % (response.status_code, response.text[:200])
+            measured[route] = {
+                "requests": count,
+                "errors": errors,
+                "p50_ms": round(percentile(latencies, 0.5), 3),
+                "p95_ms": round(percentile(latencies, 0.95), 3),
+                "p99_ms": round(percentile(latencies, 0.99), 3),
+                "mean_ms": round(sum(latencies) / len(latencies), 3),
+                "queries_per_request": round((QUERIES["count"] - queries) / count, 2),
+                "peak_rss_mb": round(peakRSS(), 1),
+            }
+            if sample:
+                measured[route]["error_sample"] = sample
+            print("%-48s p50 %8.2f ms  p95 %8.2f ms  %6.1f queries  %d errors" % (
+                route, measured[route]["p50_ms"], measured[route]["p95_ms"], measured[route]["queries_per_request"], errors))
+    return measured
+
+async def benchmarkLoad(app, context, levels, seconds):
+    """
+    Run the read routes under concurrent load through an in-process ASGI transport.
+
+    Args:
+        app (FastAPI): The application.
+        context (dict): Row counts, days and the random source used by the request builders.
+        levels (List[int]): Numbers of concurrent clients.
+        seconds (float): How long each level runs.
+
+    Returns:
+        dict: Throughput, percentiles and errors of each level, keyed by client count.
+    """
+    import httpx
+    paths = [REQUESTS[route](context)[1] for route in LOAD_ROUTES for _ in range(50)]
+    context["rng"].shuffle(paths)
+    measured = {}
+    for clients in levels:
+        latencies, errors = [], []
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=60) as http:
+            began = time.perf_counter()
+            await asyncio.gather(*(client(http, paths, began + seconds, latencies, errors, offset) for offset in range(clients)))
+            elapsed = time.perf_counter() - began
+        measured[str(clients)] = {
+            "requests_per_second": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 0.5), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "errors": len(errors),
+            "peak_rss_mb": round(peakRSS(), 1),
+        }
+        print("%4d clients  %8.1f req/s  p50 %8.2f ms  p99 %8.2f ms  %d errors" % (
+            clients, measured[str(clients)]["requests_per_second"], measured[str(clients)]["p50_ms"], measured[str(clients)]["p99_ms"], len(errors)))
+    return measured
+
+def compare(baseline, results, threshold):
+    """
+    Find the measurements that regressed against a baseline.
+
+    Latency only counts as regressed when it also grew by at least
+    ``MIN_REGRESSION_MS``, so sub-millisecond noise is ignored.
+
+    Args:
+        baseline (dict): A saved result.
+        results (dict): The result to check.
+        threshold (float): Allowed relative slowdown, e.g. ``0.2`` for 20%.
+
+    Returns:
+        List[str]: A description of each regression.
+    """
+    regressions = []
+    for route, current in results["routes"].items():
+        before = baseline.get("routes", {}).get(route, {})
+        if "p50_ms" not in current or "p50_ms" not in before:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if current[metric] > before[metric] * (1 + threshold) and current[metric] - before[metric] >= MIN_REGRESSION_MS:
+                regressions.append("%s %s %.2f -> %.2f" % (route, metric, before[metric], current[metric]))
+        if current["queries_per_request"] > before["queries_per_request"]:
+            regressions.append("%s queries_per_request %.2f -> %.2f" % (route, before["queries_per_request"], current["queries_per_request"]))
+    for clients, current in results.get("load", {}).items():
+        before = baseline.get("load", {}).get(clients)
+        if before and current["requests_per_second"] < before["requests_per_second"] * (1 - threshold):
+            regressions.append("load %s clients requests_per_second %.1f -> %.1f" % (clients, before["requests_per_second"], current["requests_per_second"]))
+    return regressions
+
+def run(args):
+    """
+    Build the database, then benchmark the routes and the load levels.
+
+    Args:
+        args (Namespace): The parsed command line.
+
+    Returns:
+        dict: The results.
+    """
+    countQueries()
+    if args.reuse:
+        database = generate.configure(args.connection, args.database)
+        from models.User import User
+        from models.Meeting import Meeting
+        from models.Participant import Participant
+        from models.Availability import Availability
+        counts = {"users": User.count(), "meetings": Meeting.count(), "participants": Participant.count(), "unavailability": Availability.count()}
+    else:
+        database, counts = generate.generate(args)
+    stubGeocoding()
+    from main import app
+    context = dict(counts, days=args.days, rng=random.Random(args.seed), sequence=itertools.count(1))
+    print("%s: %s" % (database, ", ".join("%s=%d" % item for item in counts.items())))
+    results = {
+        "meta": {"database": database, "connection": args.connection, "rows": counts, "requests": args.requests,
+            "python": platform.python_version(), "platform": platform.platform(), "started": datetime.utcnow().isoformat(timespec="seconds")},
+        "routes": benchmarkRoutes(app, context, args.requests),
+    }
+    results["load"] = asyncio.run(benchmarkLoad(app, context, args.clients, args.seconds)) if args.clients else {}
+    results["meta"]["peak_rss_mb"] = round(peakRSS(), 1)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every route against a synthetic database.")
+    generate.addArguments(parser)
+    parser.add_argument("--reuse", action="store_true", help="benchmark the data already in --database")
+    parser.add_argument("--requests", type=int, default=50, help="requests per route")
+    parser.add_argument("--clients", type=int, nargs="*", default=[16, 64], help="concurrency levels of the load phase")
+    parser.add_argument("--seconds", type=float, default=5, help="length of each load level")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--results", help="compare this saved result instead of running")
+    parser.add_argument("--baseline", help="saved result to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown before flagging")
+    args = parser.parse_args()
+
+    if args.results:
+        with open(args.results) as file:
+            results = json.load(file)
+    else:
+        results = run(args)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(json.load(file), results, args.threshold)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        print("%d regressions against %s" % (len(regressions), args.baseline))
+        sys.exit(1 if regressions else 0)
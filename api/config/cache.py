@@ -0,0 +1,27 @@
+import os
+
+# Response cache for user and meeting reads.
+#
+# "memory" keeps entries in an LRU per worker process. "redis" shares them
+# between workers through any Redis-compatible server (redis, valkey,
+# keydb) and needs the redis package. Entries expire after "ttl" seconds
+# even if no write invalidates them.
+#
+# A write only invalidates the memory cache of the worker that handled it,
+# so other workers would serve the old response (and 304s for it) until
+# the entry expires. With more than one worker, gunicorn.conf.py therefore
+# lowers the memory cache's TTL to "multi_worker_ttl" and warns; use
+# "redis" to cache for the full TTL.
+
+CACHE = {
+  "backend": os.environ.get("API_CACHE_BACKEND", "memory"),
+  "ttl": 300,
+  "memory": {
+    "max_entries": 10000,
+    "multi_worker_ttl": 2,
+  },
+  "redis": {
+    "url": os.environ.get("API_CACHE_REDIS_URL", "redis://127.0.0.1:6379/0"),
+    "prefix": "api:",
+  }
+}
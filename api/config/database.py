@@ -1,34 +1,97 @@
+import os
 from masoniteorm.connections import ConnectionResolver
+from config import pool
+
+# Read replicas.
+#
+# Each connection's "replicas" entry lists databases holding copies of the
+# primary; see config.pool. Reads of crud functions decorated with
+# pool.reads go to one of them, picked by "select"; writes, transactions
+# and responses cached within "sticky_seconds" of a write stay on the
+# primary. Replicas are set from the environment, comma-separated:
+#
+#   API_SQLITE_REPLICAS=replica.sqlite3      # files, e.g. kept up to date by scripts.copy_replica
+#   API_POSTGRES_REPLICAS=127.0.0.1:5433     # host:port of streaming replicas
+#   API_MYSQL_REPLICAS=127.0.0.1:3307
+#
+# To try it locally with Postgres, run a primary and a replica container
+# (e.g. bitnami/postgresql with POSTGRESQL_REPLICATION_MODE=master/slave),
+# set "default" to "postgres" and API_POSTGRES_REPLICAS to the replica.
+
+def replicaHosts(variable, key):
+    hosts = []
+    for entry in filter(None, os.environ.get(variable, "").split(",")):
+        if key == "database":
+            hosts.append({"database": entry.strip()})
+        else:
+            host, _, port = entry.strip().partition(":")
+            hosts.append(dict({"host": host}, **({"port": int(port)} if port else {})))
+    return hosts
+
+def replicas(variable, key):
+    return {
+      "hosts": replicaHosts(variable, key),
+      "select": os.environ.get("API_REPLICA_SELECT", "round_robin"),
+      "sticky_seconds": 5,
+      "retry_seconds": 30,
+    }
 
 DATABASES = {
   "default": "sqlite",
   "mysql": {
     "host": "127.0.0.1",
-    "driver": "mysql",
+    "driver": "pooled_mysql",
     "database": "masonite",
     "user": "root",
     "password": "",
     "port": 3306,
     "log_queries": False,
+    "pool": {
+      "min_size": 2,
+      "max_size": 16,
+      "timeout": 10,
+      "health_check": 30,
+    },
+    "replicas": replicas("API_MYSQL_REPLICAS", "host"),
     "options": {
       #
     }
   },
   "postgres": {
     "host": "127.0.0.1",
-    "driver": "postgres",
+    "driver": "pooled_postgres",
     "database": "test",
     "user": "test",
     "password": "test",
     "port": 5432,
     "log_queries": False,
+    "pool": {
+      "min_size": 2,
+      "max_size": 16,
+      "timeout": 10,
+      "health_check": 30,
+    },
+    "replicas": replicas("API_POSTGRES_REPLICAS", "host"),
     "options": {
       #
     }
   },
   "sqlite": {
-    "driver": "sqlite",
+    "driver": "pooled_sqlite",
     "database": "db.sqlite3",
+    "pool": {
+      "min_size": 1,
+      "max_size": 16,
+      "timeout": 10,
+      "health_check": 300,
+    },
+    "replicas": replicas("API_SQLITE_REPLICAS", "database"),
+    "pragmas": {
+      "journal_mode": "WAL",
+      "synchronous": "NORMAL",
+      "busy_timeout": 5000,
+      "mmap_size": 268435456,
+    }
   }
 }
 
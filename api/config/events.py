@@ -0,0 +1,35 @@
+import os
+
+# Change events.
+#
+# The write paths append an event to the "outbox" table for every user a
+# change concerns, in the transaction that saves the change.
+# GET /users/{user_id}/events streams a user's events as Server-Sent Events,
+# starting after the Last-Event-ID header or the "after" parameter, so
+# clients resume where they stopped instead of polling their meeting lists.
+#
+# Event IDs are taken when a transaction inserts its events but only become
+# visible when it commits, so on Postgres and MySQL an event can commit after
+# one with a higher ID has been read. A stream therefore only sends events
+# written at least "settle_seconds" ago, stopping at the first newer one, and
+# a new stream starts before the first such event. Events are delivered in ID
+# order, each once, as long as the transaction that wrote them commits within
+# "settle_seconds"; later commits can be missed. Events reach streams after
+# "settle_seconds" to "settle_seconds" + 1 seconds, since the timestamps have
+# a one-second resolution.
+#
+# A stream wakes as soon as this worker commits an event for its user, and
+# checks the outbox every "poll_seconds" for events committed by other
+# workers. An idle stream sends a comment every "heartbeat_seconds" so
+# proxies keep it open, and reads at most "batch_size" events per query.
+# scripts.prune_outbox deletes events older than "retention_days"; a client
+# resuming from before them is told to reload.
+
+EVENTS = {
+  "poll_seconds": float(os.environ.get("API_EVENTS_POLL_SECONDS", 2)),
+  "settle_seconds": float(os.environ.get("API_EVENTS_SETTLE_SECONDS", 2)),
+  "heartbeat_seconds": 15,
+  "retry_ms": 3000,
+  "batch_size": 100,
+  "retention_days": int(os.environ.get("API_EVENTS_RETENTION_DAYS", 7)),
+}
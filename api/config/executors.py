@@ -0,0 +1,31 @@
+import os
+
+# Thread pools used by the async route handlers.
+#
+# The ORM is blocking, so handlers hand every query to the "database" pool;
+# keep max_workers at or below the number of connections the database
+# accepts. Remote geocoding runs in its own pool, awaited by the handler
+# before it hands any work to the database pool, so a slow geocoder cannot
+# take database workers; it is abandoned after "timeout" seconds. Keep the
+# database pool within the "pool" max_size in config.database so workers do
+# not queue for connections.
+#
+# Password hashing is CPU bound, so it runs in the "passwords" pool of
+# worker processes; keep max_workers at or below the number of cores.
+#
+# With mode "sync" handlers use the server's shared threadpool instead, as
+# plain def handlers do; it exists to compare the two under load.
+
+EXECUTORS = {
+  "mode": os.environ.get("API_EXECUTION_MODE", "async"),
+  "database": {
+    "max_workers": int(os.environ.get("API_DATABASE_WORKERS", 16)),
+  },
+  "geocoder": {
+    "max_workers": 4,
+    "timeout": 3,
+  },
+  "passwords": {
+    "max_workers": int(os.environ.get("API_PASSWORD_WORKERS", os.cpu_count() or 1)),
+  }
+}
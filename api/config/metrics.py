@@ -0,0 +1,34 @@
+import os
+
+# Request metrics.
+#
+# Every request records its SQL statements and their time, the time spent
+# in crud.Timezone conversions and geocoding, and response serialization.
+# These are sent back in a Server-Timing header when "server_timing" is on,
+# and added to the per-route totals and latency histograms served by
+# GET /metrics in the Prometheus text format.
+#
+# Totals are kept per worker process. When "multiprocess_dir" is set, every
+# worker writes its totals to a file there each "flush_seconds" and when it
+# stops, and GET /metrics from any worker sums the files, so one scrape sees
+# every worker. gunicorn.conf.py sets it to a fresh temporary directory when
+# it runs more than one worker; a directory given in API_METRICS_DIR is
+# emptied when the server starts. The files of exited workers are kept, so
+# counters carry on across worker restarts. Without it, GET /metrics only
+# returns the totals of the worker that answered.
+#
+# "buckets" are the request latency histogram bounds in seconds and
+# "query_buckets" the bounds of the statements-per-request histogram.
+# Statements slower than "slow_query_ms" are logged with their SQL,
+# literals stripped, and the line of the API that ran them; the log is off
+# when it is None.
+
+METRICS = {
+  "enabled": os.environ.get("API_METRICS", "1") != "0",
+  "server_timing": os.environ.get("API_SERVER_TIMING", "1") != "0",
+  "buckets": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+  "query_buckets": (1, 2, 5, 10, 20, 50, 100, 200, 500),
+  "multiprocess_dir": os.environ.get("API_METRICS_DIR") or None,
+  "flush_seconds": 5,
+  "slow_query_ms": float(os.environ["API_SLOW_QUERY_MS"]) if os.environ.get("API_SLOW_QUERY_MS") else None,
+}
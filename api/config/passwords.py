@@ -0,0 +1,23 @@
+import os
+
+# Password hashing.
+#
+# Passwords are stored as "scrypt$n$r$p$salt$key", so each hash records the
+# cost it was made with. Raising "n" (a power of two), "r" or "p" makes new
+# hashes slower to compute and to attack; existing hashes keep verifying and
+# are rehashed at the new cost the next time their user logs in. One hash
+# at the defaults takes about 50 ms of CPU and 16 MB of memory.
+#
+# With mode "process" hashes are computed in the "passwords" process pool of
+# config.executors, so signups scale with cores without holding the event
+# loop or a database worker; "thread" uses the database pool and "inline"
+# the event loop itself. The last two exist to compare against under load.
+
+PASSWORDS = {
+  "mode": os.environ.get("API_PASSWORD_MODE", "process"),
+  "n": int(os.environ.get("API_PASSWORD_COST", 2 ** 14)),
+  "r": 8,
+  "p": 1,
+  "salt_bytes": 16,
+  "key_bytes": 32,
+}
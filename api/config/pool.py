@@ -0,0 +1,460 @@
+"""
+Pooled connection drivers for Masonite ORM.
+
+The stock drivers open a connection for every query (SQLite) or keep an
+unbounded, unlocked list of idle connections (MySQL, Postgres). The drivers
+here check connections out of a bounded, thread-safe pool per process and
+database instead, so the executor threads in crud.Executor reuse them.
+
+Enable them in ``config.database`` by setting ``"driver"`` to
+``pooled_sqlite``, ``pooled_postgres`` or ``pooled_mysql`` and adding a
+``"pool"`` entry:
+
+    "pool": {
+      "min_size": 1,        # connections opened up front
+      "max_size": 16,       # connections open at most
+      "timeout": 10,        # seconds to wait for a free connection
+      "health_check": 30,   # ping connections idle longer than this, in seconds
+    }
+
+SQLite connections also take a ``"pragmas"`` entry, applied to every new
+connection, e.g. ``{"journal_mode": "WAL", "busy_timeout": 5000}``. Their
+transactions begin with ``BEGIN IMMEDIATE``, so the reads of a transaction
+are serialized with its writes; other writers wait up to ``busy_timeout``.
+
+A ``"replicas"`` entry sends reads to read replicas:
+
+    "replicas": {
+      "hosts": [{"host": "10.0.0.2"}, {"host": "10.0.0.3"}],  # overrides of the primary's details
+      "select": "round_robin",  # or "least_loaded", by connections checked out
+      "sticky_seconds": 5,      # reads of a response invalidated this recently use the primary
+      "retry_seconds": 30,      # how long a replica that failed to connect is skipped
+    }
+
+Open transactions are kept per thread, so each executor thread's
+transaction only holds its own statements.
+
+Only the statements of functions decorated with ``reads`` go to a replica,
+and never those run inside a transaction or under ``primary()``. Each
+replica gets its own pool, so the worker's pool stats list it.
+"""
+
+import copy
+import functools
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from masoniteorm.connections import ConnectionResolver, MySQLConnection, PostgresConnection, SQLiteConnection
+from masoniteorm.connections.ConnectionFactory import ConnectionFactory
+from masoniteorm.connections.SQLiteConnection import regexp
+
+POOL_DEFAULTS = {"min_size": 1, "max_size": 16, "timeout": 10, "health_check": 30}
+
+POOLS = {}
+POOLS_LOCK = threading.Lock()
+
+# "replica" inside a function decorated with reads, "primary" under
+# primary(), which wins; None elsewhere, which uses the primary.
+ROUTE = ContextVar("database_route", default=None)
+TURNS = {}
+DOWN = {}
+logger = logging.getLogger(__name__)
+
+class PoolTimeout(Exception):
+    """No connection became free within the pool timeout."""
+
+class ConnectionPool:
+    """A bounded pool of DB-API connections with wait metrics."""
+
+    def __init__(self, name, connect, ping, reset, min_size, max_size, timeout, health_check):
+        self.name = name
+        self.connect = connect
+        self.ping = ping
+        self.reset = reset
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check = health_check
+        self.idle = []
+        self.size = 0
+        self.condition = threading.Condition()
+        self.metrics = {"checkouts": 0, "waits": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0, "timeouts": 0, "health_check_failures": 0}
+        for _ in range(min(min_size, max_size)):
+            self.idle.append((self.connect(), time.monotonic()))
+            self.size += 1
+
+    def acquire(self):
+        """
+        Check out a connection, waiting for one to be released if the pool is full.
+
+        Returns:
+            PooledConnection: A connection that returns to the pool on ``close()``.
+
+        Raises:
+            PoolTimeout: If no connection is free within the pool timeout.
+        """
+        began = time.monotonic()
+        with self.condition:
+            while not self.idle and self.size >= self.max_size:
+                remaining = self.timeout - (time.monotonic() - began)
+                if remaining <= 0:
+                    self.metrics["timeouts"] += 1
+                    raise PoolTimeout("No " + self.name + " connection became free within " + str(self.timeout) + " seconds.")
+                self.condition.wait(remaining)
+            waited = (time.monotonic() - began) * 1000
+            self.metrics["checkouts"] += 1
+            if waited >= 1:
+                self.metrics["waits"] += 1
+                self.metrics["wait_ms_total"] += waited
+                self.metrics["wait_ms_max"] = max(self.metrics["wait_ms_max"], waited)
+            if self.idle:
+                raw, idle_since = self.idle.pop()
+            else:
+                raw, idle_since = None, None
+                self.size += 1
+        try:
+            if raw is not None and time.monotonic() - idle_since > self.health_check and not self.healthy(raw):
+                raw = None
+            if raw is None:
+                raw = self.connect()
+        except Exception:
+            self.discard()
+            raise
+        return PooledConnection(self, raw)
+
+    def healthy(self, raw):
+        try:
+            self.ping(raw)
+            return True
+        except Exception:
+            self.metrics["health_check_failures"] += 1
+            try:
+                raw.close()
+            except Exception:
+                pass
+            return False
+
+    def release(self, raw):
+        """
+        Return a connection to the pool, or close it if it cannot be reset.
+
+        Args:
+            raw: The DB-API connection.
+        """
+        try:
+            self.reset(raw)
+        except Exception:
+            try:
+                raw.close()
+            except Exception:
+                pass
+            self.discard()
+            return
+        with self.condition:
+            self.idle.append((raw, time.monotonic()))
+            self.condition.notify()
+
+    def discard(self):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def stats(self):
+        """
+        Get the size and wait metrics of the pool.
+
+        Returns:
+            dict: Open, idle and maximum connections, checkouts and wait times.
+        """
+        with self.condition:
+            return dict(self.metrics, open=self.size, idle=len(self.idle), max_size=self.max_size)
+
+class PooledConnection:
+    """A checked out connection; ``close()`` returns it to its pool."""
+
+    def __init__(self, pool, raw):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_raw", raw)
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        raw = self.__dict__.get("_raw")
+        if raw is not None:
+            object.__setattr__(self, "_raw", None)
+            self._pool.release(raw)
+
+    @property
+    def closed(self):
+        return self._raw is None or bool(getattr(self._raw, "closed", False))
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._raw, name, value)
+
+def poolKey(details):
+    return (os.getpid(), details.get("driver"), details.get("host"), details.get("port"), details.get("database"), details.get("user"))
+
+def getPool(connection, connect, ping, reset):
+    """
+    Get the pool of a connection's database, created on first use.
+
+    Pools are keyed by process ID, so a worker forked from a parent that
+    already opened connections starts with a pool of its own.
+
+    Args:
+        connection (BaseConnection): The connection asking for a pool.
+        connect (Callable): Opens a new DB-API connection.
+        ping (Callable): Checks that an idle connection still works.
+        reset (Callable): Returns a connection to a clean state before reuse.
+
+    Returns:
+        ConnectionPool: The shared pool.
+    """
+    details = connection.full_details
+    key = poolKey(details)
+    with POOLS_LOCK:
+        if key not in POOLS:
+            options = dict(POOL_DEFAULTS, **details.get("pool", {}))
+            name = details.get("pool_name") or details.get("driver") + ":" + str(details.get("database"))
+            POOLS[key] = ConnectionPool(name, connect, ping, reset, **options)
+        return POOLS[key]
+
+def reads(function):
+    """
+    Send the statements of a read-only function to a replica.
+
+    Data written moments ago may not have reached the replicas yet, so only
+    decorate functions whose callers accept that, and keep the reads of
+    write paths undecorated.
+
+    Args:
+        function (Callable): The function.
+
+    Returns:
+        Callable: The decorated function.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if ROUTE.get() is not None:
+            return function(*args, **kwargs)
+        token = ROUTE.set("replica")
+        try:
+            return function(*args, **kwargs)
+        finally:
+            ROUTE.reset(token)
+    return wrapper
+
+@contextmanager
+def primary():
+    """Send every statement of a block to the primary, even inside functions decorated with ``reads``."""
+    token = ROUTE.set("primary")
+    try:
+        yield
+    finally:
+        ROUTE.reset(token)
+
+def replicas(connection="default"):
+    """
+    Get the replica settings of a connection.
+
+    Args:
+        connection (str): The connection name in ``config.database``.
+
+    Returns:
+        dict: The ``"replicas"`` entry, empty when the connection has none.
+    """
+    from config.database import DATABASES
+    name = DATABASES["default"] if connection == "default" else connection
+    return DATABASES[name].get("replicas") or {}
+
+def chooseReplica(details):
+    """
+    Pick the replica a read should use.
+
+    Args:
+        details (dict): The primary's connection details.
+
+    Returns:
+        dict: The replica's connection details, or None to use the primary.
+    """
+    settings = details.get("replicas") or {}
+    now = time.monotonic()
+    candidates = []
+    for index, overrides in enumerate(settings.get("hosts") or []):
+        replica = {key: value for key, value in details.items() if key != "replicas"}
+        replica.update(overrides)
+        replica["pool_name"] = "%s:%s%s replica %d" % (replica.get("driver"), "%s:%s/" % (replica["host"], replica.get("port")) if replica.get("host") else "",
+            replica.get("database"), index + 1)
+        if DOWN.get(poolKey(replica), 0) <= now:
+            candidates.append(replica)
+    if not candidates:
+        return None
+    if settings.get("select") == "least_loaded":
+        with POOLS_LOCK:
+            pools = [POOLS.get(poolKey(replica)) for replica in candidates]
+        loads = [pool.size - len(pool.idle) if pool else 0 for pool in pools]
+        candidates = [replica for replica, load in zip(candidates, loads) if load == min(loads)]
+    turn = next(TURNS.setdefault(details.get("pool_name") or str(poolKey(details)), itertools.count()))
+    return candidates[turn % len(candidates)]
+
+def pointedAt(connection, details):
+    target = copy.copy(connection)
+    for attribute in ("host", "port", "database", "user", "password", "options"):
+        if attribute in details:
+            setattr(target, attribute, details[attribute])
+    target.full_details = details
+    return target
+
+def acquireRouted(connection, acquire):
+    """
+    Check out a connection from a replica's pool when the caller only reads.
+
+    A replica that fails to connect is skipped for its ``retry_seconds`` and
+    the read falls back to the primary.
+
+    Args:
+        connection (BaseConnection): The connection, pointed at the primary.
+        acquire (Callable): Given a connection, checks a connection out of
+            the pool of the database it points at.
+
+    Returns:
+        PooledConnection: The checked out connection.
+    """
+    details = connection.full_details
+    replica = chooseReplica(details) if ROUTE.get() == "replica" and not connection.has_global_connection() else None
+    if replica is None:
+        return acquire(connection)
+    try:
+        return acquire(pointedAt(connection, replica))
+    except Exception as error:
+        DOWN[poolKey(replica)] = time.monotonic() + (details.get("replicas") or {}).get("retry_seconds", 30)
+        logger.warning("Reading from the primary, %s is unavailable: %s", replica["pool_name"], error)
+        return acquire(connection)
+
+def poolStats():
+    """
+    Get the metrics of every pool of this process.
+
+    Returns:
+        dict: The stats of each pool, keyed by pool name.
+    """
+    with POOLS_LOCK:
+        pools = [pool for key, pool in POOLS.items() if key[0] == os.getpid()]
+    return {pool.name: pool.stats() for pool in pools}
+
+class PooledSQLiteConnection(SQLiteConnection):
+    def connect(self):
+        import sqlite3
+        raw = sqlite3.connect(self.database, isolation_level=None, check_same_thread=False)
+        for pragma, value in self.full_details.get("pragmas", {}).items():
+            raw.execute("PRAGMA " + pragma + " = " + str(value)).fetchall()
+        raw.create_function("REGEXP", 2, regexp)
+        raw.row_factory = sqlite3.Row
+        return raw
+
+    def reset(self, raw):
+        if raw.in_transaction:
+            raw.rollback()
+        raw.isolation_level = None
+
+    def begin(self):
+        # The stock driver lets sqlite3 open a deferred transaction at the
+        # first write, so the reads before it (e.g. a conflict check) run
+        # outside it. Take the write lock up front instead.
+        if self.transaction_level == 0:
+            self._connection.execute("BEGIN IMMEDIATE")
+        self.transaction_level += 1
+        return self
+
+    def make_connection(self):
+        if self.has_global_connection():
+            return self.get_global_connection()
+        if self.open and self._connection is not None and not self._connection.closed:
+            return self
+        self._connection = acquireRouted(self, lambda target: getPool(target, target.connect, lambda raw: raw.execute("SELECT 1").fetchall(), self.reset).acquire())
+        self.enable_disable_foreign_keys()
+        self.open = 1
+        return self
+
+class PooledPostgresConnection(PostgresConnection):
+    def ping(self, raw):
+        with raw.cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+    def reset(self, raw):
+        if raw.closed:
+            raise ValueError("Connection is closed.")
+        if not raw.autocommit:
+            raw.rollback()
+            raw.autocommit = True
+
+    def create_connection(self):
+        connect = lambda target: super(PooledPostgresConnection, target).create_connection
+        return acquireRouted(self, lambda target: getPool(target, connect(target), self.ping, self.reset).acquire())
+
+    def close_connection(self):
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = None
+
+class PooledMySQLConnection(MySQLConnection):
+    def connect(self):
+        raw = super().create_connection()
+        del raw.close
+        return raw
+
+    def reset(self, raw):
+        raw.rollback()
+
+    def create_connection(self, autocommit=True):
+        connection = acquireRouted(self, lambda target: getPool(target, target.connect, lambda raw: raw.ping(reconnect=False), self.reset).acquire())
+        self.open = 1
+        return connection
+
+    def close_connection(self):
+        if self._connection is not None:
+            self._connection.close()
+        self.open = 0
+        self._connection = None
+
+class TransactionConnections:
+    """
+    The connections of open transactions, by connection name, per thread.
+
+    Masonite keeps them in a class attribute of ``ConnectionResolver``, so a
+    transaction opened in one executor thread would be used, and committed,
+    by the queries of every other thread. Each thread sees its own here.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def current(self):
+        if not hasattr(self.local, "connections"):
+            self.local.connections = {}
+        return self.local.connections
+
+    def __contains__(self, name):
+        return name in self.current()
+
+    def __getitem__(self, name):
+        return self.current()[name]
+
+    def update(self, connections):
+        self.current().update(connections)
+
+    def pop(self, name, *default):
+        return self.current().pop(name, *default)
+
+ConnectionResolver._connections = TransactionConnections()
+
+ConnectionFactory.register("pooled_sqlite", PooledSQLiteConnection)
+ConnectionFactory.register("pooled_postgres", PooledPostgresConnection)
+ConnectionFactory.register("pooled_mysql", PooledMySQLConnection)
@@ -0,0 +1,14 @@
+import os
+
+# Recurring meetings.
+#
+# A series is stored as one meeting row with an RRULE-style "recurrence"
+# and its occurrences are expanded on read, only within the window asked
+# for. Reads that give no window, and conflict checks of an open-ended
+# series, look "horizon_days" past today. "max_count" bounds the COUNT of
+# a rule.
+
+RECURRENCE = {
+  "horizon_days": int(os.environ.get("API_RECURRENCE_HORIZON_DAYS", 90)),
+  "max_count": 1000,
+}
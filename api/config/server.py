@@ -0,0 +1,26 @@
+import os
+
+# Production server.
+#
+# gunicorn.conf.py runs "workers" Uvicorn workers bound to "bind". With
+# "preload" the master imports the app and warms the timezone tables (and
+# the timezonefinder polygons, see config.timezones) once, then forks; the
+# workers share those pages copy-on-write and only pay for their own
+# database pools, executors and caches, which are created on first use
+# after the fork. Workers share nothing else: metrics and the memory cache
+# are per worker (see config.metrics for how GET /metrics sums them and
+# config.cache for how the cache's TTL is lowered), and each starts its own
+# "passwords" process pool, so set API_PASSWORD_WORKERS to about
+# cores / workers.
+#
+# A worker answers GET /ready with 503 until it has warmed up and while it
+# shuts down, so load balancers only route to workers that can serve.
+
+SERVER = {
+  "bind": os.environ.get("API_BIND", "0.0.0.0:8000"),
+  "workers": int(os.environ.get("API_WORKERS", os.cpu_count() or 1)),
+  "preload": os.environ.get("API_PRELOAD", "1") != "0",
+  "timeout": 30,
+  "graceful_timeout": 30,
+  "keepalive": 5,
+}
@@ -0,0 +1,12 @@
+# Delta sync.
+#
+# GET /sync returns the rows created or changed after a client's token,
+# ordered by (updated_at, id), and the IDs deleted since, which the
+# tombstones table records through triggers. Rows stamped in the last
+# "settle_seconds" are held back for the next sync: a transaction that
+# stamped updated_at before a later one but commits after it is still
+# returned, as long as it commits within that time.
+
+SYNC = {
+  "settle_seconds": 5,
+}
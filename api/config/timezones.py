@@ -0,0 +1,146 @@
+import os
+
+# Offline timezone table used to resolve a user's IANA timezone from their
+# address without calling out to a geocoding service.
+#
+# Lookups are tried in order: zipcode, then its three-digit prefix (the
+# postal area), "city, state", state. Keys are matched case-insensitively and
+# states may be given by name or abbreviation. States listed in
+# "split_states" span several zones, so they are not resolved by state: a
+# location there must match a zipcode or city entry, or is geocoded.
+#
+# Locations missing from the table are geocoded remotely and placed with
+# timezonefinder. With "in_memory" its polygons are read into memory once;
+# under gunicorn.conf.py's preload the master does so before forking, and
+# the workers share those pages.
+
+TIMEZONES = {
+  "zipcodes": {
+    "799": "America/Denver",               # El Paso, TX
+    "885": "America/Denver",               # El Paso, TX
+    "324": "America/Chicago",              # Panama City, FL
+    "325": "America/Chicago",              # Pensacola, FL
+    "835": "America/Los_Angeles",          # Lewiston, ID
+    "838": "America/Los_Angeles",          # Coeur d'Alene, ID
+    "420": "America/Chicago",              # Paducah, KY
+    "421": "America/Chicago",              # Bowling Green, KY
+    "423": "America/Chicago",              # Owensboro, KY
+    "424": "America/Chicago",              # Henderson, KY
+    "373": "America/New_York",             # Chattanooga, TN
+    "374": "America/New_York",             # Chattanooga, TN
+    "376": "America/New_York",             # Johnson City, TN
+    "377": "America/New_York",             # Knoxville, TN
+    "378": "America/New_York",             # Knoxville, TN
+    "379": "America/New_York",             # Knoxville, TN
+    "463": "America/Chicago",              # Gary, IN
+    "464": "America/Chicago",              # Gary, IN
+    "476": "America/Chicago",              # Evansville, IN
+    "477": "America/Chicago",              # Evansville, IN
+    "577": "America/Denver",               # Rapid City, SD
+    "586": "America/Denver",               # Dickinson, ND
+    "693": "America/Denver",               # Scottsbluff, NE
+    "979": "America/Boise",                # Ontario, OR
+  },
+  "cities": {
+    "el paso, tx": "America/Denver",
+    "pensacola, fl": "America/Chicago",
+    "boise, id": "America/Boise",
+    "coeur d'alene, id": "America/Los_Angeles",
+    "detroit, mi": "America/Detroit",
+    "louisville, ky": "America/Kentucky/Louisville",
+    "indianapolis, in": "America/Indiana/Indianapolis",
+    "gary, in": "America/Chicago",
+    "rapid city, sd": "America/Denver",
+    "bismarck, nd": "America/Chicago",
+    "honolulu, hi": "Pacific/Honolulu",
+    "anchorage, ak": "America/Anchorage",
+    "pierre, sd": "America/Chicago",
+    "sioux falls, sd": "America/Chicago",
+    "fargo, nd": "America/Chicago",
+    "omaha, ne": "America/Chicago",
+    "lincoln, ne": "America/Chicago",
+    "wichita, ks": "America/Chicago",
+    "portland, or": "America/Los_Angeles",
+    "nashville, tn": "America/Chicago",
+    "memphis, tn": "America/Chicago",
+    "knoxville, tn": "America/New_York",
+    "chattanooga, tn": "America/New_York",
+    "lexington, ky": "America/New_York",
+    "bowling green, ky": "America/Chicago",
+    "evansville, in": "America/Chicago",
+    "grand rapids, mi": "America/Detroit",
+    "miami, fl": "America/New_York",
+    "orlando, fl": "America/New_York",
+    "tampa, fl": "America/New_York",
+    "jacksonville, fl": "America/New_York",
+    "tallahassee, fl": "America/New_York",
+    "houston, tx": "America/Chicago",
+    "dallas, tx": "America/Chicago",
+    "austin, tx": "America/Chicago",
+    "san antonio, tx": "America/Chicago",
+    "fort worth, tx": "America/Chicago",
+  },
+  "split_states": ["AK", "FL", "ID", "IN", "KS", "KY", "MI", "ND", "NE", "OR", "SD", "TN", "TX"],
+  "states": {
+    "AL": ("Alabama", "America/Chicago"),
+    "AK": ("Alaska", "America/Anchorage"),
+    "AZ": ("Arizona", "America/Phoenix"),
+    "AR": ("Arkansas", "America/Chicago"),
+    "CA": ("California", "America/Los_Angeles"),
+    "CO": ("Colorado", "America/Denver"),
+    "CT": ("Connecticut", "America/New_York"),
+    "DE": ("Delaware", "America/New_York"),
+    "DC": ("District of Columbia", "America/New_York"),
+    "FL": ("Florida", "America/New_York"),
+    "GA": ("Georgia", "America/New_York"),
+    "HI": ("Hawaii", "Pacific/Honolulu"),
+    "ID": ("Idaho", "America/Boise"),
+    "IL": ("Illinois", "America/Chicago"),
+    "IN": ("Indiana", "America/Indiana/Indianapolis"),
+    "IA": ("Iowa", "America/Chicago"),
+    "KS": ("Kansas", "America/Chicago"),
+    "KY": ("Kentucky", "America/New_York"),
+    "LA": ("Louisiana", "America/Chicago"),
+    "ME": ("Maine", "America/New_York"),
+    "MD": ("Maryland", "America/New_York"),
+    "MA": ("Massachusetts", "America/New_York"),
+    "MI": ("Michigan", "America/Detroit"),
+    "MN": ("Minnesota", "America/Chicago"),
+    "MS": ("Mississippi", "America/Chicago"),
+    "MO": ("Missouri", "America/Chicago"),
+    "MT": ("Montana", "America/Denver"),
+    "NE": ("Nebraska", "America/Chicago"),
+    "NV": ("Nevada", "America/Los_Angeles"),
+    "NH": ("New Hampshire", "America/New_York"),
+    "NJ": ("New Jersey", "America/New_York"),
+    "NM": ("New Mexico", "America/Denver"),
+    "NY": ("New York", "America/New_York"),
+    "NC": ("North Carolina", "America/New_York"),
+    "ND": ("North Dakota", "America/Chicago"),
+    "OH": ("Ohio", "America/New_York"),
+    "OK": ("Oklahoma", "America/Chicago"),
+    "OR": ("Oregon", "America/Los_Angeles"),
+    "PA": ("Pennsylvania", "America/New_York"),
+    "RI": ("Rhode Island", "America/New_York"),
+    "SC": ("South Carolina", "America/New_York"),
+    "SD": ("South Dakota", "America/Chicago"),
+    "TN": ("Tennessee", "America/Chicago"),
+    "TX": ("Texas", "America/Chicago"),
+    "UT": ("Utah", "America/Denver"),
+    "VT": ("Vermont", "America/New_York"),
+    "VA": ("Virginia", "America/New_York"),
+    "WA": ("Washington", "America/Los_Angeles"),
+    "WV": ("West Virginia", "America/New_York"),
+    "WI": ("Wisconsin", "America/Chicago"),
+    "WY": ("Wyoming", "America/Denver"),
+  },
+  "cache_size": 4096,
+  "finder": {
+    "in_memory": os.environ.get("API_TIMEZONE_FINDER_IN_MEMORY", "0") == "1",
+  },
+  "geocoder": {
+    "enabled": True,
+    "user_agent": "Appointment-Scheduling-API",
+    "timeout": 2,
+  }
+}
@@ -0,0 +1,147 @@
+from collections import Counter
+from types import SimpleNamespace
+from models.Agenda import Agenda as AgendaModel
+from models.Meeting import Meeting as MeetingModel
+from config.database import DB
+from crud import Bulk
+from crud import Pagination
+from crud import Recurrence
+from crud.FreeBusy import MAX_MEETING_DURATION
+
+ROLES = ("host", "participant")
+COLUMNS = ("user_id", "meeting_id", "role", "title", "organizer", "duration", "timezone", "recurrence", "starts_at", "ends_at")
+
+# The agenda rows the base tables imply: one per meeting for its organizer
+# and one per participant row. "ends_at" is the end of a single meeting or
+# of a whole series, and is NULL for a series without an end.
+MEETING_COLUMNS = ("meetings.id AS meeting_id, %s AS role, meetings.title AS title, meetings.organizer AS organizer, "
+    "meetings.duration AS duration, meetings.timezone AS timezone, meetings.recurrence AS recurrence, meetings.starts_at AS starts_at, "
+    "CASE WHEN meetings.recurrence IS NULL THEN meetings.ends_at ELSE meetings.series_ends_at END AS ends_at")
+HOSTS = ("SELECT users.id AS user_id, " + MEETING_COLUMNS % "'host'" + ", meetings.created_at, meetings.updated_at "
+    "FROM meetings INNER JOIN users ON users.email = meetings.organizer")
+PARTICIPANTS = ("SELECT participants.participant_id AS user_id, " + MEETING_COLUMNS % "'participant'" + ", participants.created_at, participants.updated_at "
+    "FROM participants INNER JOIN meetings ON meetings.id = participants.meeting_id")
+
+def row(meeting, user_id, role):
+    """
+    Build the agenda row of a user's booking of a meeting.
+
+    Args:
+        meeting (MeetingModel): The saved meeting.
+        user_id (int): The ID of the user.
+        role (str): ``host`` or ``participant``.
+
+    Returns:
+        dict: Column values of the row.
+    """
+    ends_at = meeting.ends_at if meeting.recurrence is None else getattr(meeting, "series_ends_at", None)
+    return {"user_id": int(user_id), "meeting_id": meeting.id, "role": role, "title": meeting.title, "organizer": meeting.organizer,
+        "duration": meeting.duration, "timezone": meeting.timezone, "recurrence": meeting.recurrence,
+        "starts_at": str(meeting.starts_at), "ends_at": str(ends_at) if ends_at is not None else None}
+
+def add(rows):
+    """
+    Write agenda rows inside the caller's transaction.
+
+    ``crud.Meeting`` and ``crud.Participant`` call this in the transaction
+    that saves the booking, so the agenda never disagrees with the base
+    tables after a commit.
+
+    Args:
+        rows (List[dict]): Rows built with ``row``.
+    """
+    Bulk.write(AgendaModel, rows)
+
+def read(user_id, start=None, end=None, role=None):
+    """
+    Read the agenda rows of a user that may have occurrences in a window.
+
+    Served by range scans of the ``(user_id, starts_at)`` index. With a
+    start, single meetings and series are read separately: a single meeting
+    cannot start more than ``MAX_MEETING_DURATION`` before the window, which
+    bounds the scan from below.
+
+    Args:
+        user_id (int): The ID of the user.
+        start (datetime, optional): Start of the window in UTC.
+        end (datetime, optional): End of the window in UTC.
+        role (str, optional): Only read rows with this role.
+
+    Returns:
+        List[dict]: The rows, ordered by ``starts_at``.
+    """
+    def build():
+        query = AgendaModel.select(*COLUMNS).where("user_id", user_id)
+        if role:
+            query = query.where("role", role)
+        if end is not None:
+            query = query.where("starts_at", "<", str(end))
+        return query
+
+    if start is None:
+        return Pagination.fetch(build().order_by("starts_at"))
+    single = build().where_null("recurrence").where("starts_at", ">=", str(start - MAX_MEETING_DURATION)).where("ends_at", ">", str(start))
+    series = build().where_not_null("recurrence").where(lambda builder: builder.where_null("ends_at").or_where("ends_at", ">", str(start)))
+    return sorted(Pagination.fetch(single) + Pagination.fetch(series), key=lambda entry: entry["starts_at"])
+
+def occurrences(rows, start=None, end=None):
+    """
+    Expand agenda rows into their occurrences, once per meeting.
+
+    Args:
+        rows (List[dict]): Rows returned by ``read``.
+        start (datetime, optional): Start of the window in UTC; see ``Recurrence.expand``.
+        end (datetime, optional): End of the window in UTC; see ``Recurrence.expand``.
+
+    Returns:
+        List[tuple]: ``(meeting, starts_at)`` pairs ordered by start, where
+        ``meeting`` has the row's columns with ``id`` set to the meeting ID.
+    """
+    meetings = {}
+    for entry in rows:
+        meetings.setdefault(entry["meeting_id"], SimpleNamespace(id=entry["meeting_id"], series_ends_at=entry["ends_at"], **entry))
+    return sorted(Recurrence.expand(meetings.values(), start, end), key=lambda occurrence: (occurrence[1], occurrence[0].id))
+
+def rebuild():
+    """
+    Regenerate the agenda from the meetings, users and participants tables.
+
+    Returns:
+        int: The number of rows written.
+    """
+    columns = ", ".join(COLUMNS) + ", created_at, updated_at"
+    with DB.transaction():
+        DB.statement("DELETE FROM agenda")
+        DB.statement("INSERT INTO agenda (" + columns + ") " + HOSTS)
+        DB.statement("INSERT INTO agenda (" + columns + ") " + PARTICIPANTS)
+    return AgendaModel.count()
+
+def key(entry):
+    return tuple(None if entry[column] is None else str(entry[column]) for column in COLUMNS)
+
+def check(chunk_size=10000, samples=10):
+    """
+    Compare the agenda with the rows the base tables imply.
+
+    Meetings are compared in ranges of IDs, so memory stays flat at any size.
+
+    Args:
+        chunk_size (int): Number of meeting IDs compared at once.
+        samples (int): Maximum number of differing rows to return of each kind.
+
+    Returns:
+        dict: The number of ``missing`` and ``unexpected`` rows, and up to
+        ``samples`` of each, as tuples of ``COLUMNS``.
+    """
+    report = {"missing": 0, "unexpected": 0, "missing_rows": [], "unexpected_rows": []}
+    newest = MeetingModel.select("id").order_by("id", "desc").first()
+    last = newest.id if newest else 0
+    report["unexpected"] += AgendaModel.where("meeting_id", ">", last).count()
+    for first in range(1, last + 1, chunk_size):
+        bounds = " WHERE meetings.id BETWEEN %d AND %d" % (first, first + chunk_size - 1)
+        expected = Counter(key(entry) for source in (HOSTS, PARTICIPANTS) for entry in DB.statement(source + bounds) or [])
+        actual = Counter(key(entry) for entry in Pagination.fetch(AgendaModel.select(*COLUMNS).where_between("meeting_id", first, first + chunk_size - 1)))
+        for kind, difference in (("missing", expected - actual), ("unexpected", actual - expected)):
+            report[kind] += sum(difference.values())
+            report[kind + "_rows"] += list(difference.elements())[:samples - len(report[kind + "_rows"])]
+    return report
@@ -0,0 +1,105 @@
+from fastapi import HTTPException
+from config.database import DB
+from .FreeBusy import chunks
+import schema
+import datetime
+
+MAX_BULK_SIZE = 5000
+
+def validate(items):
+    """
+    Check the size of a bulk request.
+
+    Args:
+        items (list): The submitted items.
+
+    Raises:
+        HTTPException: If there are no items or more than ``MAX_BULK_SIZE``.
+    """
+    if not 0 < len(items) <= MAX_BULK_SIZE:
+        raise HTTPException(status_code=400, detail="Submit between 1 and %d items." % MAX_BULK_SIZE)
+
+def insert(model, records):
+    """
+    Insert rows with multi-row ``INSERT`` statements in one transaction.
+
+    Args:
+        model (Type[Model]): The model of the table to write.
+        records (List[dict]): Column values of each row; timestamps are added.
+    """
+    with DB.transaction():
+        write(model, records)
+
+def write(model, records, returning=False):
+    """
+    Insert rows with multi-row ``INSERT`` statements.
+
+    The statements are run directly instead of through ``Model.bulk_create``,
+    which also builds a model for every inserted row. No transaction is
+    opened, so rows can be written inside the caller's; with ``returning``
+    there must be one, so the statements share a connection.
+
+    Args:
+        model (Type[Model]): The model of the table to write.
+        records (List[dict]): Column values of each row; timestamps are added.
+        returning (bool): Whether to return the IDs of the new rows.
+
+    Returns:
+        List[int]: The ID of each row, in the order of ``records``, if asked for.
+    """
+    now = str(datetime.datetime.utcnow().replace(microsecond=0))
+    for record in records:
+        record.setdefault("created_at", now)
+        record.setdefault("updated_at", now)
+    ids = []
+    for part in chunks(records):
+        builder = model.bulk_create(part, query=True)
+        connection = builder.new_connection()
+        if returning:
+            ids += insertIds(connection, builder.to_qmark(), builder._bindings, len(part))
+        else:
+            connection.query(builder.to_qmark(), builder._bindings, results=1)
+    return ids if returning else None
+
+def insertIds(connection, sql, bindings, count):
+    """
+    Run a multi-row ``INSERT`` and get the IDs of its rows.
+
+    A single statement numbers its rows in ``VALUES`` order: SQLite and
+    Postgres return them with ``RETURNING``, and MySQL gives consecutive IDs
+    from ``LAST_INSERT_ID()`` to a multi-row insert.
+
+    Args:
+        connection (BaseConnection): The connection to run the statement on.
+        sql (str): The ``INSERT`` statement.
+        bindings (list): Its bindings.
+        count (int): Number of rows inserted.
+
+    Returns:
+        List[int]: The IDs, in ``VALUES`` order.
+    """
+    driver = connection.full_details.get("driver", "")
+    if "mysql" in driver:
+        connection.query(sql, bindings, results=1)
+        first = connection.query("SELECT LAST_INSERT_ID() AS id", (), results=1)["id"]
+        return list(range(first, first + count))
+    if "postgres" in driver:
+        rows = connection.query("WITH inserted AS (" + sql + " RETURNING id) SELECT id FROM inserted", bindings)
+    else:
+        rows = connection.query(sql + " RETURNING id", bindings)
+    return sorted(row["id"] for row in rows)
+
+def results(count, errors, ids=None):
+    """
+    Build the per-item results of a bulk request.
+
+    Args:
+        count (int): Number of submitted items.
+        errors (dict): Error message by item index.
+        ids (dict, optional): Created record ID by item index.
+
+    Returns:
+        List[schema.BulkResult]: One result per submitted item, in order.
+    """
+    ids = ids or {}
+    return [schema.BulkResult(index=index, id=ids.get(index), error=errors.get(index)) for index in range(count)]
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from fastapi.encoders import jsonable_encoder
+from config.cache import CACHE
+from config import pool
+from .Metrics import timer
+
+COUNTERS = {"hits": 0, "misses": 0, "invalidations": 0}
+COUNTERS_LOCK = threading.Lock()
+
+class MemoryCache:
+    """
+    An in-process LRU store whose entries expire after a TTL.
+
+    Each invalidated key is stamped with the next value of a store-wide
+    clock, so generations never repeat across keys. Only the last
+    ``max_entries`` stamps are kept; a key that drops out reads as
+    generation 0 again.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.generations = OrderedDict()
+        self.clock = 0
+        self.pins = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def generation(self, key):
+        with self.lock:
+            return self.generations.get(key, 0)
+
+    def set(self, key, value, generation=None):
+        with self.lock:
+            if generation is not None and self.generations.get(key, 0) != generation:
+                return
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+                self.clock += 1
+                self.generations[key] = self.clock
+                self.generations.move_to_end(key)
+            while len(self.generations) > self.max_entries:
+                self.generations.popitem(last=False)
+
+    def pin(self, keys, seconds):
+        with self.lock:
+            now = time.monotonic()
+            self.pins = {key: expires for key, expires in self.pins.items() if expires > now}
+            for key in keys:
+                self.pins[key] = now + seconds
+
+    def pinned(self, key):
+        with self.lock:
+            return self.pins.get(key, 0) > time.monotonic()
+
+class RedisCache:
+    """A store on a Redis-compatible server, shared by every worker."""
+
+    def __init__(self, url, prefix, ttl):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def generation(self, key):
+        value = self.client.get(self.prefix + "gen:" + key)
+        return int(value) if value is not None else 0
+
+    def set(self, key, value, generation=None):
+        if generation is None:
+            self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+            return
+        import redis
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(self.prefix + "gen:" + key)
+                current = pipe.get(self.prefix + "gen:" + key)
+                if (int(current) if current is not None else 0) != generation:
+                    return
+                pipe.multi()
+                pipe.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+                pipe.execute()
+            except redis.WatchError:
+                pass
+
+    def delete(self, keys):
+        if keys:
+            with self.client.pipeline() as pipe:
+                pipe.delete(*[self.prefix + key for key in keys])
+                for key in keys:
+                    pipe.incr(self.prefix + "gen:" + key)
+                    pipe.expire(self.prefix + "gen:" + key, self.ttl)
+                pipe.execute()
+
+    def pin(self, keys, seconds):
+        for key in keys:
+            self.client.set(self.prefix + "pin:" + key, 1, ex=seconds)
+
+    def pinned(self, key):
+        return bool(self.client.exists(self.prefix + "pin:" + key))
+
+@lru_cache(maxsize=None)
+def getStore():
+    """
+    Get the process-wide cache store configured in ``config.cache``.
+
+    Returns:
+        MemoryCache | RedisCache: The shared store, created on first use.
+    """
+    if CACHE["backend"] == "redis":
+        return RedisCache(CACHE["redis"]["url"], CACHE["redis"]["prefix"], CACHE["ttl"])
+    return MemoryCache(CACHE["memory"]["max_entries"], CACHE["ttl"])
+
+def key(resource, resource_id):
+    """
+    Build the cache key of a response.
+
+    Args:
+        resource (str): The kind of response: ``user``, ``meeting``,
+            ``user_meetings`` (rendered in that user's timezone) or ``unavailability``.
+        resource_id (int): The ID of the resource, or of the user it is rendered for.
+
+    Returns:
+        str: The cache key.
+    """
+    return resource + ":" + str(resource_id)
+
+def count(counter, amount=1):
+    with COUNTERS_LOCK:
+        COUNTERS[counter] += amount
+
+def read(cache_key, build, *args):
+    """
+    Get a response from the cache, building and storing it on a miss.
+
+    A response invalidated within the replicas' ``sticky_seconds`` is built
+    from the primary, so a replica that has not caught up with the write
+    does not put the old response back in the cache. The key's generation
+    is read before the build, and the response is not stored if the key was
+    invalidated while it was being built, as it may predate that write.
+
+    Args:
+        cache_key (str): The cache key.
+        build (Callable): Builds the response on a miss.
+        *args: Arguments of ``build``.
+
+    Returns:
+        tuple: The ETag and the JSON-ready body.
+    """
+    generation = getStore().generation(cache_key)
+    entry = getStore().get(cache_key)
+    if entry is not None:
+        count("hits")
+        return tuple(entry)
+    count("misses")
+    if stickySeconds() and getStore().pinned(cache_key):
+        with pool.primary():
+            result = build(*args)
+    else:
+        result = build(*args)
+    with timer("serialize"):
+        body = jsonable_encoder(result)
+        etag = '"' + hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest() + '"'
+    getStore().set(cache_key, (etag, body), generation)
+    return etag, body
+
+def invalidate(*cache_keys):
+    """
+    Drop cached responses after a write.
+
+    Args:
+        *cache_keys (str): The keys to drop.
+    """
+    getStore().delete(list(cache_keys))
+    if stickySeconds():
+        getStore().pin(list(cache_keys), stickySeconds())
+    count("invalidations", len(cache_keys))
+
+def stickySeconds():
+    settings = pool.replicas()
+    return settings.get("sticky_seconds", 0) if settings.get("hosts") else 0
+
+def stats():
+    """
+    Get the cache counters of this process.
+
+    Returns:
+        dict: Hits, misses, invalidations and the configured backend.
+    """
+    with COUNTERS_LOCK:
+        return dict(COUNTERS, backend=CACHE["backend"])
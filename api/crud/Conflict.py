@@ -0,0 +1,109 @@
+from fastapi import HTTPException
+from models.Meeting import Meeting as MeetingModel
+from models.Participant import Participant
+from models.Availability import Availability
+from models.User import User
+import schema
+from .FreeBusy import MAX_MEETING_DURATION, chunks, leaveInterval, leavesDuring, overlaps, SERIES_COLUMNS
+from . import Recurrence
+from .Timezone import *
+
+def find(user, intervals, exclude_meeting=None):
+    """
+    Find the bookings of a user that overlap a set of time ranges.
+
+    Meetings are matched through the (organizer, starts_at) and
+    (participant_id, starts_at) indexes, so each lookup is a range scan
+    bounded by the longest allowed meeting. Recurring series are loaded
+    separately and expanded only within the ranges checked, and
+    unavailability records through the (user_id, ends_on) index.
+
+    Args:
+        user (User): The user to check.
+        intervals (List[tuple]): Sorted, non-overlapping ``(start, end)`` UTC
+            pairs being booked, e.g. the occurrences of a meeting.
+        exclude_meeting (int, optional): A meeting to leave out of the check.
+
+    Returns:
+        List[schema.Conflict]: The overlapping meetings and unavailability records.
+    """
+    if not intervals:
+        return []
+    start = intervals[0][0]
+    end = intervals[-1][1]
+    lower = str(start - MAX_MEETING_DURATION)
+    meeting_ids = set()
+    hosted = (MeetingModel.select("id", "starts_at", "ends_at")
+        .where("organizer", user.email)
+        .where_null("recurrence")
+        .where("starts_at", ">=", lower)
+        .where("starts_at", "<", str(end))
+        .where("ends_at", ">", str(start))
+        .get())
+    attended = (Participant.select("meeting_id", "starts_at", "ends_at")
+        .where("participant_id", user.id)
+        .where("starts_at", ">=", lower)
+        .where("starts_at", "<", str(end))
+        .where("ends_at", ">", str(start))
+        .get())
+    bookings = [(meeting.id, meeting) for meeting in hosted] + [(int(part.meeting_id), part) for part in attended]
+    for meeting_id, booking in bookings:
+        if overlaps(intervals, datetime.datetime.fromisoformat(str(booking.starts_at)), datetime.datetime.fromisoformat(str(booking.ends_at))):
+            meeting_ids.add(meeting_id)
+    hosted_series = Recurrence.series(MeetingModel.select("meetings.id", *SERIES_COLUMNS).where("organizer", user.email), start, end, "meetings").get()
+    attended_series = Recurrence.series(MeetingModel.select("meetings.id", *SERIES_COLUMNS)
+        .join("participants", "meetings.id", "=", "participants.meeting_id")
+        .where("participants.participant_id", user.id), start, end, "meetings").get()
+    for meeting in list(hosted_series) + list(attended_series):
+        if any(overlaps(intervals, occurrence_start, occurrence_end) for occurrence_start, occurrence_end in Recurrence.occurrences(meeting, start, end)):
+            meeting_ids.add(meeting.id)
+    meeting_ids.discard(exclude_meeting)
+    conflicts = [schema.Conflict(user_id=user.id, meeting_id=meeting_id) for meeting_id in sorted(meeting_ids)]
+    for leave in leavesDuring(Availability.where("user_id", user.id), start, end).get():
+        leave_start, leave_end = leaveInterval(leave, user.timezone)
+        if overlaps(intervals, leave_start, leave_end):
+            conflicts.append(schema.Conflict(user_id=user.id, availability_id=leave.id))
+    return conflicts
+
+def lock(user_ids, mode):
+    """
+    Hold off other bookings of some users until the current transaction ends.
+
+    Call it first in the transaction that checks and writes the bookings, so
+    two concurrent bookings of a user cannot both pass the check. Postgres
+    and MySQL lock the users' rows, in ID order; SQLite transactions take
+    the write lock when they begin (see config.pool), so nothing is locked.
+
+    Args:
+        user_ids (Iterable[int]): The users being booked.
+        mode (schema.ConflictMode): The conflict mode; ``off`` locks nothing.
+    """
+    if mode == schema.ConflictMode.off:
+        return
+    for part in chunks(sorted(set(user_ids))):
+        User.select("id").where_in("id", part).order_by("id").lock_for_update().get()
+
+def check(user, intervals, mode, exclude_meeting=None):
+    """
+    Check a booking for conflicts according to a conflict mode.
+
+    Args:
+        user (User): The user being booked.
+        intervals (List[tuple]): Sorted, non-overlapping ``(start, end)`` UTC
+            pairs being booked, as returned by ``Recurrence.intervals``.
+        mode (schema.ConflictMode): ``off`` skips the check, ``flag`` reports
+            conflicts and ``reject`` refuses them.
+        exclude_meeting (int, optional): A meeting to leave out of the check.
+
+    Returns:
+        List[schema.Conflict]: The conflicts found.
+
+    Raises:
+        HTTPException: If the mode is ``reject`` and the booking conflicts.
+    """
+    if mode == schema.ConflictMode.off:
+        return []
+    conflicts = find(user, intervals, exclude_meeting)
+    if conflicts and mode == schema.ConflictMode.reject:
+        raise HTTPException(status_code=409, detail={"message": "Booking conflicts with existing bookings.", "conflicts": [conflict.dict() for conflict in conflicts]})
+    return conflicts
@@ -0,0 +1,28 @@
+import json
+from .Metrics import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+@timed("serialize")
+def dumps(content):
+    """
+    Encode trusted, JSON-ready data into a response body.
+
+    orjson is used when it is installed; it encodes dicts, lists, strings,
+    numbers and datetimes directly. Without it the standard library encoder
+    is used, with anything else converted through ``str``. Neither validates
+    the data, so only rows read from the database or already validated
+    bodies should be passed in.
+
+    Args:
+        content: The data to encode.
+
+    Returns:
+        bytes: The UTF-8 JSON document.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,93 @@
+import asyncio
+import multiprocessing
+from contextvars import copy_context
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from starlette.concurrency import run_in_threadpool
+from config.executors import EXECUTORS
+
+@lru_cache(maxsize=None)
+def getExecutor(name):
+    """
+    Get a process-wide thread pool from ``config.executors``.
+
+    Args:
+        name (str): The pool name, ``database`` or ``geocoder``.
+
+    Returns:
+        ThreadPoolExecutor: The shared pool, created on first use.
+    """
+    return ThreadPoolExecutor(max_workers=EXECUTORS[name]["max_workers"], thread_name_prefix=name)
+
+@lru_cache(maxsize=None)
+def getProcessPool(name):
+    """
+    Get a process-wide pool of worker processes from ``config.executors``.
+
+    Workers are spawned rather than forked, since forking a process that
+    runs threads can copy locks held by them.
+
+    Args:
+        name (str): The pool name, ``passwords``.
+
+    Returns:
+        ProcessPoolExecutor: The shared pool, created on first use.
+    """
+    return ProcessPoolExecutor(max_workers=EXECUTORS[name]["max_workers"], mp_context=multiprocessing.get_context("spawn"))
+
+async def compute(name, function, *args):
+    """
+    Run CPU-bound work in a process pool without blocking the event loop.
+
+    Args:
+        name (str): The pool name.
+        function (Callable): A module-level function, so it can be pickled.
+        *args: Picklable arguments of the function.
+
+    Returns:
+        Any: The function's return value.
+    """
+    return await asyncio.get_running_loop().run_in_executor(getProcessPool(name), partial(function, *args))
+
+async def run(function, *args, **kwargs):
+    """
+    Run a blocking ORM call without blocking the event loop.
+
+    The call runs in a copy of the caller's context, so the statements it
+    sends are recorded against the current request by ``crud.Metrics``.
+
+    Args:
+        function (Callable): The blocking function.
+        *args: Positional arguments of the function.
+        **kwargs: Keyword arguments of the function.
+
+    Returns:
+        Any: The function's return value.
+    """
+    call = partial(copy_context().run, function, *args, **kwargs)
+    if EXECUTORS["mode"] == "sync":
+        return await run_in_threadpool(call)
+    return await asyncio.get_running_loop().run_in_executor(getExecutor("database"), call)
+
+async def offload(function, *args):
+    """
+    Run slow external work in the geocoder pool and wait for it with a timeout.
+
+    Await it from the route handler, before handing work to ``run``, so a
+    slow call only holds a geocoder worker and never a database worker.
+
+    Args:
+        function (Callable): The blocking function.
+        *args: Arguments of the function.
+
+    Returns:
+        Any: The function's return value.
+
+    Raises:
+        ValueError: If the work does not finish within the configured timeout.
+    """
+    call = partial(copy_context().run, function, *args)
+    try:
+        return await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(getExecutor("geocoder"), call), EXECUTORS["geocoder"]["timeout"])
+    except asyncio.TimeoutError:
+        raise ValueError("Geocoding timed out after " + str(EXECUTORS["geocoder"]["timeout"]) + " seconds.")
@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+from models.Meeting import Meeting as MeetingModel
+from models.Participant import Participant
+from models.Availability import Availability
+from config.pool import reads
+from crud import Pagination
+import schema
+
+EXPORT_CHUNK_SIZE = Pagination.MAX_LIMIT
+
+TABLES = {
+    schema.ExportTable.meetings: (MeetingModel, schema.MeetingResult),
+    schema.ExportTable.participants: (Participant, schema.ParticipantResult),
+    schema.ExportTable.unavailability: (Availability, schema.AvailabilityResult),
+}
+
+MEDIA_TYPES = {
+    schema.ExportFormat.ndjson: "application/x-ndjson",
+    schema.ExportFormat.csv: "text/csv",
+}
+
+def rows(table: schema.ExportTable, fields=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Iterate over every row of a table, one keyset page at a time.
+
+    Only one page is held in memory, and each page is an index range scan on
+    ``id``, so the cost of a page does not grow with its position in the table.
+    Pages are read from a replica when there is one.
+
+    Args:
+        table (schema.ExportTable): The table to export.
+        fields (str, optional): Comma separated fields to export.
+        chunk_size (int): Number of rows read per query.
+
+    Returns:
+        Generator[dict]: The rows, ordered by ID.
+    """
+    model, result = TABLES[table]
+    cursor = None
+    while True:
+        page, cursor = reads(Pagination.paginate)(model, result, cursor, chunk_size, fields)
+        yield from page
+        if cursor is None:
+            return
+
+def ndjson(records):
+    """
+    Encode rows as newline delimited JSON, one chunk of lines at a time.
+
+    Args:
+        records (Iterable[dict]): The rows to encode.
+
+    Returns:
+        Generator[str]: Pieces of the NDJSON document.
+    """
+    lines = []
+    for record in records:
+        lines.append(json.dumps(record, default=str))
+        if len(lines) == EXPORT_CHUNK_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def csvLines(records, columns):
+    """
+    Encode rows as CSV with a header line, one chunk of lines at a time.
+
+    Args:
+        records (Iterable[dict]): The rows to encode.
+        columns (List[str]): The columns to write, in order.
+
+    Returns:
+        Generator[str]: Pieces of the CSV document.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    count = 0
+    for record in records:
+        writer.writerow(record)
+        count += 1
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def export(table: schema.ExportTable, format: schema.ExportFormat, fields=None):
+    """
+    Build the body of an export.
+
+    The field list is validated before the generator is returned, so an
+    unknown field is reported as an error instead of a truncated stream.
+
+    Args:
+        table (schema.ExportTable): The table to export.
+        format (schema.ExportFormat): ``ndjson`` or ``csv``.
+        fields (str, optional): Comma separated fields to export.
+
+    Returns:
+        tuple: The body generator and its media type.
+
+    Raises:
+        HTTPException: If a requested field is unknown.
+    """
+    columns = Pagination.columns(TABLES[table][1], fields)
+    records = rows(table, fields)
+    if format == schema.ExportFormat.csv:
+        return csvLines(records, columns), MEDIA_TYPES[format]
+    return ndjson(records), MEDIA_TYPES[format]
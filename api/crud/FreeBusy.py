@@ -0,0 +1,233 @@
+from fastapi import HTTPException
+from models.User import User
+from models.Meeting import Meeting as MeetingModel
+from models.Availability import Availability
+import schema
+from bisect import bisect_right
+from datetime import timedelta
+from . import Recurrence
+from .Timezone import *
+from config.pool import reads
+
+CHUNK_SIZE = 500
+MAX_MEETING_DURATION = timedelta(days=1)
+SERIES_COLUMNS = ("meetings.starts_at", "meetings.duration", "meetings.timezone", "meetings.recurrence")
+
+def chunks(values, size=CHUNK_SIZE):
+    """
+    Split a list into pieces small enough for an ``IN (...)`` clause.
+
+    Args:
+        values (list): The values to split.
+        size (int): Maximum number of values per piece.
+
+    Returns:
+        Generator[list]: Consecutive slices of the list.
+    """
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def mergeIntervals(intervals):
+    """
+    Merge overlapping or touching intervals.
+
+    Args:
+        intervals (Iterable[tuple]): ``(start, end)`` pairs in any order.
+
+    Returns:
+        List[tuple]: Sorted, non-overlapping ``(start, end)`` pairs.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def overlaps(intervals, start, end):
+    """
+    Check whether a time range overlaps a merged interval list.
+
+    Args:
+        intervals (List[tuple]): Sorted, non-overlapping ``(start, end)`` pairs.
+        start (datetime): Start of the range.
+        end (datetime): End of the range.
+
+    Returns:
+        bool: True if any interval overlaps the range.
+    """
+    index = bisect_right(intervals, (start, datetime.datetime.max))
+    if index and intervals[index - 1][1] > start:
+        return True
+    return index < len(intervals) and intervals[index][0] < end
+
+def freeSlots(busy, start, end, duration):
+    """
+    Find the gaps between busy intervals that fit a duration.
+
+    Args:
+        busy (List[tuple]): Sorted, non-overlapping busy ``(start, end)`` pairs.
+        start (datetime): Start of the search window.
+        end (datetime): End of the search window.
+        duration (timedelta): Minimum length of a free slot.
+
+    Returns:
+        List[tuple]: Free ``(start, end)`` pairs within the window.
+    """
+    slots = []
+    cursor = start
+    for busy_start, busy_end in busy:
+        if busy_start - cursor >= duration:
+            slots.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+    if end - cursor >= duration:
+        slots.append((cursor, end))
+    return slots
+
+def leaveInterval(leave, zone):
+    """
+    Get the UTC interval covered by an unavailability record.
+
+    Args:
+        leave (Availability): The unavailability record; both dates are inclusive.
+        zone (str): Timezone name of the user the record belongs to.
+
+    Returns:
+        tuple: The ``(start, end)`` UTC datetimes of the record.
+    """
+    start = datetime.datetime.fromisoformat(toUTC(getTime(leave.start_date, "00:00"), zone))
+    end = datetime.datetime.fromisoformat(toUTC(getTime(leave.end_date, "00:00") + timedelta(days=1), zone))
+    return start, end
+
+def leavesDuring(query, start, end):
+    """
+    Restrict an availability query to the records that may overlap a UTC window.
+
+    Records hold days in their user's timezone, which is less than a day
+    away from UTC, so the window's days are widened by one on each side to
+    form a range on ``ends_on`` and ``starts_on``, served by the
+    ``(user_id, ends_on)`` index. Compare the exact intervals with
+    ``leaveInterval``.
+
+    Args:
+        query (QueryBuilder): A query on ``availabilitys`` for some users.
+        start (datetime): Start of the window in UTC.
+        end (datetime): End of the window in UTC.
+
+    Returns:
+        QueryBuilder: The restricted query.
+    """
+    return query.where("ends_on", ">=", str((start - timedelta(days=1)).date())).where("starts_on", "<=", str((end + timedelta(days=1)).date()))
+
+def busyIntervals(users, start, end):
+    """
+    Build the busy interval index of each user within a window.
+
+    Meetings a user organizes or takes part in and their unavailability
+    records are loaded with one query per table (per chunk of users).
+    Recurring series are loaded with one more query each for hosted and
+    attended meetings, and expanded only within the window.
+
+    Args:
+        users (List[User]): The users to index.
+        start (datetime): Start of the window in UTC.
+        end (datetime): End of the window in UTC.
+
+    Returns:
+        dict: Sorted, merged ``(start, end)`` UTC pairs keyed by user ID.
+    """
+    lower = str(start - MAX_MEETING_DURATION)
+    upper = str(end)
+    by_email = {user.email: user.id for user in users}
+    zones = {user.id: user.timezone for user in users}
+    intervals = {user.id: [] for user in users}
+
+    def addMeeting(user_id, meeting):
+        for meeting_start, meeting_end in Recurrence.occurrences(meeting, start, end):
+            intervals[user_id].append((max(meeting_start, start), min(meeting_end, end)))
+
+    for ids in chunks(list(intervals)):
+        attended = (MeetingModel.select("meetings.starts_at", "meetings.duration", "meetings.recurrence", "participants.participant_id")
+            .join("participants", "meetings.id", "=", "participants.meeting_id")
+            .where_in("participants.participant_id", ids)
+            .where_null("meetings.recurrence")
+            .where("meetings.starts_at", ">=", lower)
+            .where("meetings.starts_at", "<", upper)
+            .get())
+        attended_series = Recurrence.series(MeetingModel.select(*SERIES_COLUMNS, "participants.participant_id")
+            .join("participants", "meetings.id", "=", "participants.meeting_id")
+            .where_in("participants.participant_id", ids), start, end, "meetings").get()
+        for meeting in list(attended) + list(attended_series):
+            addMeeting(int(meeting.participant_id), meeting)
+        for leave in leavesDuring(Availability.where_in("user_id", ids), start, end).get():
+            leave_start, leave_end = leaveInterval(leave, zones[leave.user_id])
+            if leave_end > start and leave_start < end:
+                intervals[leave.user_id].append((max(leave_start, start), min(leave_end, end)))
+
+    for emails in chunks(list(by_email)):
+        hosted = (MeetingModel.select("organizer", "starts_at", "duration", "recurrence")
+            .where_in("organizer", emails)
+            .where_null("recurrence")
+            .where("starts_at", ">=", lower)
+            .where("starts_at", "<", upper)
+            .get())
+        hosted_series = Recurrence.series(MeetingModel.select(*SERIES_COLUMNS, "meetings.organizer")
+            .where_in("meetings.organizer", emails), start, end, "meetings").get()
+        for meeting in list(hosted) + list(hosted_series):
+            addMeeting(by_email[meeting.organizer], meeting)
+
+    return {user_id: mergeIntervals(busy) for user_id, busy in intervals.items()}
+
+def toSlots(intervals, zone):
+    """
+    Convert UTC intervals into slots in a timezone.
+
+    Dates are written as "dd/mm/yyyy", the format the search accepts, so a
+    slot can be sent back as the window of another search or as a meeting.
+
+    Args:
+        intervals (List[tuple]): ``(start, end)`` pairs in UTC.
+        zone (str): Timezone name to convert into.
+
+    Returns:
+        List[schema.Slot]: The intervals as local dates and times.
+    """
+    starts = fromUTC([interval[0] for interval in intervals], zone)
+    ends = fromUTC([interval[1] for interval in intervals], zone)
+    slots = []
+    for slot_start, slot_end in zip(starts, ends):
+        date, time = slot_start.split(",")
+        end_date, end_time = slot_end.split(",")
+        slots.append(schema.Slot(date=date, time=time, end_date=end_date, end_time=end_time))
+    return slots
+
+@reads
+def get(query: schema.FreeBusyBase):
+    """
+    Compute the busy and common free time of a set of users.
+
+    Args:
+        query (schema.FreeBusyBase): The users, window, slot duration and timezone.
+
+    Returns:
+        schema.FreeBusy: The merged busy intervals and the free slots, in the requested timezone.
+
+    Raises:
+        HTTPException: If the window is invalid or a user is not found.
+    """
+    try:
+        start = datetime.datetime.fromisoformat(toUTC(getTime(query.start_date, query.start_time), query.timezone))
+        end = datetime.datetime.fromisoformat(toUTC(getTime(query.end_date, query.end_time), query.timezone))
+    except (ValueError, IndexError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid time window.")
+    if end <= start or query.duration <= 0:
+        raise HTTPException(status_code=400, detail="Invalid time window.")
+    user_ids = list(set(query.user_ids))
+    users = [user for ids in chunks(user_ids) for user in User.where_in("id", ids).get()]
+    if len(users) != len(user_ids):
+        raise HTTPException(status_code=404, detail="User not found.")
+    busy = mergeIntervals(interval for intervals in busyIntervals(users, start, end).values() for interval in intervals)
+    free = freeSlots(busy, start, end, timedelta(minutes=query.duration))
+    return schema.FreeBusy(timezone=query.timezone, busy=toSlots(busy, query.timezone), free=toSlots(free, query.timezone))
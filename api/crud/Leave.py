@@ -1,18 +1,76 @@
 from fastapi import HTTPException
 from models.Availability import Availability
 from models.User import User
+from crud import Pagination
+from crud import Bulk
+from crud import Cache
+from crud import Outbox
+from config.database import DB
+from config.pool import reads
+from crud.FreeBusy import chunks
+from typing import List
+from datetime import timedelta
 import schema
 from .Timezone import *
 
-def get_all():
+@reads
+def get_all(cursor=None, limit=Pagination.DEFAULT_LIMIT, fields=None, start=None, end=None, **filters):
     """
-    Fetch all availability records.
+    Fetch one page of availability records.
+
+    Args:
+        cursor (int, optional): The last ID of the previous page.
+        limit (int): Maximum number of records to return.
+        fields (str, optional): Comma separated fields to return.
+        start (datetime, optional): Only return records ending on or after this day.
+        end (datetime, optional): Only return records starting before this time.
+        **filters: Column values the records must match.
+
+    Returns:
+        tuple: The records as dicts and the cursor of the next page, or None.
+    """
+    branches = [lambda query: during(query, start, end)] if start is not None or end is not None else None
+    return Pagination.paginate(Availability, schema.AvailabilityResult, cursor, limit, fields, filters, branches)
+
+def during(query, start=None, end=None):
+    """
+    Restrict an availability query to the records in a window.
+
+    Records hold days in their user's timezone, so they are compared with
+    the days of the window as calendar days, through the sortable
+    ``starts_on`` and ``ends_on`` columns.
+
+    Args:
+        query (QueryBuilder): A query on ``availabilitys``.
+        start (datetime, optional): Start of the window.
+        end (datetime, optional): End of the window, excluded.
+
+    Returns:
+        QueryBuilder: The restricted query.
+    """
+    if start is not None:
+        query = query.where("ends_on", ">=", str(start.date()))
+    if end is not None:
+        query = query.where("starts_on", "<=", str((end - timedelta(microseconds=1)).date()))
+    return query
+
+def storedDays(data):
+    """
+    Get the sortable days of an availability record.
+
+    Args:
+        data (schema.AvailabilityBase): The record.
 
     Returns:
-        List[Availability]: A list of all availability records in the database.
+        tuple: ``starts_on`` and ``ends_on`` as "yyyy-mm-dd".
+
+    Raises:
+        ValueError: If a date is not in "dd/mm/yyyy" format.
     """
-    availabilities = Availability.all()
-    return availabilities.all()
+    return str(getDate(data.start_date)), str(getDate(data.end_date))
+
+def leavePayload(data):
+    return {"user_id": data.user_id, "start_date": data.start_date, "end_date": data.end_date, "reason": data.reason}
 
 def add(availability_data: schema.AvailabilityBase):
     """
@@ -25,7 +83,8 @@ def add(availability_data: schema.AvailabilityBase):
         Availability: The created availability record.
 
     Raises:
-        HTTPException: If the user associated with the record is not found.
+        HTTPException: If the user associated with the record is not found
+        or a date is invalid.
     """
     user = User.find(availability_data.user_id)
     if not user:
@@ -34,10 +93,58 @@ def add(availability_data: schema.AvailabilityBase):
     availability = Availability()
     for attr in vars(availability_data).keys():
         setattr(availability, attr, getattr(availability_data, attr))
-    
-    availability.save()
+    try:
+        availability.starts_on, availability.ends_on = storedDays(availability_data)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in dd/mm/yyyy format.")
+    with DB.transaction():
+        availability = availability.save()
+        events = [Outbox.event(availability.user_id, "unavailability.created", availability.id, leavePayload(availability_data))]
+        Outbox.add(events)
+    Outbox.publish(events)
+    Cache.invalidate(Cache.key("unavailability", availability.user_id))
     return availability
 
+def add_many(availability_data: List[schema.AvailabilityBase]):
+    """
+    Add several availability records in one transaction.
+
+    Args:
+        availability_data (List[schema.AvailabilityBase]): Data for the new records.
+
+    Returns:
+        List[schema.BulkResult]: The outcome of each record, in order.
+
+    Raises:
+        HTTPException: If the number of records is out of range.
+    """
+    Bulk.validate(availability_data)
+    user_ids = list({data.user_id for data in availability_data})
+    found = {user.id for part in chunks(user_ids) for user in User.select("id").where_in("id", part).get()}
+    errors = {}
+    records = []
+    indexes = []
+    for index, data in enumerate(availability_data):
+        if data.user_id not in found:
+            errors[index] = "Host not found."
+            continue
+        try:
+            starts_on, ends_on = storedDays(data)
+        except ValueError:
+            errors[index] = "Dates must be in dd/mm/yyyy format."
+            continue
+        records.append(dict(vars(data), starts_on=starts_on, ends_on=ends_on))
+        indexes.append(index)
+    with DB.transaction():
+        ids = Bulk.write(Availability, records, returning=True)
+        events = [Outbox.event(record["user_id"], "unavailability.created", availability_id, leavePayload(availability_data[index]))
+            for index, record, availability_id in zip(indexes, records, ids)]
+        Outbox.add(events)
+    Outbox.publish(events)
+    Cache.invalidate(*[Cache.key("unavailability", user_id) for user_id in {record["user_id"] for record in records}])
+    return Bulk.results(len(availability_data), errors, dict(zip(indexes, ids)))
+
+@reads
 def get(availability_id: int):
     """
     Fetch a single availability record by its ID.
@@ -56,15 +163,17 @@ def get(availability_id: int):
         raise HTTPException(status_code=404, detail="Availability not found.")
     return availability
 
-def availabilitys_by_user(user_id: int):
+@reads
+def availabilitys_by_user(user_id: int, start=None, end=None):
     """
     Fetch all availability records for a specific user.
 
     Args:
         user_id (int): The ID of the user.
+        start (datetime, optional): Only return records ending on or after this day.
+        end (datetime, optional): Only return records starting before this time.
 
     Returns:
-        List[Availability]: A list of availability records associated with the user.
+        List[dict]: The availability records associated with the user.
     """
-    availabilities = Availability.where("user_id", user_id).get().all()
-    return availabilities
+    return Pagination.fetch(during(Availability.select(*Pagination.columns(schema.AvailabilityResult)).where("user_id", user_id), start, end))
@@ -1,42 +1,180 @@
 from fastapi import HTTPException
 from models.Meeting import Meeting as Meetings
 from models.User import User
+from models.Participant import Participant
+from crud import Pagination
+from crud import Bulk
+from crud import Cache
+from crud.FreeBusy import chunks
+from config.database import DB
+from config.pool import reads
 import schema
+from typing import List
+from datetime import timedelta
+from crud import Conflict
+from crud import Recurrence
+from crud import Agenda
+from crud import Outbox
 from .Timezone import *
-from crud.Participant import participants_by_meeting
 
-def get_all():
+@reads
+def get_all(cursor=None, limit=Pagination.DEFAULT_LIMIT, fields=None, start=None, end=None, **filters):
     """
-    Fetch all meeting records.
+    Fetch one page of meeting records.
+
+    Args:
+        cursor (int, optional): The last ID of the previous page.
+        limit (int): Maximum number of records to return.
+        fields (str, optional): Comma separated fields to return.
+        start (datetime, optional): Only return meetings with an occurrence
+            ending after this UTC time.
+        end (datetime, optional): Only return meetings with an occurrence
+            starting before this UTC time.
+        **filters: Column values the records must match.
+
+    Returns:
+        tuple: The records as dicts and the cursor of the next page, or None.
+    """
+    branches = during(start, end) if start is not None or end is not None else None
+    return Pagination.paginate(Meetings, schema.MeetingResult, cursor, limit, fields, filters, branches)
+
+def during(start=None, end=None):
+    """
+    Build the restrictions of a meetings query to the meetings in a window.
+
+    Single meetings are found with a range of the ``starts_at`` index, as a
+    meeting cannot start more than ``Conflict.MAX_MEETING_DURATION`` before
+    it ends; series are those ``Recurrence.series`` finds running in the
+    window, which may have no occurrence in it.
+
+    Args:
+        start (datetime, optional): Start of the window in UTC.
+        end (datetime, optional): End of the window in UTC.
 
     Returns:
-        List[Meetings]: A list of all meeting records in the database.
+        List[Callable]: The disjoint restrictions for single meetings and series.
     """
-    meetings = Meetings.all()
-    return meetings.all()
+    def single(query):
+        query = query.where_null("recurrence")
+        if start is not None:
+            query = query.where("starts_at", ">=", str(start - Conflict.MAX_MEETING_DURATION)).where("ends_at", ">", str(start))
+        if end is not None:
+            query = query.where("starts_at", "<", str(end))
+        return query
+
+    def series(query):
+        return Recurrence.series(query, start or datetime.datetime.min, end or datetime.datetime.max)
+
+    return [single, series]
 
-def add(meeting_data: schema.MeetingBase):
+def add(meeting_data: schema.MeetingBase, conflicts: schema.ConflictMode = schema.ConflictMode.off):
     """
     Add a new meeting record.
 
     Args:
         meeting_data (schema.MeetingBase): Data for the new meeting.
+        conflicts (schema.ConflictMode): How to handle overlapping bookings of the organizer.
 
     Returns:
-        Meetings: The created meeting record.
+        Meetings: The created meeting record, or with ``flag`` a dict of the
+        meeting and its conflicts.
 
     Raises:
-        HTTPException: If the meeting organizer is not found.
+        HTTPException: If the meeting organizer is not found, the duration or
+        recurrence is invalid or, with ``reject``, the organizer is already booked.
     """
     user = User.where("email", meeting_data.organizer).get()
     if not user:
-        return HTTPException(status_code=400, detail="Host not Found.")
+        raise HTTPException(status_code=400, detail="Host not Found.")
+    if not 0 < meeting_data.duration <= Conflict.MAX_MEETING_DURATION.total_seconds() // 60:
+        raise HTTPException(status_code=400, detail="Invalid meeting duration.")
     meeting = Meetings()
     for attr in vars(meeting_data).keys():
         setattr(meeting, attr,getattr(meeting_data, attr))
-    meeting.save()
+    meeting.timezone = user.first().timezone
+    meeting.starts_at = toUTC(getTime(meeting.date, meeting.time), meeting.timezone)
+    meeting.ends_at = str(datetime.datetime.fromisoformat(meeting.starts_at) + timedelta(minutes=meeting.duration))
+    try:
+        meeting.series_ends_at = Recurrence.seriesEnd(meeting)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    with DB.transaction():
+        Conflict.lock([user.first().id], conflicts)
+        found = Conflict.check(user.first(), Recurrence.intervals(meeting), conflicts)
+        meeting = meeting.save()
+        Agenda.add([Agenda.row(meeting, user.first().id, "host")])
+        events = [Outbox.event(user.first().id, "meeting.created", meeting.id, Outbox.meetingPayload(meeting))]
+        Outbox.add(events)
+    Outbox.publish(events)
+    Cache.invalidate(Cache.key("user_meetings", user.first().id))
+    if conflicts == schema.ConflictMode.flag:
+        return {"meeting": meeting.serialize(), "conflicts": found}
     return meeting
 
+def add_many(meetings_data: List[schema.MeetingBase], conflicts: schema.ConflictMode = schema.ConflictMode.off):
+    """
+    Add several meeting records in one transaction.
+
+    The organizers are loaded with one ``IN`` query per chunk. Meetings are
+    checked and saved one at a time, inside a single transaction, so that
+    each result can carry the new meeting's ID.
+
+    Args:
+        meetings_data (List[schema.MeetingBase]): Data for the new meetings.
+        conflicts (schema.ConflictMode): How to handle overlapping bookings of each organizer.
+
+    Returns:
+        List[schema.BulkResult]: The outcome of each meeting, in order.
+
+    Raises:
+        HTTPException: If the number of meetings is out of range.
+    """
+    Bulk.validate(meetings_data)
+    emails = list({data.organizer for data in meetings_data})
+    users = {user.email: user for part in chunks(emails) for user in User.where_in("email", part).get()}
+    errors = {}
+    found = {}
+    meetings = {}
+    with DB.transaction():
+        Conflict.lock([user.id for user in users.values()], conflicts)
+        for index, data in enumerate(meetings_data):
+            user = users.get(data.organizer)
+            if not user:
+                errors[index] = "Host not Found."
+                continue
+            if not 0 < data.duration <= Conflict.MAX_MEETING_DURATION.total_seconds() // 60:
+                errors[index] = "Invalid meeting duration."
+                continue
+            meeting = Meetings()
+            for attr in vars(data).keys():
+                setattr(meeting, attr, getattr(data, attr))
+            meeting.timezone = user.timezone
+            meeting.starts_at = toUTC(getTime(meeting.date, meeting.time), meeting.timezone)
+            meeting.ends_at = str(datetime.datetime.fromisoformat(meeting.starts_at) + timedelta(minutes=meeting.duration))
+            try:
+                meeting.series_ends_at = Recurrence.seriesEnd(meeting)
+            except ValueError as error:
+                errors[index] = str(error)
+                continue
+            try:
+                found[index] = Conflict.check(user, Recurrence.intervals(meeting), conflicts)
+            except HTTPException as error:
+                errors[index] = error.detail["message"]
+                found[index] = [schema.Conflict(**conflict) for conflict in error.detail["conflicts"]]
+                continue
+            meetings[index] = meeting
+        meetings = {index: meeting.save() for index, meeting in meetings.items()}
+        Agenda.add([Agenda.row(meeting, users[meeting.organizer].id, "host") for meeting in meetings.values()])
+        events = [Outbox.event(users[meeting.organizer].id, "meeting.created", meeting.id, Outbox.meetingPayload(meeting)) for meeting in meetings.values()]
+        Outbox.add(events)
+    Outbox.publish(events)
+    Cache.invalidate(*[Cache.key("user_meetings", users[meeting.organizer].id) for meeting in meetings.values()])
+    results = Bulk.results(len(meetings_data), errors, {index: meeting.id for index, meeting in meetings.items()})
+    for index, conflicting in found.items():
+        results[index].conflicts = conflicting
+    return results
+
+@reads
 def get(meeting_id: int):
     """
     Fetch a single meeting record by its ID.
@@ -55,6 +193,7 @@ def get(meeting_id: int):
         raise HTTPException(status_code=404, detail="Meeting not found.")
     return meeting
 
+@reads
 def getMeetingWithParticipants(meeting_id: int):
     """
     Fetch a meeting record along with its participants.
@@ -68,15 +207,121 @@ def getMeetingWithParticipants(meeting_id: int):
     Raises:
         HTTPException: If the meeting is not found.
     """
-    meeting = Meetings.find(meeting_id)
-    if not meeting:
+    meetings = withParticipants(Meetings.with_("participants").where("id", meeting_id).get())
+    if not meetings:
         raise HTTPException(status_code=400, detail="Meeting not Found")
-    participants = participants_by_meeting(meeting_id)
+    return meetings[0]
+
+@reads
+def getMeetingsWithParticipants(meeting_ids: List[int]):
+    """
+    Fetch several meeting records along with their participants.
+
+    Args:
+        meeting_ids (List[int]): The IDs of the meetings.
+
+    Returns:
+        List[schema.Meetings]: The meetings found, in the order requested.
+    """
+    if not meeting_ids:
+        return []
+    meetings = {meeting.meeting_id: meeting for meeting in withParticipants(Meetings.with_("participants").where_in("id", meeting_ids).get())}
+    return [meetings[meeting_id] for meeting_id in meeting_ids if meeting_id in meetings]
+
+def withParticipants(meetings):
+    """
+    Build meeting objects with participant details for a batch of meetings.
+
+    Participant rows are expected to be eager loaded on each meeting through
+    the ``participants`` relationship; the participating users are then
+    fetched with a single ``IN`` query.
+
+    Args:
+        meetings (Collection[Meetings]): Meetings loaded with ``with_("participants")``.
+
+    Returns:
+        List[schema.Meetings]: Meeting objects including participant details.
+    """
+    user_ids = {int(part.participant_id) for meeting in meetings for part in meeting.participants or []}
+    users = {}
+    if user_ids:
+        users = {user.id: user for user in User.select(*schema.UserResult.__fields__).where_in("id", list(user_ids)).get()}
+    result = []
+    for meeting in meetings:
+        data = {'meeting_id': meeting.id, 'date': meeting.date, 'time': meeting.time, 'title': meeting.title, 'organizer': meeting.organizer, 'duration': meeting.duration, 'recurrence': meeting.recurrence}
+        data['participants'] = [users[int(part.participant_id)] for part in meeting.participants or [] if int(part.participant_id) in users]
+        result.append(schema.Meetings(**data))
+    return result
+
+def invalidate(meeting_ids: List[int]):
+    """
+    Drop the cached responses that show the participants of some meetings.
+
+    These are the meetings themselves and the meeting lists of their
+    organizers and of every participant.
+
+    Args:
+        meeting_ids (List[int]): The IDs of the meetings whose participants changed.
+    """
+    keys = [Cache.key("meeting", meeting_id) for meeting_id in meeting_ids]
+    for ids in chunks(list(meeting_ids)):
+        organizers = [meeting.organizer for meeting in Meetings.select("organizer").where_in("id", ids).get()]
+        if organizers:
+            keys += [Cache.key("user_meetings", user.id) for user in User.select("id").where_in("email", list(set(organizers))).get()]
+        keys += [Cache.key("user_meetings", part.participant_id) for part in Participant.select("participant_id").where_in("meeting_id", ids).get()]
+    Cache.invalidate(*set(keys))
+
+def localTimes(instants, zone):
+    """
+    Convert meeting starts into a viewer's timezone.
+
+    Args:
+        instants (List[str]): UTC starts, "yyyy-mm-dd HH:MM:SS".
+        zone (str): Timezone name of the viewer.
+
+    Returns:
+        List[tuple]: The local ``(date, time)`` of each start, in order, as
+        "dd/mm/yyyy" and "HH:MM".
+    """
+    return [tuple(time.split(",")) for time in fromUTC(instants, zone)]
+
+def withOccurrences(meetings, details, zone=None, start=None, end=None):
+    """
+    Repeat meeting objects once per occurrence of their meetings.
+
+    Args:
+        meetings (List[Meetings]): The meeting records.
+        details (List[schema.Meetings]): The objects built from the records,
+            e.g. by ``withParticipants``, in the same order.
+        zone (str, optional): Timezone to show the occurrences in. By default
+            each occurrence keeps the timezone and format its meeting was
+            booked with.
+        start (datetime, optional): Start of the window in UTC; see ``Recurrence.expand``.
+        end (datetime, optional): End of the window in UTC; see ``Recurrence.expand``.
 
-    data = {'meeting_id': meeting_id, 'date': meeting.date, 'time': meeting.time, 'title': meeting.title, 'organizer': meeting.organizer}
-    list = []
-    for participant in participants:
-        list.append(User.find(participant.participant_id))
-    data['participants'] = list
-    return schema.Meetings(**data)
+    Returns:
+        List[schema.Meetings]: One object per occurrence within the window.
+    """
+    by_id = {detail.meeting_id: detail for detail in details}
+    occurrences = list(Recurrence.expand(meetings, start, end))
+    if zone:
+        times = localTimes([starts_at for _, starts_at in occurrences], zone)
+    else:
+        times = [bookedTime(meeting, starts_at) for meeting, starts_at in occurrences]
+    return [by_id[meeting.id].copy(update={'date': date, 'time': time}) for (meeting, _), (date, time) in zip(occurrences, times)]
+
+def bookedTime(meeting, starts_at):
+    """
+    Get the date and time of an occurrence in the format its meeting was booked with.
 
+    Args:
+        meeting (Meetings): The meeting record.
+        starts_at (str): UTC start of the occurrence, "yyyy-mm-dd HH:MM:SS".
+
+    Returns:
+        tuple: The ``(date, time)`` in the meeting's timezone, as "dd/mm/yyyy" and "HH:MM".
+    """
+    if not meeting.recurrence:
+        return meeting.date, meeting.time
+    local = pytz.utc.localize(datetime.datetime.fromisoformat(starts_at)).astimezone(getZone(meeting.timezone))
+    return local.strftime("%d/%m/%Y"), local.strftime("%H:%M")
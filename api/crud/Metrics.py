@@ -0,0 +1,365 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+from config.metrics import METRICS
+
+CATEGORIES = ("db", "tz", "geocode", "serialize")
+DESCRIPTIONS = {"db": "database", "tz": "timezone conversions", "geocode": "timezone lookups", "serialize": "serialization"}
+
+# The record of the request being served. Executor.run copies the context
+# into its worker threads, so the ORM calls of a request add to its record.
+CURRENT = ContextVar("metrics", default=None)
+
+ROUTES = {}
+ROUTES_LOCK = threading.Lock()
+
+API_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+logger = logging.getLogger(__name__)
+
+class Histogram:
+    """Observations counted into cumulative buckets, as Prometheus histograms are."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self, name, labels):
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield sample(name + "_bucket", dict(labels, le="+Inf" if bound == float("inf") else repr(float(bound))), total)
+        yield sample(name + "_sum", labels, self.sum)
+        yield sample(name + "_count", labels, total)
+
+    def state(self):
+        return {"counts": list(self.counts), "sum": self.sum}
+
+    def merge(self, state):
+        self.counts = [count + other for count, other in zip(self.counts, state["counts"])]
+        self.sum += state["sum"]
+
+class RouteStats:
+    """The totals of one route of this worker process, or of several summed."""
+
+    def __init__(self):
+        self.responses = {}
+        self.latency = Histogram(METRICS["buckets"])
+        self.queries = Histogram(METRICS["query_buckets"])
+        self.seconds = dict.fromkeys(CATEGORIES, 0.0)
+
+    def state(self):
+        return {"responses": {str(status): count for status, count in self.responses.items()},
+            "latency": self.latency.state(), "queries": self.queries.state(), "seconds": dict(self.seconds)}
+
+    def merge(self, state):
+        for status, count in state["responses"].items():
+            self.responses[int(status)] = self.responses.get(int(status), 0) + count
+        self.latency.merge(state["latency"])
+        self.queries.merge(state["queries"])
+        for category in CATEGORIES:
+            self.seconds[category] += state["seconds"][category]
+
+def newRecord():
+    """
+    Start the record of a request.
+
+    Returns:
+        dict: The number of statements and the seconds spent in each category.
+    """
+    return dict(dict.fromkeys(CATEGORIES, 0.0), queries=0)
+
+def add(category, seconds):
+    record = CURRENT.get()
+    if record is not None:
+        record[category] += seconds
+
+@contextmanager
+def timer(category):
+    """
+    Add the time spent in a block to the current request's record.
+
+    Args:
+        category (str): One of ``CATEGORIES``.
+    """
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        add(category, perf_counter() - started)
+
+def timed(category):
+    """
+    Add the time spent in a function to the current request's record.
+
+    Outside a request the function runs untimed, so scripts and benchmarks
+    pay nothing for it.
+
+    Args:
+        category (str): One of ``CATEGORIES``.
+
+    Returns:
+        Callable: The decorator.
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            record = CURRENT.get()
+            if record is None:
+                return function(*args, **kwargs)
+            started = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record[category] += perf_counter() - started
+        return wrapper
+    return decorator
+
+def stripSQL(sql):
+    """
+    Replace the literals of a statement with placeholders.
+
+    Args:
+        sql (str): The statement; bound parameters are already placeholders.
+
+    Returns:
+        str: The statement on one line, without string or number literals.
+    """
+    return " ".join(LITERALS.sub("?", sql).split())
+
+def callSite():
+    """
+    Find the line of the API that ran the current statement.
+
+    Returns:
+        str: "path:line in function" of the innermost frame outside the ORM,
+        ``config`` and this module, or "unknown".
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(API_ROOT) and filename != __file__ and "site-packages" not in filename:
+            path = filename[len(API_ROOT):]
+            if not path.startswith("config" + os.sep):
+                return "%s:%d in %s" % (path, frame.f_lineno, frame.f_code.co_name)
+        frame = frame.f_back
+    return "unknown"
+
+def instrument():
+    """
+    Count and time the statements sent through the ORM's connection classes.
+
+    The pooled drivers of ``config.pool`` inherit ``query`` from these
+    classes, so every statement the API runs is recorded. Safe to call more
+    than once.
+    """
+    from masoniteorm.connections import SQLiteConnection, PostgresConnection, MySQLConnection
+    for connection_class in (SQLiteConnection, PostgresConnection, MySQLConnection):
+        if getattr(connection_class.query, "instrumented", False):
+            continue
+        def query(self, query, *args, original=connection_class.query, **kwargs):
+            started = perf_counter()
+            try:
+                return original(self, query, *args, **kwargs)
+            finally:
+                elapsed = perf_counter() - started
+                record = CURRENT.get()
+                if record is not None:
+                    record["queries"] += 1
+                    record["db"] += elapsed
+                if METRICS["slow_query_ms"] is not None and elapsed * 1000 >= METRICS["slow_query_ms"]:
+                    logger.warning("Slow query (%.1f ms) at %s: %s", elapsed * 1000, callSite(), stripSQL(str(query)))
+        query.instrumented = True
+        connection_class.query = query
+
+def serverTiming(record, elapsed):
+    """
+    Format a request's record as a Server-Timing header.
+
+    Args:
+        record (dict): The request's record.
+        elapsed (float): Seconds since the request started.
+
+    Returns:
+        str: The header value, with durations in milliseconds.
+    """
+    entries = ['db;dur=%.2f;desc="%d queries"' % (record["db"] * 1000, record["queries"])]
+    entries += ['%s;dur=%.2f;desc="%s"' % (category, record[category] * 1000, DESCRIPTIONS[category]) for category in CATEGORIES[1:]]
+    entries.append("total;dur=%.2f" % (elapsed * 1000))
+    return ", ".join(entries)
+
+def observe(method, route, status, elapsed, record):
+    """
+    Add a finished request to the totals of its route.
+
+    Args:
+        method (str): The HTTP method.
+        route (str): The route's path template, e.g. ``/users/{user_id}``.
+        status (int): The response status.
+        elapsed (float): Seconds the request took.
+        record (dict): The request's record.
+    """
+    with ROUTES_LOCK:
+        stats = ROUTES.get((method, route))
+        if stats is None:
+            stats = ROUTES[(method, route)] = RouteStats()
+        stats.responses[status] = stats.responses.get(status, 0) + 1
+        stats.latency.observe(elapsed)
+        stats.queries.observe(record["queries"])
+        for category in CATEGORIES:
+            stats.seconds[category] += record[category]
+
+class Middleware:
+    """
+    ASGI middleware that records every HTTP request.
+
+    Requests are labelled with the path template of the route they matched,
+    or "unmatched", so the number of series stays bounded. The Server-Timing
+    header is sent with the response head; the statements of a streamed body
+    are only counted in the route's totals.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        record = newRecord()
+        token = CURRENT.set(record)
+        started = perf_counter()
+        status = 500
+
+        async def sendTimed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if METRICS["server_timing"]:
+                    header = (b"server-timing", serverTiming(record, perf_counter() - started).encode())
+                    message = dict(message, headers=list(message.get("headers", [])) + [header])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, sendTimed)
+        finally:
+            CURRENT.reset(token)
+            route = scope.get("route")
+            observe(scope["method"], getattr(route, "path", "unmatched"), status, perf_counter() - started, record)
+
+def label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def sample(name, labels, value):
+    return "%s{%s} %s" % (name, ",".join('%s="%s"' % (key, label(item)) for key, item in labels.items()), repr(float(value)) if isinstance(value, float) else value)
+
+def flush():
+    """
+    Write the totals of this worker process to ``METRICS["multiprocess_dir"]``.
+
+    Each worker replaces its own ``<pid>.json`` file, so ``render`` in any
+    worker can sum them. Does nothing when no directory is set.
+    """
+    directory = METRICS["multiprocess_dir"]
+    if not directory:
+        return
+    with ROUTES_LOCK:
+        state = [dict(stats.state(), method=method, route=route) for (method, route), stats in ROUTES.items()]
+    path = os.path.join(directory, "%d.json" % os.getpid())
+    with open(path + ".tmp", "w") as file:
+        json.dump(state, file)
+    os.replace(path + ".tmp", path)
+
+async def flushPeriodically():
+    """Flush this worker's totals every ``METRICS["flush_seconds"]`` until cancelled."""
+    while True:
+        await asyncio.sleep(METRICS["flush_seconds"])
+        flush()
+
+def snapshot():
+    """
+    Copy the totals of this worker process.
+
+    Returns:
+        dict: ``RouteStats`` by method and route.
+    """
+    with ROUTES_LOCK:
+        state = {key: stats.state() for key, stats in ROUTES.items()}
+    routes = {}
+    for key, entry in state.items():
+        routes[key] = RouteStats()
+        routes[key].merge(entry)
+    return routes
+
+def merged():
+    """
+    Sum the totals every worker flushed to ``METRICS["multiprocess_dir"]``.
+
+    This worker flushes first, so its own totals are current; those of the
+    other workers are at most ``METRICS["flush_seconds"]`` old. The files of
+    workers that exited are kept, so counters do not go back when a worker
+    is replaced.
+
+    Returns:
+        dict: ``RouteStats`` by method and route.
+    """
+    flush()
+    routes = {}
+    directory = METRICS["multiprocess_dir"]
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            continue
+        for entry in state:
+            key = (entry["method"], entry["route"])
+            if key not in routes:
+                routes[key] = RouteStats()
+            routes[key].merge(entry)
+    return routes
+
+def render():
+    """
+    Render the request totals in the Prometheus text format.
+
+    These are the totals of every worker when ``METRICS["multiprocess_dir"]``
+    is set, which gunicorn.conf.py does when it runs several, and of this
+    worker process otherwise.
+
+    Returns:
+        str: The exposition, version 0.0.4.
+    """
+    routes = sorted((merged() if METRICS["multiprocess_dir"] else snapshot()).items())
+    families = [
+        ("api_requests_total", "counter", "Requests served, by route and status.",
+            [sample("api_requests_total", {"method": method, "route": route, "status": status}, count)
+                for (method, route), stats in routes for status, count in sorted(stats.responses.items())]),
+        ("api_request_duration_seconds", "histogram", "Request latency, by route.",
+            [line for (method, route), stats in routes for line in stats.latency.samples("api_request_duration_seconds", {"method": method, "route": route})]),
+        ("api_db_queries_per_request", "histogram", "SQL statements run per request, by route.",
+            [line for (method, route), stats in routes for line in stats.queries.samples("api_db_queries_per_request", {"method": method, "route": route})]),
+    ]
+    for category in CATEGORIES:
+        name = "api_%s_seconds_total" % category
+        families.append((name, "counter", "Seconds spent in %s, by route." % DESCRIPTIONS[category],
+            [sample(name, {"method": method, "route": route}, stats.seconds[category]) for (method, route), stats in routes]))
+    lines = []
+    for name, kind, description, samples in families:
+        lines += ["# HELP %s %s" % (name, description), "# TYPE %s %s" % (name, kind)] + samples
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,238 @@
+import asyncio
+import datetime
+import json
+import threading
+import time
+from models.Outbox import Outbox as OutboxModel
+from config.events import EVENTS
+from crud import Bulk
+from crud import Pagination
+from .Executor import run
+
+COLUMNS = ("id", "kind", "entity_id", "payload", "created_at")
+MEETING_FIELDS = ("title", "organizer", "duration", "timezone", "recurrence", "starts_at", "ends_at")
+
+# The streams open in this worker, by user ID, as (loop, asyncio.Event)
+# pairs. Write paths run in executor threads, so they wake a stream through
+# its loop.
+SUBSCRIBERS = {}
+SUBSCRIBERS_LOCK = threading.Lock()
+
+def event(user_id, kind, entity_id, payload):
+    """
+    Build the outbox row of a change.
+
+    Args:
+        user_id (int): The ID of the user the change concerns.
+        kind (str): What changed, e.g. ``meeting.created``.
+        entity_id (int, optional): The ID of the changed record.
+        payload (dict): The fields a client needs to apply the change.
+
+    Returns:
+        dict: Column values of the row.
+    """
+    return {"user_id": int(user_id), "kind": kind, "entity_id": entity_id, "payload": json.dumps(payload, default=str, separators=(",", ":"))}
+
+def meetingPayload(meeting, **fields):
+    """
+    Build the payload of a meeting event.
+
+    Args:
+        meeting (MeetingModel): The saved meeting.
+        **fields: Extra fields, e.g. ``participant_id``.
+
+    Returns:
+        dict: The meeting's ID and the fields its agenda rows carry.
+    """
+    return dict({"meeting_id": meeting.id}, **{field: getattr(meeting, field, None) for field in MEETING_FIELDS}, **fields)
+
+def add(events):
+    """
+    Write outbox rows inside the caller's transaction.
+
+    Call ``publish`` with the same rows once the transaction has committed.
+
+    Args:
+        events (List[dict]): Rows built with ``event``.
+    """
+    Bulk.write(OutboxModel, events)
+
+def publish(events):
+    """
+    Wake this worker's streams of the users some committed events concern.
+
+    Args:
+        events (List[dict]): The committed rows.
+    """
+    with SUBSCRIBERS_LOCK:
+        waiting = [subscriber for user_id in {entry["user_id"] for entry in events} for subscriber in SUBSCRIBERS.get(user_id, ())]
+    for loop, wake in waiting:
+        loop.call_soon_threadsafe(wake.set)
+
+def read(user_id, after=0, limit=EVENTS["batch_size"]):
+    """
+    Read a user's events after a cursor.
+
+    Served by a range scan of the ``(user_id, id)`` index. Events that may
+    not have settled are included; ``settled`` drops them.
+
+    Args:
+        user_id (int): The ID of the user.
+        after (int): The ID of the last event the client has.
+        limit (int): Maximum number of events to read.
+
+    Returns:
+        List[dict]: The events, ordered by ID.
+    """
+    return Pagination.fetch(OutboxModel.select(*COLUMNS).where("user_id", user_id).where("id", ">", after).order_by("id").limit(limit))
+
+def cutoff(settle_seconds=EVENTS["settle_seconds"]):
+    """
+    Get the newest ``created_at`` of the events that have settled.
+
+    ``created_at`` is stamped in whole seconds before the insert, so a
+    second is added to make sure every event up to the cutoff was written
+    at least ``settle_seconds`` ago.
+
+    Args:
+        settle_seconds (float): How long a transaction may take to commit its events.
+
+    Returns:
+        str: The UTC cutoff, "yyyy-mm-dd hh:mm:ss".
+    """
+    return str((datetime.datetime.utcnow() - datetime.timedelta(seconds=settle_seconds + 1)).replace(microsecond=0))
+
+def settled(events, newest):
+    """
+    Keep the events that can be delivered.
+
+    Events after the first unsettled one are held back too, even if they
+    settled, so the cursor never passes the ID of an event that may still be
+    committed.
+
+    Args:
+        events (List[dict]): Events ordered by ID, as ``read`` returns them.
+        newest (str): The ``cutoff``.
+
+    Returns:
+        tuple: The leading settled events, and whether any were held back.
+    """
+    for index, entry in enumerate(events):
+        if str(entry["created_at"]) > newest:
+            return events[:index], True
+    return events, False
+
+def start(newest):
+    """
+    Get the cursor a new stream starts from.
+
+    Served by a range scan of the ``created_at`` index over the unsettled
+    events only.
+
+    Args:
+        newest (str): The ``cutoff``.
+
+    Returns:
+        int: The ID before the oldest unsettled event, or the newest ID.
+    """
+    pending = [row["id"] for row in Pagination.fetch(OutboxModel.select("id").where("created_at", ">", newest))]
+    if pending:
+        return min(pending) - 1
+    return bounds()[1] or 0
+
+def bounds():
+    """
+    Get the IDs of the oldest and newest events kept.
+
+    Returns:
+        tuple: Both IDs, or ``(None, None)`` when the outbox is empty.
+    """
+    oldest = OutboxModel.select("id").order_by("id").first()
+    newest = OutboxModel.select("id").order_by("id", "desc").first()
+    return (oldest.id, newest.id) if oldest else (None, None)
+
+def prune(days=EVENTS["retention_days"]):
+    """
+    Delete events older than the retention period.
+
+    The newest event is always kept: IDs are not AUTOINCREMENT, so SQLite
+    would otherwise reuse IDs that clients hold as cursors.
+
+    Args:
+        days (int): Number of days of events to keep.
+
+    Returns:
+        int: The number of events deleted.
+    """
+    cutoff = str(datetime.datetime.utcnow().replace(microsecond=0) - datetime.timedelta(days=days))
+    newest = bounds()[1]
+    if newest is None:
+        return 0
+    count = OutboxModel.where("created_at", "<", cutoff).where("id", "<", newest).count()
+    OutboxModel.where("created_at", "<", cutoff).where("id", "<", newest).delete()
+    return count
+
+def message(kind, event_id=None, data=None):
+    lines = ["retry: %d" % EVENTS["retry_ms"]] if kind == "ready" else []
+    if event_id is not None:
+        lines.append("id: %d" % event_id)
+    lines += ["event: " + kind, "data: " + json.dumps(data, default=str, separators=(",", ":"))]
+    return "\n".join(lines) + "\n\n"
+
+async def stream(user_id, after=None):
+    """
+    Stream a user's events as Server-Sent Events.
+
+    The first message is ``ready``, whose ID is the cursor the stream starts
+    from; a client without a cursor loads its state after receiving it and
+    applies the events that follow. A ``reset`` message, sent instead of
+    events, means events after the client's cursor were pruned and the
+    client must load its state again.
+
+    Events are sent in ID order once they have settled, see config.events:
+    none is skipped or sent twice as long as the transaction that wrote it
+    commits within ``EVENTS["settle_seconds"]``.
+
+    Args:
+        user_id (int): The ID of the user.
+        after (int, optional): The ID of the last event the client has; the
+            newest settled event when not given.
+
+    Returns:
+        AsyncGenerator[str]: The messages.
+    """
+    wake = asyncio.Event()
+    subscriber = (asyncio.get_running_loop(), wake)
+    with SUBSCRIBERS_LOCK:
+        SUBSCRIBERS.setdefault(user_id, set()).add(subscriber)
+    try:
+        oldest = (await run(bounds))[0]
+        if after is None:
+            after = await run(start, cutoff())
+        elif oldest is not None and after < oldest - 1:
+            after = await run(start, cutoff())
+            yield message("reset", after, {"reason": "Events after the given cursor were pruned."})
+        yield message("ready", after, {"user_id": user_id})
+        sent = time.monotonic()
+        while True:
+            wake.clear()
+            events, held = settled(await run(read, user_id, after), cutoff())
+            for entry in events:
+                after = entry["id"]
+                yield message(entry["kind"], after, {"entity_id": entry["entity_id"], "created_at": entry["created_at"], "payload": json.loads(entry["payload"])})
+                sent = time.monotonic()
+            if len(events) == EVENTS["batch_size"]:
+                continue
+            if time.monotonic() - sent >= EVENTS["heartbeat_seconds"]:
+                yield ": keep-alive\n\n"
+                sent = time.monotonic()
+            try:
+                # The cutoff moves by whole seconds, so held back events are checked every second.
+                await asyncio.wait_for(wake.wait(), min(1, EVENTS["poll_seconds"]) if held else EVENTS["poll_seconds"])
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        with SUBSCRIBERS_LOCK:
+            SUBSCRIBERS[user_id].discard(subscriber)
+            if not SUBSCRIBERS[user_id]:
+                del SUBSCRIBERS[user_id]
@@ -0,0 +1,114 @@
+import datetime
+from fastapi import HTTPException
+from .Timezone import getDate
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+def columns(result, fields=None):
+    """
+    Resolve the columns to select for a list endpoint.
+
+    Args:
+        result (Type[BaseModel]): The result schema whose fields may be returned.
+        fields (str, optional): Comma separated field names, e.g. ``id,email``.
+            Defaults to every field of the schema.
+
+    Returns:
+        List[str]: The columns to select, always including ``id``.
+
+    Raises:
+        HTTPException: If a requested field is not part of the schema.
+    """
+    allowed = list(result.__fields__)
+    if not fields:
+        return allowed
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail="Unknown fields: %s" % ", ".join(unknown))
+    return ["id"] + [field for field in dict.fromkeys(requested) if field != "id"]
+
+def fetch(query):
+    """
+    Run a select and return its rows without hydrating models.
+
+    Args:
+        query (QueryBuilder): The query to run.
+
+    Returns:
+        List[dict]: The rows, keyed by the selected column names.
+    """
+    return query.new_connection().query(query.to_qmark(), query._bindings) or []
+
+def window(first=None, last=None):
+    """
+    Resolve the ``from`` and ``to`` days of a list endpoint into a UTC window.
+
+    Args:
+        first (str, optional): The first day, "dd/mm/yyyy".
+        last (str, optional): The last day, "dd/mm/yyyy", included.
+
+    Returns:
+        tuple: The UTC ``(start, end)`` datetimes, from midnight of the
+        first day to midnight after the last; a missing day gives None.
+
+    Raises:
+        HTTPException: If a day is invalid or the last is before the first.
+    """
+    try:
+        start = datetime.datetime.combine(getDate(first), datetime.time()) if first else None
+        end = datetime.datetime.combine(getDate(last), datetime.time()) + datetime.timedelta(days=1) if last else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in dd/mm/yyyy format.")
+    if start is not None and end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="The to date must not be before the from date.")
+    return start, end
+
+def paginate(model, result, cursor=None, limit=DEFAULT_LIMIT, fields=None, filters=None, branches=None):
+    """
+    Fetch one page of a table ordered by ``id``.
+
+    The page is read with ``WHERE id > cursor ORDER BY id LIMIT n`` so the
+    cost of a request depends on the page size, not on the table size. Rows
+    are returned as the driver's dicts, without building a model per row.
+
+    Args:
+        model (Type[Model]): The model of the table to read.
+        result (Type[BaseModel]): The result schema of the endpoint.
+        cursor (int, optional): The last ``id`` of the previous page.
+        limit (int): Maximum number of rows to return.
+        fields (str, optional): Comma separated field names to return.
+        filters (dict, optional): Column values to match; ``None`` values are ignored.
+        branches (List[Callable], optional): Disjoint restrictions of the query,
+            e.g. to a time window. Each one is read as its own page, so each
+            can use its own index, and the pages are merged by ``id``.
+
+    Returns:
+        tuple: The rows as dicts and the cursor of the next page, or None on the last page.
+
+    Raises:
+        HTTPException: If the limit is out of range or a field is unknown.
+    """
+    if not 0 < limit <= MAX_LIMIT:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and %d." % MAX_LIMIT)
+    selected = columns(result, fields)
+
+    def build():
+        query = model.select(*selected)
+        for column, value in (filters or {}).items():
+            if value is not None:
+                query = query.where(column, value)
+        if cursor is not None:
+            query = query.where("id", ">", cursor)
+        return query
+
+    page = []
+    for branch in branches or [lambda query: query]:
+        page += fetch(branch(build()).order_by("id").limit(limit + 1))
+    if branches:
+        page.sort(key=lambda row: row["id"])
+    if len(page) > limit:
+        page = page[:limit]
+        return page, page[-1]["id"]
+    return page, None
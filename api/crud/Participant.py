@@ -3,31 +3,49 @@ from models.Participant import Participant
 from models.User import User
 from models.Meeting import Meeting as MeetingModel
 from crud import Meeting
+from crud import Conflict
+from crud import Recurrence
+from crud import Pagination
+from crud import Bulk
+from crud import Agenda
+from crud import Outbox
+from config.database import DB
+from config.pool import reads
+from crud.FreeBusy import chunks
+from typing import List
 import schema
-from .Timezone import *
 
-def get_all():
+@reads
+def get_all(cursor=None, limit=Pagination.DEFAULT_LIMIT, fields=None, **filters):
     """
-    Fetch all participant records.
+    Fetch one page of participant records.
+
+    Args:
+        cursor (int, optional): The last ID of the previous page.
+        limit (int): Maximum number of records to return.
+        fields (str, optional): Comma separated fields to return.
+        **filters: Column values the records must match.
 
     Returns:
-        List[Participant]: A list of all participant records in the database.
+        tuple: The records as dicts and the cursor of the next page, or None.
     """
-    participants = Participant.all()
-    return participants.all()
+    return Pagination.paginate(Participant, schema.ParticipantResult, cursor, limit, fields, filters)
 
-def add(participant_data: schema.ParticipantBase):
+def add(participant_data: schema.ParticipantBase, conflicts: schema.ConflictMode = schema.ConflictMode.off):
     """
     Add a new participant to a meeting.
 
     Args:
         participant_data (schema.ParticipantBase): Data for the new participant.
+        conflicts (schema.ConflictMode): How to handle overlapping bookings of the participant.
 
     Returns:
-        Participant: The created participant record.
+        Participant: The created participant record, or with ``flag`` a dict
+        of the record and its conflicts.
 
     Raises:
-        HTTPException: If the user or meeting is not found.
+        HTTPException: If the user or meeting is not found or, with
+        ``reject``, the participant is already booked.
     """
     user = User.find(participant_data.participant_id)
     if not user:
@@ -40,35 +58,137 @@ def add(participant_data: schema.ParticipantBase):
     participant = Participant()
     participant.participant_id = participant_data.participant_id
     participant.meeting_id = participant_data.meeting_id
-    participant.save()
+    participant.starts_at, participant.ends_at = bookedRange(meeting)
+    host = User.select("id").where("email", meeting.organizer).first()
+    with DB.transaction():
+        Conflict.lock([user.id], conflicts)
+        found = Conflict.check(user, Recurrence.intervals(meeting), conflicts, exclude_meeting=meeting.id)
+        participant = participant.save()
+        Agenda.add([Agenda.row(meeting, participant.participant_id, "participant")])
+        payload = Outbox.meetingPayload(meeting, participant_id=participant.participant_id)
+        events = [Outbox.event(user_id, "participant.added", participant.id, payload) for user_id in {participant.participant_id, host.id if host else None} if user_id]
+        Outbox.add(events)
+    Outbox.publish(events)
+    Meeting.invalidate([meeting.id])
+    if conflicts == schema.ConflictMode.flag:
+        return {"participant": participant.serialize(), "conflicts": found}
     return participant
 
-def get_meetings(participant_id: int):
+def add_many(participants_data: List[schema.ParticipantBase], conflicts: schema.ConflictMode = schema.ConflictMode.off):
+    """
+    Add several participants in one transaction.
+
+    The referenced users and meetings are each loaded with one ``IN`` query
+    per chunk. The bookings are checked for conflicts, and the rows and
+    their agenda rows written with multi-row inserts, in one transaction.
+
+    Args:
+        participants_data (List[schema.ParticipantBase]): Data for the new participants.
+        conflicts (schema.ConflictMode): How to handle overlapping bookings of each participant.
+
+    Returns:
+        List[schema.BulkResult]: The outcome of each participant, in order.
+
+    Raises:
+        HTTPException: If the number of participants is out of range.
+    """
+    Bulk.validate(participants_data)
+    user_ids = list({data.participant_id for data in participants_data})
+    meeting_ids = list({data.meeting_id for data in participants_data})
+    users = {user.id: user for part in chunks(user_ids) for user in User.where_in("id", part).get()}
+    meetings = {meeting.id: meeting for part in chunks(meeting_ids)
+        for meeting in MeetingModel.select("id", "title", "organizer", "starts_at", "ends_at", "duration", "timezone", "recurrence", "series_ends_at").where_in("id", part).get()}
+    organizers = list({meeting.organizer for meeting in meetings.values()})
+    hosts = {user.email: user.id for part in chunks(organizers) for user in User.select("id", "email").where_in("email", part).get()}
+    errors = {}
+    found = {}
+    records = []
+    indexes = []
+    entries = []
+    notices = []
+    with DB.transaction():
+        Conflict.lock(users, conflicts)
+        for index, data in enumerate(participants_data):
+            user = users.get(data.participant_id)
+            meeting = meetings.get(data.meeting_id)
+            if not user:
+                errors[index] = "Participant not found."
+                continue
+            if not meeting:
+                errors[index] = "Meeting not found."
+                continue
+            try:
+                found[index] = Conflict.check(user, Recurrence.intervals(meeting), conflicts, exclude_meeting=meeting.id)
+            except HTTPException as error:
+                errors[index] = error.detail["message"]
+                found[index] = [schema.Conflict(**conflict) for conflict in error.detail["conflicts"]]
+                continue
+            starts_at, ends_at = bookedRange(meeting)
+            records.append({"participant_id": data.participant_id, "meeting_id": data.meeting_id, "starts_at": starts_at, "ends_at": ends_at})
+            indexes.append(index)
+            entries.append(Agenda.row(meeting, data.participant_id, "participant"))
+            notices.append(({user_id for user_id in (data.participant_id, hosts.get(meeting.organizer)) if user_id},
+                Outbox.meetingPayload(meeting, participant_id=data.participant_id)))
+        ids = Bulk.write(Participant, records, returning=True)
+        Agenda.add(entries)
+        events = [Outbox.event(user_id, "participant.added", participant_id, payload)
+            for (user_ids, payload), participant_id in zip(notices, ids) for user_id in user_ids]
+        Outbox.add(events)
+    Outbox.publish(events)
+    Meeting.invalidate(list({record["meeting_id"] for record in records}))
+    results = Bulk.results(len(participants_data), errors, dict(zip(indexes, ids)))
+    for index, conflicting in found.items():
+        results[index].conflicts = conflicting
+    return results
+
+@reads
+def get_meetings(participant_id: int, start=None, end=None):
     """
     Fetch all meetings for a specific participant.
 
+    The meetings are read from the participant's agenda rows, so the
+    participant rows and meetings are not loaded. Recurring meetings are
+    listed once per occurrence within the window.
+
     Args:
         participant_id (int): The ID of the participant.
+        start (datetime, optional): Start of the window in UTC; see ``Recurrence.expand``.
+        end (datetime, optional): End of the window in UTC; see ``Recurrence.expand``.
 
     Returns:
-        List[MeetingModel]: A list of meetings the participant is involved in.
+        List[dict]: The meetings the participant is involved in, ordered by
+        start, as records with the date and time of each occurrence in the
+        participant's timezone.
 
     Raises:
         HTTPException: If the participant is not found.
     """
-    participants = Participant.where("participant_id", participant_id).get().all()
-    participant = User.find(participant_id)
-    meetings = []
-    for part in participants:
-        meet = Meeting.get(part.meeting_id)
-        user = User.where("email", meet.organizer).get().all()
-        time = getTime(meet.date, meet.time)
-        time = convertTime(user[0].timezone, participant.timezone, time)
-        meet.time = time.split(",")[1]
-        meet.date = time.split(",")[0]
-        meetings.append(meet)
-    return meetings
+    participant = User.select("id", "timezone").find(participant_id)
+    if not participant:
+        raise HTTPException(status_code=404, detail="Participant not found.")
+    occurrences = Agenda.occurrences(Agenda.read(participant_id, start, end, "participant"), start, end)
+    times = Meeting.localTimes([starts_at for _, starts_at in occurrences], participant.timezone)
+    return [{"id": meeting.id, "title": meeting.title, "date": date, "time": time, "organizer": meeting.organizer,
+        "duration": meeting.duration, "recurrence": meeting.recurrence} for (meeting, _), (date, time) in zip(occurrences, times)]
+
+def bookedRange(meeting):
+    """
+    Get the times copied onto the participant rows of a meeting.
+
+    Participant rows of a recurring meeting carry no times; conflict and
+    free/busy checks expand the series from the meeting instead.
+
+    Args:
+        meeting (MeetingModel): The meeting.
+
+    Returns:
+        tuple: The UTC ``starts_at`` and ``ends_at`` strings, or two Nones for a series.
+    """
+    if meeting.recurrence:
+        return None, None
+    return str(meeting.starts_at), str(meeting.ends_at)
 
+@reads
 def participants_by_meeting(meeting_id: int):
     """
     Fetch all participants for a specific meeting.
@@ -77,7 +197,6 @@ def participants_by_meeting(meeting_id: int):
         meeting_id (int): The ID of the meeting.
 
     Returns:
-        List[Participant]: A list of participants in the meeting.
+        List[dict]: The participant records of the meeting.
     """
-    participants = Participant.where("meeting_id", meeting_id).get().all()
-    return participants
+    return Pagination.fetch(Participant.select(*Pagination.columns(schema.ParticipantResult)).where("meeting_id", meeting_id))
@@ -0,0 +1,138 @@
+import asyncio
+import base64
+import builtins
+import hashlib
+import hmac
+import os
+from config.passwords import PASSWORDS
+from .Executor import compute, run
+
+ALGORITHM = "scrypt"
+
+def derive(password, salt, n, r, p, length):
+    """
+    Derive the scrypt key of a password.
+
+    Runs in a worker process of the "passwords" pool, so it only takes
+    picklable arguments.
+
+    Args:
+        password (str): The password.
+        salt (bytes): The salt.
+        n (int): CPU and memory cost, a power of two.
+        r (int): Block size.
+        p (int): Parallelism.
+        length (int): Length of the key in bytes.
+
+    Returns:
+        bytes: The key.
+    """
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, dklen=length, maxmem=128 * r * (n + p + 2) + 1024 * 1024)
+
+async def calculate(*args):
+    """
+    Run ``derive`` as configured by the ``mode`` of ``config.passwords``.
+
+    Args:
+        *args: Arguments of ``derive``.
+
+    Returns:
+        bytes: The key.
+    """
+    if PASSWORDS["mode"] == "process":
+        return await compute("passwords", derive, *args)
+    if PASSWORDS["mode"] == "thread":
+        return await run(derive, *args)
+    return derive(*args)
+
+def encode(n, r, p, salt, key):
+    text = lambda data: base64.b64encode(data).decode("ascii").rstrip("=")
+    return "$".join([ALGORITHM, str(n), str(r), str(p), text(salt), text(key)])
+
+def parse(encoded):
+    """
+    Split a stored password into its cost, salt and key.
+
+    Args:
+        encoded (str): The stored password.
+
+    Returns:
+        tuple: ``(n, r, p, salt, key)``, or None for a value stored before
+        scrypt was used.
+
+    Raises:
+        ValueError: If an scrypt value is malformed.
+    """
+    parts = str(encoded).split("$")
+    if parts[0] != ALGORITHM:
+        return None
+    if len(parts) != 6:
+        raise ValueError("Malformed password hash.")
+    data = lambda text: base64.b64decode(text + "=" * (-len(text) % 4))
+    return int(parts[1]), int(parts[2]), int(parts[3]), data(parts[4]), data(parts[5])
+
+async def make(password):
+    """
+    Hash a password at the configured cost.
+
+    Args:
+        password (str): The password.
+
+    Returns:
+        str: The value to store, "scrypt$n$r$p$salt$key".
+    """
+    salt = os.urandom(PASSWORDS["salt_bytes"])
+    key = await calculate(password, salt, PASSWORDS["n"], PASSWORDS["r"], PASSWORDS["p"], PASSWORDS["key_bytes"])
+    return encode(PASSWORDS["n"], PASSWORDS["r"], PASSWORDS["p"], salt, key)
+
+async def makeMany(passwords):
+    """
+    Hash several passwords concurrently, spreading them over the pool.
+
+    Args:
+        passwords (List[str]): The passwords.
+
+    Returns:
+        List[str]: The values to store, in order.
+    """
+    return list(await asyncio.gather(*[make(password) for password in passwords]))
+
+async def verify(password, encoded):
+    """
+    Check a password against a stored value.
+
+    Values stored before scrypt was used are the process-salted ``hash()``
+    of the password; they only match when the server runs with the
+    ``PYTHONHASHSEED`` they were made with.
+
+    Args:
+        password (str): The password given.
+        encoded (str): The stored value.
+
+    Returns:
+        bool: Whether the password matches.
+    """
+    try:
+        parsed = parse(encoded)
+    except ValueError:
+        return False
+    if parsed is None:
+        return hmac.compare_digest(str(builtins.hash(password)), str(encoded))
+    n, r, p, salt, key = parsed
+    return hmac.compare_digest(await calculate(password, salt, n, r, p, len(key)), key)
+
+def needsRehash(encoded):
+    """
+    Check whether a stored value was made at another cost than the configured one.
+
+    Args:
+        encoded (str): The stored value.
+
+    Returns:
+        bool: True for values made at another cost or before scrypt was used.
+    """
+    try:
+        parsed = parse(encoded)
+    except ValueError:
+        return True
+    return parsed is None or parsed[:3] != (PASSWORDS["n"], PASSWORDS["r"], PASSWORDS["p"])
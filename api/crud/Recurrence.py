@@ -0,0 +1,277 @@
+from collections import namedtuple
+from functools import lru_cache
+from datetime import timedelta
+from config.recurrence import RECURRENCE
+from .Timezone import *
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY")
+FIELDS = ("FREQ", "INTERVAL", "COUNT", "UNTIL", "EXDATE")
+
+# Bounds the difference between local and UTC times, so occurrences well
+# outside a window are skipped before their timezone conversion.
+UTC_OFFSET = timedelta(days=1)
+
+Rule = namedtuple("Rule", ["frequency", "interval", "count", "until", "exceptions"])
+
+def toDate(value):
+    """
+    Parse an RRULE date.
+
+    Args:
+        value (str): The date as "yyyymmdd"; a trailing "THHMMSS[Z]" is ignored.
+
+    Returns:
+        date: The parsed date.
+
+    Raises:
+        ValueError: If the date is invalid.
+    """
+    return datetime.datetime.strptime(value.strip()[:8], "%Y%m%d").date()
+
+@lru_cache(maxsize=1024)
+def parse(recurrence):
+    """
+    Parse an RRULE-style recurrence.
+
+    A recurrence looks like ``FREQ=WEEKLY;INTERVAL=2;COUNT=10;EXDATE=20241225``.
+    ``FREQ`` is ``DAILY``, ``WEEKLY`` or ``MONTHLY``; ``INTERVAL`` defaults to 1;
+    at most one of ``COUNT`` and ``UNTIL`` may be given, and without either the
+    series has no end. ``UNTIL`` and the comma separated ``EXDATE`` dates are
+    days in the organizer's timezone. As in RFC 5545, skipped dates still
+    count towards ``COUNT``, and monthly series skip months too short for the
+    day of the first meeting.
+
+    Args:
+        recurrence (str): The rule, optionally prefixed with "RRULE:".
+
+    Returns:
+        Rule: The parsed rule.
+
+    Raises:
+        ValueError: If the rule is invalid or unsupported.
+    """
+    fields = {}
+    for part in recurrence.strip().removeprefix("RRULE:").split(";"):
+        if part.strip():
+            name, _, value = part.partition("=")
+            fields[name.strip().upper()] = value.strip()
+    unknown = sorted(set(fields) - set(FIELDS))
+    if unknown:
+        raise ValueError("Unsupported recurrence fields: " + ", ".join(unknown) + ".")
+    frequency = fields.get("FREQ", "").upper()
+    if frequency not in FREQUENCIES:
+        raise ValueError("Recurrence FREQ must be one of " + ", ".join(FREQUENCIES) + ".")
+    interval = int(fields.get("INTERVAL", 1))
+    count = int(fields["COUNT"]) if "COUNT" in fields else None
+    until = toDate(fields["UNTIL"]) if "UNTIL" in fields else None
+    exceptions = frozenset(toDate(value) for value in fields.get("EXDATE", "").split(",") if value.strip())
+    if interval < 1:
+        raise ValueError("Recurrence INTERVAL must be positive.")
+    if count is not None and not 0 < count <= RECURRENCE["max_count"]:
+        raise ValueError("Recurrence COUNT must be between 1 and " + str(RECURRENCE["max_count"]) + ".")
+    if count is not None and until is not None:
+        raise ValueError("Recurrence cannot have both COUNT and UNTIL.")
+    return Rule(frequency, interval, count, until, exceptions)
+
+def localStart(rule, first, index):
+    """
+    Get the local start of an occurrence of a rule.
+
+    Args:
+        rule (Rule): The parsed rule.
+        first (datetime): Local start of the first occurrence.
+        index (int): Index of the occurrence.
+
+    Returns:
+        datetime: The local start, or None if the month has no such day.
+    """
+    if rule.frequency == "DAILY":
+        return first + timedelta(days=index * rule.interval)
+    if rule.frequency == "WEEKLY":
+        return first + timedelta(weeks=index * rule.interval)
+    month = first.month - 1 + index * rule.interval
+    try:
+        return first.replace(year=first.year + month // 12, month=month % 12 + 1)
+    except ValueError:
+        return None
+
+def firstIndex(rule, first, start):
+    """
+    Get an occurrence index at or before the first one that can end after a time.
+
+    Expansion starts here instead of at the first occurrence, so reading a
+    window of a long series costs as much as the occurrences in the window.
+
+    Args:
+        rule (Rule): The parsed rule.
+        first (datetime): Local start of the first occurrence.
+        start (datetime): The time, in UTC, less the meeting duration.
+
+    Returns:
+        int: The index; every earlier index is a real occurrence.
+    """
+    if rule.frequency == "MONTHLY":
+        if first.day > 28:
+            return 0
+        months = (start.year - first.year) * 12 + start.month - first.month
+        return max(0, months // rule.interval - 1)
+    step = timedelta(days=rule.interval * (7 if rule.frequency == "WEEKLY" else 1))
+    return max(0, (start - first) // step - 1)
+
+def occurrences(meeting, start, end):
+    """
+    Lazily expand a meeting into its occurrences within a window.
+
+    Occurrences keep the wall-clock time of the first meeting in the
+    organizer's timezone, across daylight saving changes. A meeting without
+    a recurrence has a single occurrence.
+
+    Args:
+        meeting (Meeting): A meeting with ``starts_at``, ``duration``,
+            ``timezone`` and ``recurrence``.
+        start (datetime): Start of the window in UTC.
+        end (datetime): End of the window in UTC.
+
+    Returns:
+        Generator[tuple]: The ``(start, end)`` UTC pairs of the occurrences
+        that overlap the window, in order.
+    """
+    first = datetime.datetime.fromisoformat(str(meeting.starts_at))
+    duration = timedelta(minutes=meeting.duration)
+    if not meeting.recurrence:
+        if first < end and first + duration > start:
+            yield first, first + duration
+        return
+    rule = parse(meeting.recurrence)
+    tz = getZone(meeting.timezone)
+    local_first = pytz.utc.localize(first).astimezone(tz).replace(tzinfo=None)
+    index = firstIndex(rule, local_first, max(start, first) - duration)
+    generated = index
+    while rule.count is None or generated < rule.count:
+        local = localStart(rule, local_first, index)
+        index += 1
+        if local is None:
+            continue
+        generated += 1
+        if rule.until is not None and local.date() > rule.until:
+            return
+        if local + duration + UTC_OFFSET <= start or local.date() in rule.exceptions:
+            continue
+        if local - UTC_OFFSET >= end:
+            return
+        occurrence = tz.localize(local).astimezone(pytz.utc).replace(tzinfo=None)
+        if occurrence >= end:
+            return
+        if occurrence + duration > start:
+            yield occurrence, occurrence + duration
+
+def seriesEnd(meeting):
+    """
+    Validate the recurrence of a meeting and find when its series ends.
+
+    Args:
+        meeting (Meeting): A meeting with ``starts_at``, ``duration``,
+            ``timezone`` and ``recurrence``.
+
+    Returns:
+        str: The UTC end of the last occurrence, "yyyy-mm-dd HH:MM:SS", or
+        None for a meeting without a recurrence or a series without an end.
+
+    Raises:
+        ValueError: If the recurrence is invalid, has no occurrences or, with
+        ``UNTIL``, more than the configured maximum of occurrences.
+    """
+    if not meeting.recurrence:
+        return None
+    rule = parse(meeting.recurrence)
+    if rule.count is None and rule.until is None:
+        return None
+    last = None
+    first = datetime.datetime.fromisoformat(str(meeting.starts_at))
+    for number, (_, occurrence_end) in enumerate(occurrences(meeting, first, datetime.datetime.max)):
+        if number >= RECURRENCE["max_count"]:
+            raise ValueError("Recurrence has more than " + str(RECURRENCE["max_count"]) + " occurrences.")
+        last = occurrence_end
+    if last is None:
+        raise ValueError("Recurrence has no occurrences.")
+    return str(last)
+
+def window(meeting, start=None, end=None):
+    """
+    Fill in the default window a meeting is expanded in.
+
+    Args:
+        meeting (Meeting): The meeting.
+        start (datetime, optional): Start of the window in UTC; by default
+            the start of the first occurrence.
+        end (datetime, optional): End of the window in UTC; by default the
+            end of the series, or for a series without an end the configured
+            horizon past today.
+
+    Returns:
+        tuple: The ``(start, end)`` UTC datetimes of the window.
+    """
+    first = datetime.datetime.fromisoformat(str(meeting.starts_at))
+    if end is None:
+        if not meeting.recurrence:
+            end = first + timedelta(minutes=meeting.duration)
+        elif getattr(meeting, "series_ends_at", None):
+            end = datetime.datetime.fromisoformat(str(meeting.series_ends_at))
+        else:
+            end = max(datetime.datetime.utcnow(), first) + timedelta(days=RECURRENCE["horizon_days"])
+    return (first if start is None else start), end
+
+def intervals(meeting, start=None, end=None):
+    """
+    Get the occurrences of a meeting as a list, for conflict checks.
+
+    Args:
+        meeting (Meeting): The meeting.
+        start (datetime, optional): Start of the window in UTC; see ``window``.
+        end (datetime, optional): End of the window in UTC; see ``window``.
+
+    Returns:
+        List[tuple]: The ``(start, end)`` UTC pairs of the occurrences.
+    """
+    return list(occurrences(meeting, *window(meeting, start, end)))
+
+def expand(meetings, start=None, end=None):
+    """
+    Expand meetings into their occurrences for a listing.
+
+    Without a window, meetings without a recurrence are listed as they are
+    and series are expanded in their default ``window``.
+
+    Args:
+        meetings (Iterable[Meeting]): The meetings.
+        start (datetime, optional): Start of the window in UTC.
+        end (datetime, optional): End of the window in UTC.
+
+    Returns:
+        Generator[tuple]: ``(meeting, starts_at)`` pairs, one per occurrence,
+        with ``starts_at`` in UTC as "yyyy-mm-dd HH:MM:SS".
+    """
+    for meeting in meetings:
+        if not meeting.recurrence and start is None and end is None:
+            yield meeting, str(meeting.starts_at)
+            continue
+        for occurrence_start, _ in occurrences(meeting, *window(meeting, start, end)):
+            yield meeting, str(occurrence_start)
+
+def series(query, start, end, table=None):
+    """
+    Restrict a meetings query to the series that may have occurrences in a window.
+
+    Args:
+        query (QueryBuilder): A query on ``meetings``.
+        start (datetime): Start of the window in UTC.
+        end (datetime): End of the window in UTC.
+        table (str, optional): Prefix for the columns, for queries with joins.
+
+    Returns:
+        QueryBuilder: The restricted query.
+    """
+    column = (table + ".") if table else ""
+    return (query.where_not_null(column + "recurrence")
+        .where(column + "starts_at", "<", str(end))
+        .where(lambda builder: builder.where_null(column + "series_ends_at").or_where(column + "series_ends_at", ">", str(start))))
@@ -0,0 +1,249 @@
+from fastapi import HTTPException
+from models.User import User
+import schema
+from datetime import timedelta
+from .FreeBusy import busyIntervals, chunks, toSlots
+from .Timezone import *
+from config.pool import reads
+
+MAX_WINDOW = timedelta(days=62)
+SHORTLIST = 50
+
+def busyMask(intervals, start, step, size):
+    """
+    Mark the grid cells a list of intervals touches.
+
+    Bit ``i`` stands for the cell ``[start + i * step, start + (i + 1) * step)``.
+
+    Args:
+        intervals (List[tuple]): ``(start, end)`` UTC pairs.
+        start (datetime): Start of the grid.
+        step (timedelta): Length of a cell.
+        size (int): Number of cells.
+
+    Returns:
+        int: The bitset of busy cells.
+    """
+    mask = 0
+    for busy_start, busy_end in intervals:
+        first = max(0, int((busy_start - start) // step))
+        last = min(size, -int(-(busy_end - start) // step))
+        if last > first:
+            mask |= ((1 << (last - first)) - 1) << first
+    return mask
+
+def freeStarts(busy, cells, size):
+    """
+    Find the cells a slot of a given length can start at without touching a busy cell.
+
+    Args:
+        busy (int): The bitset of busy cells.
+        cells (int): Length of the slot in cells.
+        size (int): Number of cells in the grid.
+
+    Returns:
+        int: The bitset of possible start cells.
+    """
+    blocked = busy
+    width = 1
+    while width < cells:
+        shift = min(width, cells - width)
+        blocked |= blocked >> shift
+        width += shift
+    return ~blocked & ((1 << (size - cells + 1)) - 1)
+
+def addBits(planes, mask):
+    """
+    Add a bitset into a bit-sliced counter, one count per bit position.
+
+    Plane ``p`` holds bit ``p`` of every position's count, so adding a user
+    costs a handful of big-integer operations instead of a loop over cells.
+
+    Args:
+        planes (List[int]): The counter; updated in place.
+        mask (int): The bitset to add.
+    """
+    carry = mask
+    for plane in range(len(planes)):
+        if not carry:
+            return
+        planes[plane], carry = planes[plane] ^ carry, planes[plane] & carry
+    if carry:
+        planes.append(carry)
+
+def counts(planes, size):
+    """
+    Read the per-position counts out of a bit-sliced counter.
+
+    Args:
+        planes (List[int]): The counter.
+        size (int): Number of positions.
+
+    Returns:
+        List[int]: The count of each position.
+    """
+    totals = [0] * size
+    for plane, bits in enumerate(planes):
+        weight = 1 << plane
+        for position, bit in enumerate(reversed(format(bits, "b").zfill(size)[-size:])):
+            if bit == "1":
+                totals[position] += weight
+    return totals
+
+def workingHours(zone, start, end, step, size, cells, work_start, work_end, weekdays_only):
+    """
+    Find the start cells whose whole slot falls within working hours in a timezone.
+
+    Args:
+        zone (str): Timezone name.
+        start (datetime): Start of the grid in UTC.
+        end (datetime): End of the grid in UTC.
+        step (timedelta): Length of a cell.
+        size (int): Number of cells.
+        cells (int): Length of the slot in cells.
+        work_start (datetime.time): Local start of the working day.
+        work_end (datetime.time): Local end of the working day.
+        weekdays_only (bool): Whether Saturdays and Sundays are outside working hours.
+
+    Returns:
+        int: The bitset of start cells within working hours.
+    """
+    tz = getZone(zone)
+    mask = 0
+    day = pytz.utc.localize(start).astimezone(tz).date() - timedelta(days=1)
+    last_day = pytz.utc.localize(end).astimezone(tz).date() + timedelta(days=1)
+    while day <= last_day:
+        if not weekdays_only or day.weekday() < 5:
+            opens = tz.localize(datetime.datetime.combine(day, work_start)).astimezone(pytz.utc).replace(tzinfo=None)
+            closes = tz.localize(datetime.datetime.combine(day, work_end)).astimezone(pytz.utc).replace(tzinfo=None)
+            first = max(0, -int(-(opens - start) // step))
+            last = min(size - cells + 1, int((closes - start) // step) - cells + 1)
+            if last > first:
+                mask |= ((1 << (last - first)) - 1) << first
+        day += timedelta(days=1)
+    return mask
+
+def outsideMinutes(slot_start, slot_end, zone, work_start, work_end, weekdays_only):
+    """
+    Measure how far a slot lies outside working hours in a timezone.
+
+    Args:
+        slot_start (datetime): Start of the slot in UTC.
+        slot_end (datetime): End of the slot in UTC.
+        zone (str): Timezone name.
+        work_start (datetime.time): Local start of the working day.
+        work_end (datetime.time): Local end of the working day.
+        weekdays_only (bool): Whether Saturdays and Sundays are outside working hours.
+
+    Returns:
+        int: Minutes of the slot outside working hours.
+    """
+    tz = getZone(zone)
+    local_start = pytz.utc.localize(slot_start).astimezone(tz).replace(tzinfo=None)
+    local_end = local_start + (slot_end - slot_start)
+    day = local_start.date()
+    if weekdays_only and day.weekday() >= 5:
+        return int((slot_end - slot_start).total_seconds() // 60)
+    opens = datetime.datetime.combine(day, work_start)
+    closes = datetime.datetime.combine(day, work_end)
+    inside = max(timedelta(0), min(local_end, closes) - max(local_start, opens))
+    return int((slot_end - slot_start - inside).total_seconds() // 60)
+
+def recommend(intervals, zones, start, end, duration, step, top, work_start, work_end, weekdays_only):
+    """
+    Rank the start times of a slot for a set of users.
+
+    Slots are ranked by the number of users who are free for the whole slot
+    and for whom it falls within working hours, then by the number of users
+    free at all, then by the total minutes it lies outside the users' working
+    hours, then by time.
+    The slots returned do not overlap each other.
+
+    Args:
+        intervals (dict): Sorted busy ``(start, end)`` UTC pairs keyed by user ID.
+        zones (dict): Timezone name keyed by user ID.
+        start (datetime): Start of the search window in UTC.
+        end (datetime): End of the search window in UTC.
+        duration (timedelta): Length of the slot.
+        step (timedelta): Spacing of the candidate start times.
+        top (int): Maximum number of slots to return.
+        work_start (datetime.time): Local start of the working day.
+        work_end (datetime.time): Local end of the working day.
+        weekdays_only (bool): Whether Saturdays and Sundays are outside working hours.
+
+    Returns:
+        List[dict]: The best slots, with their UTC ``start`` and ``end``, the
+        ``free`` and ``in_hours`` counts, ``outside_minutes`` and ``busy_user_ids``.
+    """
+    size = int((end - start) // step)
+    cells = -int(-duration // step)
+    if cells > size:
+        return []
+    hours = {zone: workingHours(zone, start, end, step, size, cells, work_start, work_end, weekdays_only) for zone in set(zones.values())}
+    free_planes, hours_planes, free = [], [], {}
+    for user_id, busy in intervals.items():
+        free[user_id] = freeStarts(busyMask(busy, start, step, size), cells, size)
+        addBits(free_planes, free[user_id])
+        addBits(hours_planes, free[user_id] & hours[zones[user_id]])
+    free_counts = counts(free_planes, size - cells + 1)
+    hours_counts = counts(hours_planes, size - cells + 1)
+    ranked = sorted(range(size - cells + 1), key=lambda cell: (-hours_counts[cell], -free_counts[cell], cell))
+
+    users_by_zone = {}
+    for zone in zones.values():
+        users_by_zone[zone] = users_by_zone.get(zone, 0) + 1
+    def outside(cell):
+        slot_start = start + cell * step
+        return sum(users * outsideMinutes(slot_start, slot_start + duration, zone, work_start, work_end, weekdays_only)
+            for zone, users in users_by_zone.items())
+    shortlist = sorted(ranked[:max(SHORTLIST, top * 10)], key=lambda cell: (-hours_counts[cell], -free_counts[cell], outside(cell), cell))
+
+    chosen = []
+    for cell in shortlist:
+        if len(chosen) == top:
+            break
+        if any(abs(cell - other) < cells for other in chosen):
+            continue
+        chosen.append(cell)
+    return [{
+        "start": start + cell * step,
+        "end": start + cell * step + duration,
+        "free": free_counts[cell],
+        "in_hours": hours_counts[cell],
+        "outside_minutes": outside(cell),
+        "busy_user_ids": sorted(user_id for user_id, starts in free.items() if not starts >> cell & 1),
+    } for cell in chosen]
+
+@reads
+def get(query: schema.SlotSearch):
+    """
+    Recommend meeting times for a set of users.
+
+    Args:
+        query (schema.SlotSearch): The users, window, duration and working hours.
+
+    Returns:
+        schema.SlotSuggestions: The best slots, in the requested timezone.
+
+    Raises:
+        HTTPException: If the window or working hours are invalid or a user is not found.
+    """
+    try:
+        start = datetime.datetime.fromisoformat(toUTC(getTime(query.start_date, query.start_time), query.timezone))
+        end = datetime.datetime.fromisoformat(toUTC(getTime(query.end_date, query.end_time), query.timezone))
+        work_start = datetime.time(*map(int, query.work_start.split(":")))
+        work_end = datetime.time(*map(int, query.work_end.split(":")))
+    except (ValueError, IndexError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid time window.")
+    if not start < end <= start + MAX_WINDOW or query.duration <= 0 or query.step <= 0 or query.top <= 0 or work_end <= work_start:
+        raise HTTPException(status_code=400, detail="Invalid time window.")
+    user_ids = list(set(query.user_ids))
+    users = [user for ids in chunks(user_ids) for user in User.where_in("id", ids).get()]
+    if not users or len(users) != len(user_ids):
+        raise HTTPException(status_code=404, detail="User not found.")
+    slots = recommend(busyIntervals(users, start, end), {user.id: user.timezone for user in users}, start, end,
+        timedelta(minutes=query.duration), timedelta(minutes=query.step), query.top, work_start, work_end, query.weekdays_only)
+    times = toSlots([(slot["start"], slot["end"]) for slot in slots], query.timezone)
+    return schema.SlotSuggestions(timezone=query.timezone, participants=len(users), slots=[
+        schema.SlotSuggestion(**time.dict(), free=slot["free"], in_hours=slot["in_hours"], outside_minutes=slot["outside_minutes"], busy_user_ids=slot["busy_user_ids"])
+        for time, slot in zip(times, slots)])
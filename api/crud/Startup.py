@@ -0,0 +1,62 @@
+import asyncio
+import os
+import time
+from config.database import DB
+from config.passwords import PASSWORDS
+from config.executors import EXECUTORS
+from config.metrics import METRICS
+from config.timezones import TIMEZONES
+from crud import Metrics, Timezone
+from .Executor import compute, run
+
+STATE = {"warmed": False, "started": False, "draining": False, "since": time.time(), "flusher": None}
+
+def warm():
+    """
+    Load the data every worker needs before its first request.
+
+    Nothing here opens a connection or starts a thread, so it is safe to run
+    in the Gunicorn master before forking. Safe to call more than once.
+    """
+    if STATE["warmed"]:
+        return
+    for zone in set(Timezone.ZIPCODES.values()) | set(Timezone.CITIES.values()) | set(Timezone.STATES.values()):
+        Timezone.getZone(zone)
+    if TIMEZONES["geocoder"]["enabled"]:
+        Timezone.getTimezoneFinder()
+    STATE["warmed"] = True
+
+async def start():
+    """
+    Get a worker ready to serve: warm it if the master did not, start the
+    password hashing processes so the first signup does not wait for them,
+    and flush its metrics periodically when the workers share them.
+    """
+    await run(warm)
+    if PASSWORDS["mode"] == "process":
+        await asyncio.gather(*[compute("passwords", os.getpid) for _ in range(EXECUTORS["passwords"]["max_workers"])])
+    if METRICS["multiprocess_dir"]:
+        STATE["flusher"] = asyncio.get_running_loop().create_task(Metrics.flushPeriodically())
+    STATE["started"] = True
+
+def stop():
+    STATE["draining"] = True
+    if STATE["flusher"] is not None:
+        STATE["flusher"].cancel()
+        Metrics.flush()
+
+def check():
+    """
+    Check whether this worker can serve requests.
+
+    Returns:
+        dict: Whether it is ``ready``, and the result of each check.
+    """
+    checks = {"started": STATE["started"], "draining": STATE["draining"]}
+    try:
+        DB.statement("SELECT 1")
+        checks["database"] = True
+    except Exception:
+        checks["database"] = False
+    return {"ready": checks["started"] and checks["database"] and not checks["draining"], "pid": os.getpid(),
+        "uptime_seconds": round(time.time() - STATE["since"], 1), "checks": checks}
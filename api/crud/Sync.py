@@ -0,0 +1,121 @@
+import base64
+import binascii
+import datetime
+import json
+from fastapi import HTTPException
+from models.User import User
+from models.Meeting import Meeting as MeetingModel
+from models.Participant import Participant
+from models.Availability import Availability
+from models.Tombstone import Tombstone
+from config.sync import SYNC
+from config.pool import reads
+from crud import Pagination
+import schema
+
+# The synced tables by their name in the API, with their database table and
+# the columns sent for each row. Password hashes are never sent.
+TABLES = {
+    "users": (User, "users", list(schema.UserResult.__fields__)),
+    "meetings": (MeetingModel, "meetings", list(schema.MeetingResult.__fields__)),
+    "participants": (Participant, "participants", list(schema.ParticipantResult.__fields__)),
+    "unavailability": (Availability, "availabilitys", list(schema.AvailabilityResult.__fields__)),
+}
+
+def encodeToken(positions):
+    return base64.urlsafe_b64encode(json.dumps(positions, separators=(",", ":")).encode("utf-8")).decode("ascii").rstrip("=")
+
+def decodeToken(token):
+    """
+    Read the positions a sync token holds.
+
+    Args:
+        token (str): The token returned by the previous sync.
+
+    Returns:
+        dict: The ``[updated_at, id]`` reached in each table and the last
+        tombstone ID, under ``tombstones``.
+
+    Raises:
+        HTTPException: If the token was not made by ``changes``.
+    """
+    try:
+        positions = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        for name in TABLES:
+            if positions.get(name) is not None:
+                updated_at, record_id = positions[name]
+                positions[name] = [str(datetime.datetime.fromisoformat(updated_at)), int(record_id)]
+        positions["tombstones"] = int(positions["tombstones"])
+    except (binascii.Error, ValueError, TypeError, KeyError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid sync token.")
+    return positions
+
+def changed(model, columns, position, settled, limit):
+    """
+    Read the rows of a table changed after a position.
+
+    Served by a range scan of the ``(updated_at, id)`` index from the
+    position's ``updated_at``, so the cost follows the number of changes.
+
+    Args:
+        model (Type[Model]): The model of the table.
+        columns (List[str]): The columns to return.
+        position (list, optional): The ``[updated_at, id]`` of the last row already synced.
+        settled (str): The newest ``updated_at`` to return.
+        limit (int): Maximum number of rows to return.
+
+    Returns:
+        List[dict]: Up to ``limit + 1`` rows, ordered by ``updated_at`` and ``id``.
+    """
+    query = model.select(*columns, "updated_at").where("updated_at", "<=", settled)
+    if position is not None:
+        updated_at, record_id = position
+        query = query.where("updated_at", ">=", updated_at).where(
+            lambda builder: builder.where("updated_at", ">", updated_at).or_where("id", ">", record_id))
+    return Pagination.fetch(query.order_by("updated_at").order_by("id").limit(limit + 1))
+
+@reads
+def changes(token=None, limit=Pagination.DEFAULT_LIMIT):
+    """
+    Fetch the rows created, changed or deleted since a sync token.
+
+    Without a token every row is returned, a page at a time, and deletions
+    start from now. Each table returns at most ``limit`` rows per call;
+    while ``more`` is true the client calls again with the new token.
+
+    Args:
+        token (str, optional): The token returned by the previous sync.
+        limit (int): Maximum number of rows to return per table.
+
+    Returns:
+        dict: The changed rows of each table, the deleted IDs of each table
+        under ``deleted``, the next ``token`` and ``more``.
+
+    Raises:
+        HTTPException: If the token is invalid or the limit is out of range.
+    """
+    if not 0 < limit <= Pagination.MAX_LIMIT:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and %d." % Pagination.MAX_LIMIT)
+    positions = decodeToken(token) if token else {}
+    settled = str(datetime.datetime.utcnow().replace(microsecond=0) - datetime.timedelta(seconds=SYNC["settle_seconds"]))
+    result = {"deleted": {}, "more": False}
+    if not token:
+        newest = Tombstone.select("id").order_by("id", "desc").first()
+        positions["tombstones"] = newest.id if newest else 0
+    else:
+        tombstones = Pagination.fetch(Tombstone.select("id", "table_name", "record_id").where("id", ">", positions["tombstones"]).order_by("id").limit(limit + 1))
+        result["more"] = len(tombstones) > limit
+        names = {table: name for name, (model, table, columns) in TABLES.items()}
+        for tombstone in tombstones[:limit]:
+            result["deleted"].setdefault(names.get(tombstone["table_name"], tombstone["table_name"]), []).append(tombstone["record_id"])
+            positions["tombstones"] = tombstone["id"]
+    for name, (model, table, columns) in TABLES.items():
+        rows = changed(model, columns, positions.get(name), settled, limit)
+        if len(rows) > limit:
+            rows = rows[:limit]
+            result["more"] = True
+        if rows:
+            positions[name] = [str(rows[-1]["updated_at"]), rows[-1]["id"]]
+        result[name] = rows
+    result["token"] = encodeToken(positions)
+    return result
@@ -1,27 +1,206 @@
 import pytz
-from geopy.geocoders import Nominatim
-from timezonefinder import TimezoneFinder
+from functools import lru_cache
 import datetime
+from config.timezones import TIMEZONES
+from .Executor import offload
+from .Metrics import timed
 
-def getTimeZone(city):
+ZIPCODES = {str(zipcode).strip(): zone for zipcode, zone in TIMEZONES["zipcodes"].items()}
+CITIES = {key.strip().lower(): zone for key, zone in TIMEZONES["cities"].items()}
+ABBREVIATIONS = {key.lower(): abbreviation.lower() for abbreviation, (name, zone) in TIMEZONES["states"].items() for key in (abbreviation, name)}
+SPLIT_STATES = {abbreviation.lower() for abbreviation in TIMEZONES["split_states"]}
+STATES = {abbreviation.lower(): zone for abbreviation, (name, zone) in TIMEZONES["states"].items() if abbreviation.lower() not in SPLIT_STATES}
+
+@lru_cache(maxsize=None)
+def getTimezoneFinder():
+    """
+    Get the process-wide TimezoneFinder instance.
+
+    timezonefinder and numpy are imported here, as they are only needed
+    once the remote geocoder has been used.
+
+    Returns:
+        TimezoneFinder: The shared finder, created on first use.
+    """
+    from timezonefinder import TimezoneFinder
+    return TimezoneFinder(in_memory=TIMEZONES["finder"]["in_memory"])
+
+@lru_cache(maxsize=None)
+def getGeocoder():
+    """
+    Get the process-wide Nominatim geocoder.
+
+    Returns:
+        Nominatim: The shared geocoder, created on first use.
+    """
+    from geopy.geocoders import Nominatim
+    return Nominatim(user_agent=TIMEZONES["geocoder"]["user_agent"], timeout=TIMEZONES["geocoder"]["timeout"])
+
+def normalizeLocation(city, state):
+    """
+    Normalize a city and state into the "city, state" lookup key.
+
+    Args:
+        city (str): Name of the city.
+        state (str): Name or abbreviation of the state.
+
+    Returns:
+        str: The lower-cased "city, state" key, with the state abbreviated
+        when it is a known state name.
+    """
+    state = " ".join(state.split()).lower()
+    return " ".join(city.split()).lower() + ", " + ABBREVIATIONS.get(state, state)
+
+def getTimeZone(city, state, zipcode=None):
     """
-    Get the timezone of a given city.
+    Get the timezone of a given location from the offline table.
 
     Args:
         city (str): Name of the city.
+        state (str): Name or abbreviation of the state.
+        zipcode (str, optional): Zipcode of the location.
+
+    Returns:
+        str: The timezone name of the location.
+
+    Raises:
+        ValueError: If the location is not in the offline table.
+    """
+    zipcode = str(zipcode or "").strip()
+    for prefix in (zipcode, zipcode[:3]):
+        if prefix in ZIPCODES:
+            return ZIPCODES[prefix]
+    key = normalizeLocation(city, state)
+    zone = lookupTimeZone(key)
+    if not zone:
+        raise ValueError("Timezone for " + key + " is not in the offline table.")
+    return zone
+
+async def findTimeZones(locations):
+    """
+    Get the timezones of several locations.
+
+    The offline table is consulted first; the remote geocoder is only used as
+    a fallback when enabled in ``config.timezones``, once per location and
+    one location at a time, in the geocoder pool of ``config.executors``
+    with a timeout. Route handlers await this before their database work.
+
+    Args:
+        locations (List[tuple]): The ``(city, state, zipcode)`` of each location.
+
+    Returns:
+        List[str]: The timezone name of each location, or None where it
+        cannot be determined.
+    """
+    zones = {}
+    for location in dict.fromkeys(locations):
+        try:
+            zones[location] = getTimeZone(*location)
+        except ValueError:
+            if not TIMEZONES["geocoder"]["enabled"]:
+                continue
+            try:
+                zones[location] = await offload(geocodeTimeZone, normalizeLocation(*location[:2]))
+            except ValueError:
+                continue
+    return [zones.get(location) for location in locations]
+
+def lookupTimeZone(key):
+    """
+    Look up a normalized "city, state" key in the offline table.
+
+    States spanning several zones only resolve through their city entries.
+
+    Args:
+        key (str): The normalized location key.
+
+    Returns:
+        str: The timezone name, or None if the location is unknown.
+    """
+    if key in CITIES:
+        return CITIES[key]
+    return STATES.get(key.rsplit(", ", 1)[-1])
+
+@lru_cache(maxsize=TIMEZONES["cache_size"])
+def geocodeTimeZone(key):
+    """
+    Resolve a normalized "city, state" key through the remote geocoder.
+
+    Results are kept in a bounded LRU cache; failures are not cached.
+
+    Args:
+        key (str): The normalized location key.
 
     Returns:
-        str: The timezone name of the city.
+        str: The timezone name of the location.
 
     Raises:
-        ValueError: If the city's coordinates cannot be determined.
+        ValueError: If the location's coordinates cannot be determined.
     """
-    geolocator = Nominatim(user_agent="Any Name")
-    tf = TimezoneFinder()
-    cords = geolocator.geocode(city)
-    timezone = tf.timezone_at(lng = cords.longitude, lat= cords.latitude)
+    from geopy.exc import GeopyError
+    try:
+        cords = geocode(key)
+    except GeopyError as e:
+        raise ValueError("Geocoding " + key + " failed: " + str(e))
+    if not cords:
+        raise ValueError("Coordinates for " + key + " could not be determined.")
+    timezone = getTimezoneFinder().timezone_at(lng = cords.longitude, lat= cords.latitude)
+    if not timezone:
+        raise ValueError("Timezone for " + key + " could not be determined.")
     return timezone
 
+@timed("geocode")
+def geocode(key):
+    return getGeocoder().geocode(key)
+
+@lru_cache(maxsize=None)
+def getZone(name):
+    """
+    Get the tzinfo object for a timezone name.
+
+    Args:
+        name (str): The timezone name.
+
+    Returns:
+        tzinfo: The cached pytz timezone.
+
+    Raises:
+        UnknownTimeZoneError: If the timezone cannot be determined.
+    """
+    return pytz.timezone(name)
+
+@timed("tz")
+def toUTC(time, zone):
+    """
+    Convert a local time into a UTC timestamp.
+
+    Args:
+        time (datetime): The naive time in the given timezone.
+        zone (str): Timezone name of the time.
+
+    Returns:
+        str: The UTC time in the format "yyyy-mm-dd HH:MM:SS".
+    """
+    return getZone(zone).localize(time).astimezone(pytz.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+@timed("tz")
+def fromUTC(instants, zone, format="%d/%m/%Y,%H:%M"):
+    """
+    Convert a list of UTC timestamps into one timezone.
+
+    Args:
+        instants (List[str]): UTC times in the format "yyyy-mm-dd HH:MM:SS".
+        zone (str): Timezone name to convert into.
+        format (str): strftime format of the results; "dd/mm/yyyy,HH:MM" by default,
+            the format dates are read in.
+
+    Returns:
+        List[str]: The converted times.
+    """
+    tz = getZone(zone)
+    return [datetime.datetime.fromisoformat(str(instant)).replace(tzinfo=pytz.utc).astimezone(tz).strftime(format) for instant in instants]
+
+@timed("tz")
 def convertTime(prev_city, next_city, time):
     """
     Convert the time from one city's timezone to another.
@@ -32,20 +211,14 @@ def convertTime(prev_city, next_city, time):
         time (datetime): The time in the starting city's timezone.
 
     Returns:
-        str: The converted time in the format "dd/mm/yy,HH:MM".
+        str: The converted time in the format "dd/mm/yyyy,HH:MM".
 
     Raises:
         UnknownTimeZoneError: If either of the timezones cannot be determined.
     """
-    old_time = time
-    prev_city_timeZone = prev_city
-    next_city_timeZone = next_city
-    tz = pytz.timezone(prev_city_timeZone)
-    old_time = tz.localize(old_time)
-    next_timezone = pytz.timezone(next_city_timeZone)
-    next_tz_time = old_time.astimezone(next_timezone)
-    print(next_tz_time.strftime("%M"))
-    return next_tz_time.strftime("%d/%m/%y,%H:%M")
+    old_time = getZone(prev_city).localize(time)
+    next_tz_time = old_time.astimezone(getZone(next_city))
+    return next_tz_time.strftime("%d/%m/%Y,%H:%M")
 
 def getTime(date, time):
     """
@@ -65,3 +238,18 @@ def getTime(date, time):
     time = list(map(int, time.split(":")))
     obj = datetime.datetime(date[2], date[1], date[0], time[0], time[1])
     return obj
+
+def getDate(date):
+    """
+    Parse a date string.
+
+    Args:
+        date (str): The date in "dd/mm/yyyy" format.
+
+    Returns:
+        date: The parsed date.
+
+    Raises:
+        ValueError: If the date is invalid.
+    """
+    return datetime.datetime.strptime(date.strip(), "%d/%m/%Y").date()
@@ -1,26 +1,101 @@
 from fastapi import HTTPException
 from models.User import User
 from models.Meeting import Meeting as Meetings
+from models.Participant import Participant
 from crud.Meeting import *
+from crud import Pagination
+from crud import Bulk
+from crud import Cache
+from crud import Outbox
+from config.database import DB
+from config.pool import reads
+from crud.FreeBusy import chunks
+from typing import Dict, List, Optional
 import schema
-from datetime import datetime
 from .Timezone import *
-def get_all():
-    users = User.all()
-    return users.all()
-
-def add(user_data: schema.UserBase):
-    user = User.where("email", user_data.email).get()
-    if user:
-        return HTTPException(status_code=400, detail="User already exists")
+@reads
+def get_all(cursor=None, limit=Pagination.DEFAULT_LIMIT, fields=None, **filters):
+    return Pagination.paginate(User, schema.UserResult, cursor, limit, fields, filters)
+
+def checkEmail(email: str):
+    """
+    Check that no user has an email yet, before its password is hashed.
+
+    Args:
+        email (str): The email of the new user.
+
+    Raises:
+        HTTPException: If a user already has the email.
+    """
+    if User.select("id").where("email", email).first():
+        raise HTTPException(status_code=400, detail="User already exists")
+
+def newEmails(users_data: List[schema.UserBase]):
+    """
+    Find the users of a bulk request that can be added, before their
+    passwords are hashed.
+
+    Args:
+        users_data (List[schema.UserBase]): The users of the request.
+
+    Returns:
+        List[int]: The indexes of the first user with each email no user has yet.
+    """
+    emails = list({user_data.email for user_data in users_data})
+    taken = {user.email for part in chunks(emails) for user in User.select("email").where_in("email", part).get()}
+    indexes = []
+    for index, user_data in enumerate(users_data):
+        if user_data.email not in taken:
+            taken.add(user_data.email)
+            indexes.append(index)
+    return indexes
+
+def add(user_data: schema.UserBase, password: str, zone: Optional[str] = None):
+    checkEmail(user_data.email)
     user = User()
     for attr in vars(user_data).keys():
         setattr(user, attr,getattr(user_data, attr))
-    user.timezone = getTimeZone(user_data.city + ", " + user_data.state)
-    user.password = str(hash(user.password))
-    user.save()
+    if zone is None and user_data.timezone not in pytz.all_timezones_set:
+        raise HTTPException(status_code=400, detail="Unable to determine timezone")
+    user.timezone = zone or user_data.timezone
+    user.password = password
+    with DB.transaction():
+        user = user.save()
+        events = [Outbox.event(user.id, "user.created", user.id, {"id": user.id, "email": user.email})]
+        Outbox.add(events)
+    Outbox.publish(events)
+    Cache.invalidate(Cache.key("user", user.id), Cache.key("user_meetings", user.id))
     return user
 
+def add_many(users_data: List[schema.UserBase], passwords: Dict[int, str], zones: Dict[int, Optional[str]]):
+    Bulk.validate(users_data)
+    emails = list({user_data.email for user_data in users_data})
+    taken = {user.email for part in chunks(emails) for user in User.select("email").where_in("email", part).get()}
+    errors = {}
+    records = {}
+    for index, user_data in enumerate(users_data):
+        if index not in passwords or user_data.email in taken:
+            errors[index] = "User already exists"
+            continue
+        if zones.get(index) is None and user_data.timezone not in pytz.all_timezones_set:
+            errors[index] = "Unable to determine timezone"
+            continue
+        record = dict(vars(user_data), timezone=zones.get(index) or user_data.timezone)
+        record["password"] = passwords[index]
+        taken.add(user_data.email)
+        records[index] = record
+    created = [record["email"] for record in records.values()]
+    with DB.transaction():
+        Bulk.write(User, list(records.values()))
+        by_email = {user.email: user.id for part in chunks(created) for user in User.select("id", "email").where_in("email", part).get()}
+        events = [Outbox.event(user_id, "user.created", user_id, {"id": user_id, "email": email}) for email, user_id in by_email.items()]
+        Outbox.add(events)
+    Outbox.publish(events)
+    ids = {index: by_email.get(record["email"]) for index, record in records.items()}
+    Cache.invalidate(*[Cache.key(resource, user_id) for user_id in ids.values() if user_id for resource in ("user", "user_meetings")])
+    return Bulk.results(len(users_data), errors, ids)
+
+@reads
 def get(user_id: int):
     user = User.find(user_id)
     if not user:
@@ -33,25 +108,25 @@ def get_by_email(email: str):
         raise HTTPException(status_code=400, detail="User not Found")
     return user
 
-def getMeetingInfo(user_id: str):
+def credentials(email: str):
+    return User.select("id", "email", "password").where("email", email).first()
+
+def setPassword(user_id: int, password: str):
+    User.where("id", user_id).update({"password": password})
+    Cache.invalidate(Cache.key("user", user_id))
+
+@reads
+def getMeetingInfo(user_id: str, start=None, end=None):
     user = User.find(user_id)
     if not user:
         raise HTTPException(status_code=400, detail="User not Found")
-    meetings = Meetings.where("organizer", user.email).get().all()
-    data = {'name': user.name, 'email':user.email, 'gender': user.gender,'city': user.city, 'state': user.state, 'timezone': user.timezone}
-    hosted_list = []
-    for meeting in meetings:
-        hosted_list.append(getMeetingWithParticipants(meeting.id))
-    data ['hosted'] = hosted_list
-    participated_list = []
-    participated = Participant.where("participant_id", user.id).get().all()
-    for part in participated:
-        meeting = getMeetingWithParticipants(part.meeting_id)
-        organizer = User.where("email", meeting.organizer).get().all()[0]
-        time = getTime(meeting.date, meeting.time)
-        newTime = convertTime(organizer.timezone, user.timezone, time)
-        meeting.time = newTime.split(",")[1]
-        meeting.date = newTime.split(",")[0]
-        participated_list.append(meeting)
-    data ['participated'] = participated_list
-    return data
\ No newline at end of file
+    data = {'first_name': user.first_name, 'email':user.email, 'gender': user.gender,'city': user.city, 'state': user.state, 'timezone': user.timezone}
+    hosted = Meetings.with_("participants").where("organizer", user.email).get()
+    data ['hosted'] = withOccurrences(hosted, withParticipants(hosted), start=start, end=end)
+    participated_ids = [part.meeting_id for part in Participant.where("participant_id", user.id).get()]
+    if not participated_ids:
+        data ['participated'] = []
+        return data
+    meetings = Meetings.with_("participants").where_in("id", participated_ids).get()
+    data ['participated'] = withOccurrences(meetings, withParticipants(meetings), user.timezone, start, end)
+    return data
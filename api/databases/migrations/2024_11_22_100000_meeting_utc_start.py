@@ -0,0 +1,32 @@
+"""MeetingUtcStart Migration."""
+
+from masoniteorm.migrations import Migration
+from models.Meeting import Meeting
+from models.User import User
+from crud.Timezone import getTime, toUTC
+
+
+class MeetingUtcStart(Migration):
+    def up(self):
+        """
+        Run the migrations.
+        """
+        with self.schema.table("meetings") as table:
+            table.datetime("starts_at").nullable()
+            table.string("timezone").nullable()
+
+        zones = {user.email: user.timezone for user in User.select("email", "timezone").get()}
+        for meeting in Meeting.select("id", "date", "time", "organizer").get():
+            zone = zones.get(meeting.organizer, "UTC")
+            Meeting.where("id", meeting.id).update({
+                "timezone": zone,
+                "starts_at": toUTC(getTime(meeting.date, meeting.time), zone),
+            })
+
+    def down(self):
+        """
+        Revert the migrations.
+        """
+        with self.schema.table("meetings") as table:
+            table.drop_column("starts_at")
+            table.drop_column("timezone")
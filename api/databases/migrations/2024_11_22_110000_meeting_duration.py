@@ -0,0 +1,19 @@
+"""MeetingDuration Migration."""
+
+from masoniteorm.migrations import Migration
+
+
+class MeetingDuration(Migration):
+    def up(self):
+        """
+        Run the migrations.
+        """
+        with self.schema.table("meetings") as table:
+            table.integer("duration").default(60)
+
+    def down(self):
+        """
+        Revert the migrations.
+        """
+        with self.schema.table("meetings") as table:
+            table.drop_column("duration")
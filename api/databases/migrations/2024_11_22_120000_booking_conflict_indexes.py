@@ -0,0 +1,45 @@
+"""BookingConflictIndexes Migration."""
+
+from masoniteorm.migrations import Migration
+from models.Meeting import Meeting
+from models.Participant import Participant
+from datetime import datetime, timedelta
+
+
+class BookingConflictIndexes(Migration):
+    def up(self):
+        """
+        Run the migrations.
+        """
+        with self.schema.table("meetings") as table:
+            table.datetime("ends_at").nullable()
+            table.index(["organizer", "starts_at"], name="meetings_organizer_starts_at_index")
+
+        with self.schema.table("participants") as table:
+            table.datetime("starts_at").nullable()
+            table.datetime("ends_at").nullable()
+            table.index(["participant_id", "starts_at"], name="participants_participant_id_starts_at_index")
+
+        with self.schema.table("availabilitys") as table:
+            table.index(["user_id", "start_date", "end_date"], name="availabilitys_user_id_start_date_end_date_index")
+
+        for meeting in Meeting.select("id", "starts_at", "duration").get():
+            ends_at = str(datetime.fromisoformat(str(meeting.starts_at)) + timedelta(minutes=meeting.duration))
+            Meeting.where("id", meeting.id).update({"ends_at": ends_at})
+            Participant.where("meeting_id", meeting.id).update({"starts_at": str(meeting.starts_at), "ends_at": ends_at})
+
+    def down(self):
+        """
+        Revert the migrations.
+        """
+        with self.schema.table("availabilitys") as table:
+            table.drop_index("availabilitys_user_id_start_date_end_date_index")
+
+        with self.schema.table("participants") as table:
+            table.drop_index("participants_participant_id_starts_at_index")
+            table.drop_column("starts_at")
+            table.drop_column("ends_at")
+
+        with self.schema.table("meetings") as table:
+            table.drop_index("meetings_organizer_starts_at_index")
+            table.drop_column("ends_at")
@@ -0,0 +1,48 @@
+"""ParticipantIntegerKeys Migration."""
+
+from masoniteorm.migrations import Migration
+
+
+class ParticipantIntegerKeys(Migration):
+    def up(self):
+        """
+        Run the migrations.
+        """
+        self.rebuild("integer", "INTEGER")
+        with self.schema.table("participants") as table:
+            table.index(["participant_id", "starts_at"], name="participants_participant_id_starts_at_index")
+            table.index(["meeting_id", "participant_id"], name="participants_meeting_id_participant_id_index")
+
+    def down(self):
+        """
+        Revert the migrations.
+        """
+        self.rebuild("string", "VARCHAR(255)")
+        with self.schema.table("participants") as table:
+            table.index(["participant_id", "starts_at"], name="participants_participant_id_starts_at_index")
+
+    def rebuild(self, column_type, cast):
+        """
+        Copy participants into a table whose key columns have a new type.
+
+        A new table is created and renamed instead of changing the columns in
+        place, because changing a column on SQLite rebuilds the table without
+        its primary key and indexes.
+        """
+        with self.schema.create("participants_rebuild") as table:
+            table.increments("id")
+            getattr(table, column_type)("participant_id")
+            table.foreign("participant_id").references("id").on("users")
+            getattr(table, column_type)("meeting_id")
+            table.foreign("meeting_id").references("id").on("meetings")
+            table.timestamps()
+            table.datetime("starts_at").nullable()
+            table.datetime("ends_at").nullable()
+
+        columns = "id, participant_id, meeting_id, created_at, updated_at, starts_at, ends_at"
+        self.schema.new_connection().query(
+            "INSERT INTO participants_rebuild (" + columns + ") "
+            "SELECT id, CAST(participant_id AS " + cast + "), CAST(meeting_id AS " + cast + "), created_at, updated_at, starts_at, ends_at FROM participants"
+        )
+        self.schema.drop("participants")
+        self.schema.rename("participants_rebuild", "participants")
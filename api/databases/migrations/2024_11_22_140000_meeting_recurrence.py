@@ -0,0 +1,21 @@
+"""MeetingRecurrence Migration."""
+
+from masoniteorm.migrations import Migration
+
+
+class MeetingRecurrence(Migration):
+    def up(self):
+        """
+        Run the migrations.
+        """
+        with self.schema.table("meetings") as table:
+            table.string("recurrence").nullable()
+            table.datetime("series_ends_at").nullable()
+
+    def down(self):
+        """
+        Revert the migrations.
+        """
+        with self.schema.table("meetings") as table:
+            table.drop_column("recurrence")
+            table.drop_column("series_ends_at")
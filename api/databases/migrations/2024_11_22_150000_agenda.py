@@ -0,0 +1,48 @@
+"""Agenda Migration."""
+
+from masoniteorm.migrations import Migration
+
+COLUMNS = "user_id, meeting_id, role, title, organizer, duration, timezone, recurrence, starts_at, ends_at, created_at, updated_at"
+MEETING_COLUMNS = ("meetings.id, %s, meetings.title, meetings.organizer, meetings.duration, meetings.timezone, meetings.recurrence, "
+    "meetings.starts_at, CASE WHEN meetings.recurrence IS NULL THEN meetings.ends_at ELSE meetings.series_ends_at END")
+
+
+class Agenda(Migration):
+    def up(self):
+        """
+        Run the migrations.
+        """
+        with self.schema.create("agenda") as table:
+            table.increments("id")
+            table.integer("user_id")
+            table.foreign("user_id").references("id").on("users")
+            table.integer("meeting_id")
+            table.foreign("meeting_id").references("id").on("meetings")
+            table.string("role")
+            table.string("title")
+            table.string("organizer")
+            table.integer("duration")
+            table.string("timezone").nullable()
+            table.string("recurrence").nullable()
+            table.datetime("starts_at")
+            table.datetime("ends_at").nullable()
+            table.timestamps()
+            table.index(["user_id", "starts_at"], name="agenda_user_id_starts_at_index")
+            table.index(["meeting_id"], name="agenda_meeting_id_index")
+
+        self.schema.new_connection().query(
+            "INSERT INTO agenda (" + COLUMNS + ") "
+            "SELECT users.id, " + MEETING_COLUMNS % "'host'" + ", meetings.created_at, meetings.updated_at "
+            "FROM meetings INNER JOIN users ON users.email = meetings.organizer"
+        )
+        self.schema.new_connection().query(
+            "INSERT INTO agenda (" + COLUMNS + ") "
+            "SELECT participants.participant_id, " + MEETING_COLUMNS % "'participant'" + ", participants.created_at, participants.updated_at "
+            "FROM participants INNER JOIN meetings ON meetings.id = participants.meeting_id"
+        )
+
+    def down(self):
+        """
+        Revert the migrations.
+        """
+        self.schema.drop("agenda")
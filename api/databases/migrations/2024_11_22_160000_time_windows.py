@@ -0,0 +1,41 @@
+"""TimeWindows Migration."""
+
+from masoniteorm.migrations import Migration
+from models.Availability import Availability
+from datetime import datetime
+
+
+class TimeWindows(Migration):
+    def up(self):
+        """
+        Run the migrations.
+        """
+        with self.schema.table("availabilitys") as table:
+            table.date("starts_on").nullable()
+            table.date("ends_on").nullable()
+            table.index(["user_id", "ends_on"], name="availabilitys_user_id_ends_on_index")
+            table.index(["ends_on"], name="availabilitys_ends_on_index")
+
+        with self.schema.table("meetings") as table:
+            table.index(["starts_at"], name="meetings_starts_at_index")
+
+        for leave in Availability.select("id", "start_date", "end_date").get():
+            try:
+                days = {"starts_on": str(datetime.strptime(leave.start_date.strip(), "%d/%m/%Y").date()),
+                    "ends_on": str(datetime.strptime(leave.end_date.strip(), "%d/%m/%Y").date())}
+            except ValueError:
+                continue
+            Availability.where("id", leave.id).update(days)
+
+    def down(self):
+        """
+        Revert the migrations.
+        """
+        with self.schema.table("meetings") as table:
+            table.drop_index("meetings_starts_at_index")
+
+        with self.schema.table("availabilitys") as table:
+            table.drop_index("availabilitys_ends_on_index")
+            table.drop_index("availabilitys_user_id_ends_on_index")
+            table.drop_column("starts_on")
+            table.drop_column("ends_on")
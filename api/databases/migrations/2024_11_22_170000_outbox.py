@@ -0,0 +1,26 @@
+"""Outbox Migration."""
+
+from masoniteorm.migrations import Migration
+
+
+class Outbox(Migration):
+    def up(self):
+        """
+        Run the migrations.
+        """
+        with self.schema.create("outbox") as table:
+            table.increments("id")
+            table.integer("user_id")
+            table.foreign("user_id").references("id").on("users")
+            table.string("kind")
+            table.integer("entity_id").nullable()
+            table.text("payload")
+            table.timestamps()
+            table.index(["user_id", "id"], name="outbox_user_id_id_index")
+            table.index(["created_at"], name="outbox_created_at_index")
+
+    def down(self):
+        """
+        Revert the migrations.
+        """
+        self.schema.drop("outbox")
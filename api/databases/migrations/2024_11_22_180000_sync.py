@@ -0,0 +1,50 @@
+"""Sync Migration."""
+
+from masoniteorm.migrations import Migration
+from config.database import DATABASES
+
+TABLES = ("users", "meetings", "participants", "availabilitys")
+
+# A trigger per table records the ID of every deleted row, whatever deletes it.
+TRIGGERS = {
+    "sqlite": ["CREATE TRIGGER {table}_tombstone AFTER DELETE ON {table} BEGIN "
+        "INSERT INTO tombstones (table_name, record_id, deleted_at) VALUES ('{table}', OLD.id, CURRENT_TIMESTAMP); END"],
+    "mysql": ["CREATE TRIGGER {table}_tombstone AFTER DELETE ON {table} FOR EACH ROW "
+        "INSERT INTO tombstones (table_name, record_id, deleted_at) VALUES ('{table}', OLD.id, CURRENT_TIMESTAMP)"],
+    "postgres": ["CREATE OR REPLACE FUNCTION record_tombstone() RETURNS trigger AS $$ BEGIN "
+        "INSERT INTO tombstones (table_name, record_id, deleted_at) VALUES (TG_TABLE_NAME, OLD.id, CURRENT_TIMESTAMP); RETURN OLD; END $$ LANGUAGE plpgsql",
+        "CREATE TRIGGER {table}_tombstone AFTER DELETE ON {table} FOR EACH ROW EXECUTE FUNCTION record_tombstone()"],
+}
+
+
+class Sync(Migration):
+    def dialect(self):
+        connection = DATABASES["default"] if self.connection == "default" else self.connection
+        return next(name for name in TRIGGERS if name in DATABASES[connection]["driver"])
+
+    def up(self):
+        """
+        Run the migrations.
+        """
+        with self.schema.create("tombstones") as table:
+            table.increments("id")
+            table.string("table_name")
+            table.integer("record_id")
+            table.datetime("deleted_at")
+
+        for name in TABLES:
+            self.schema.new_connection().query("UPDATE %s SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL" % name)
+            with self.schema.table(name) as table:
+                table.index(["updated_at", "id"], name="%s_updated_at_id_index" % name)
+            for statement in TRIGGERS[self.dialect()]:
+                self.schema.new_connection().query(statement.format(table=name))
+
+    def down(self):
+        """
+        Revert the migrations.
+        """
+        for name in TABLES:
+            self.schema.new_connection().query("DROP TRIGGER IF EXISTS %s_tombstone%s" % (name, " ON " + name if self.dialect() == "postgres" else ""))
+            with self.schema.table(name) as table:
+                table.drop_index("%s_updated_at_id_index" % name)
+        self.schema.drop("tombstones")
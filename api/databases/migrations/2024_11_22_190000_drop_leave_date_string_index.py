@@ -0,0 +1,19 @@
+"""DropLeaveDateStringIndex Migration."""
+
+from masoniteorm.migrations import Migration
+
+
+class DropLeaveDateStringIndex(Migration):
+    def up(self):
+        """
+        Run the migrations.
+        """
+        with self.schema.table("availabilitys") as table:
+            table.drop_index("availabilitys_user_id_start_date_end_date_index")
+
+    def down(self):
+        """
+        Revert the migrations.
+        """
+        with self.schema.table("availabilitys") as table:
+            table.index(["user_id", "start_date", "end_date"], name="availabilitys_user_id_start_date_end_date_index")
@@ -0,0 +1,64 @@
+"""
+Gunicorn settings of the production server.
+
+Run from the api directory, where Gunicorn finds this file:
+
+    gunicorn main:app
+    API_WORKERS=8 gunicorn main:app
+
+Settings come from config/server.py. See there for preloading and what the
+workers share.
+"""
+
+import gc
+import os
+import tempfile
+from config.cache import CACHE
+from config.metrics import METRICS
+from config.server import SERVER
+
+bind = SERVER["bind"]
+workers = SERVER["workers"]
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = SERVER["preload"]
+timeout = SERVER["timeout"]
+graceful_timeout = SERVER["graceful_timeout"]
+keepalive = SERVER["keepalive"]
+
+# The workers are forked from this process, so they inherit the lower TTL.
+shared_memory_cache = workers > 1 and CACHE["backend"] == "memory"
+if shared_memory_cache:
+    CACHE["ttl"] = CACHE["memory"]["multi_worker_ttl"]
+
+# Each worker flushes its metrics to this directory for GET /metrics to sum.
+if workers > 1 and not METRICS["multiprocess_dir"]:
+    METRICS["multiprocess_dir"] = tempfile.mkdtemp(prefix="api-metrics-")
+
+def on_starting(server):
+    """
+    Remove the metrics files of a previous run from API_METRICS_DIR, so its
+    totals are not added to this one's.
+    """
+    directory = METRICS["multiprocess_dir"]
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith((".json", ".tmp")):
+                os.remove(os.path.join(directory, name))
+
+def when_ready(server):
+    """
+    Warm the preloaded app in the master, before the workers are forked,
+    and warn when the workers cannot share the response cache.
+
+    ``gc.freeze`` then moves every object made so far out of the collector's
+    reach, so collections in the workers do not write to, and copy, the
+    shared pages.
+    """
+    if shared_memory_cache:
+        server.log.warning("Each of the %d workers has its own memory cache, so cached responses expire after %d s instead of being invalidated "
+            "by writes in other workers; set API_CACHE_BACKEND=redis to share the cache.", workers, CACHE["ttl"])
+    if preload_app:
+        from crud import Startup
+        Startup.warm()
+        gc.freeze()
@@ -1,14 +1,88 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import RedirectResponse
-from typing import List
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
+from typing import List, Optional
 import schema
 
 from crud import User as Users
 from crud import Leave as Leaves
 from crud import Participant as Participants
 from crud import Meeting as Meetings
+from crud import FreeBusy
+from crud import Slots
+from crud import Export
+from crud import Cache
+from crud import Encoder
+from crud import Metrics
+from crud import Bulk
+from crud import Passwords
+from crud import Outbox
+from crud import Sync
+from crud import Startup
+from crud import Timezone
+from crud.Pagination import DEFAULT_LIMIT, window
+from crud.Executor import run
+from config.pool import poolStats
+from config.metrics import METRICS
 
-app = FastAPI()
+class FastJSONResponse(JSONResponse):
+    """
+    A JSON response encoded with ``crud.Encoder``.
+
+    It is the default response class, so every body is encoded by it after
+    FastAPI's ``response_model`` validation. Returning it from a route skips
+    that validation and the ``jsonable_encoder`` pass, so routes only do so
+    for rows read straight from the database and for bodies that were
+    validated when cached.
+    """
+
+    def render(self, content):
+        return Encoder.dumps(content)
+
+app = FastAPI(default_response_class=FastJSONResponse)
+
+if METRICS["enabled"]:
+    Metrics.instrument()
+    app.add_middleware(Metrics.Middleware)
+
+def page(result):
+    """
+    Return the rows of a page and expose its next cursor as a header.
+
+    Args:
+        result (tuple): The rows and the next cursor, as returned by ``crud.Pagination.paginate``.
+
+    Returns:
+        FastJSONResponse: The rows of the page.
+    """
+    rows, cursor = result
+    headers = {"X-Next-Cursor": str(cursor)} if cursor is not None else None
+    return FastJSONResponse(rows, headers=headers)
+
+async def cached(request: Request, cache_key: str, build):
+    """
+    Serve a response through the cache, answering 304 when the client's copy is current.
+
+    Args:
+        request (Request): The incoming request.
+        cache_key (str): The cache key of the response.
+        build (Callable): Builds the response on a cache miss.
+
+    Returns:
+        Response: The JSON body with its ETag, or an empty 304.
+    """
+    etag, body = await run(Cache.read, cache_key, build)
+    tags = [tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")]
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers={"ETag": etag})
+    return FastJSONResponse(body, headers={"ETag": etag})
+
+@app.on_event("startup")
+async def startup():
+    await Startup.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    Startup.stop()
 
 # Redirect root URL to documentation
 @app.get("/")
@@ -23,31 +97,47 @@ async def docs_redirect():
     return response
 
 # User Routes
-@app.get("/users/", response_model=List[schema.UserResult])
-def get_all_users():
+@app.get("/users/")
+async def get_all_users(cursor: Optional[int] = None, limit: int = DEFAULT_LIMIT, fields: Optional[str] = None,
+                  email: Optional[str] = None, city: Optional[str] = None, state: Optional[str] = None, zipcode: Optional[str] = None, timezone: Optional[str] = None):
     """
-    Fetch all users.
+    Fetch a page of users, ordered by ID.
+
+    Args:
+        cursor (int, optional): The last ID of the previous page.
+        limit (int): Maximum number of records to return.
+        fields (str, optional): Comma separated fields to return, e.g. ``id,email``.
+        email, city, state, zipcode, timezone (str, optional): Values the users must match.
 
     Returns:
-        List[schema.UserResult]: List of user objects.
+        List[dict]: User objects; the next cursor is sent in the ``X-Next-Cursor`` header.
     """
-    return Users.get_all()
+    return page(await run(Users.get_all, cursor, limit, fields, email=email, city=city, state=state, zipcode=zipcode, timezone=timezone))
 
-@app.post("/users/")
-def add_user(user_data: schema.UserBase):
+@app.post("/users/", response_model=schema.UserResult)
+async def add_user(user_data: schema.UserBase):
     """
     Add a new user.
 
+    The email is checked before the password is hashed, so a signup with a
+    taken email does not cost a hash.
+
     Args:
         user_data (schema.UserBase): Data for the new user.
 
     Returns:
-        User: The newly created user object.
+        schema.UserResult: The newly created user, without the password.
+
+    Raises:
+        HTTPException: If a user already has the email or the timezone is unknown.
     """
-    return Users.add(user_data)
+    await run(Users.checkEmail, user_data.email)
+    zone, = await Timezone.findTimeZones([(user_data.city, user_data.state, user_data.zipcode)])
+    user = await run(Users.add, user_data, await Passwords.make(user_data.password), zone)
+    return schema.UserResult.from_orm(user)
 
 @app.get("/users/{user_id}", response_model=schema.UserResult)
-def get_single_user(user_id: int):
+async def get_single_user(request: Request, user_id: int):
     """
     Fetch a single user by ID.
 
@@ -55,18 +145,15 @@ def get_single_user(user_id: int):
         user_id (int): ID of the user.
 
     Returns:
-        schema.UserResult: User object.
+        schema.UserResult: User object, with an ETag for conditional requests.
 
     Raises:
         HTTPException: If the user is not found.
     """
-    user = Users.get(user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return await cached(request, Cache.key("user", user_id), lambda: schema.UserResult.from_orm(Users.get(user_id)))
 
 @app.get("/users/{user_id}/meetings", response_model=schema.UserMeetings)
-def get_meeting_info(user_id: int):
+async def get_meeting_info(request: Request, user_id: int):
     """
     Fetch meeting information for a specific user.
 
@@ -74,23 +161,108 @@ def get_meeting_info(user_id: int):
         user_id (int): ID of the user.
 
     Returns:
-        schema.UserMeetings: User's meeting information.
+        schema.UserMeetings: User's meeting information, with an ETag for conditional requests.
+    """
+    return await cached(request, Cache.key("user_meetings", user_id), lambda: schema.UserMeetings(**Users.getMeetingInfo(user_id)))
+
+@app.get("/users/{user_id}/events")
+async def stream_user_events(user_id: int, after: Optional[int] = None, last_event_id: Optional[str] = Header(None)):
+    """
+    Stream the changes that concern a user as Server-Sent Events.
+
+    Clients that reconnect resume after the ``Last-Event-ID`` header the
+    browser sends, or after the ``after`` event ID; new clients start with
+    the next change. See ``crud.Outbox.stream`` for the messages.
+
+    Args:
+        user_id (int): ID of the user.
+        after (int, optional): ID of the last event the client has.
+        last_event_id (str, optional): The ``Last-Event-ID`` header, which wins over ``after``.
+
+    Returns:
+        StreamingResponse: The ``text/event-stream`` of the user's events.
+
+    Raises:
+        HTTPException: If the user is not found or the event ID is not a number.
+    """
+    if last_event_id is not None:
+        if not last_event_id.strip().isdigit():
+            raise HTTPException(status_code=400, detail="Last-Event-ID must be an event ID.")
+        after = int(last_event_id)
+    await run(Users.get, user_id)
+    return StreamingResponse(Outbox.stream(user_id, after), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/users/bulk", response_model=List[schema.BulkResult])
+async def add_users(users_data: List[schema.UserBase]):
     """
-    return Users.getMeetingInfo(user_id)
+    Add several users in one request.
+
+    Only the passwords of users whose email is not taken are hashed.
+
+    Args:
+        users_data (List[schema.UserBase]): Data for the new users.
+
+    Returns:
+        List[schema.BulkResult]: The ID or error of each user, in order.
+    """
+    Bulk.validate(users_data)
+    indexes = await run(Users.newEmails, users_data)
+    zones = await Timezone.findTimeZones([(users_data[index].city, users_data[index].state, users_data[index].zipcode) for index in indexes])
+    passwords = await Passwords.makeMany([users_data[index].password for index in indexes])
+    return await run(Users.add_many, users_data, dict(zip(indexes, passwords)), dict(zip(indexes, zones)))
+
+@app.post("/login", response_model=schema.LoginResult)
+async def login(credentials: schema.Login):
+    """
+    Check a user's email and password.
+
+    A password hashed at another cost than the configured one is rehashed
+    and saved.
+
+    Args:
+        credentials (schema.Login): The email and password.
+
+    Returns:
+        schema.LoginResult: The user's ID and email.
+
+    Raises:
+        HTTPException: If the email or password is wrong.
+    """
+    user = await run(Users.credentials, credentials.email)
+    if not user or not await Passwords.verify(credentials.password, user.password):
+        raise HTTPException(status_code=401, detail="Invalid email or password.")
+    if Passwords.needsRehash(user.password):
+        await run(Users.setPassword, user.id, await Passwords.make(credentials.password))
+    return schema.LoginResult(id=user.id, email=user.email)
 
 # Leave Routes
-@app.get("/unavailability/", response_model=List[schema.AvailabilityResult])
-def get_all_unavailabilities():
+@app.get("/unavailability/")
+async def get_all_unavailabilities(cursor: Optional[int] = None, limit: int = DEFAULT_LIMIT, fields: Optional[str] = None,
+                             user_id: Optional[int] = None, from_date: Optional[str] = Query(None, alias="from"),
+                             to_date: Optional[str] = Query(None, alias="to")):
     """
-    Fetch all unavailability records.
+    Fetch a page of unavailability records, ordered by ID.
+
+    Args:
+        cursor (int, optional): The last ID of the previous page.
+        limit (int): Maximum number of records to return.
+        fields (str, optional): Comma separated fields to return, e.g. ``id,email``.
+        user_id (int, optional): Only return records of this user.
+        from_date (str, optional): ``from``; only return records ending on or after this day, "dd/mm/yyyy".
+        to_date (str, optional): ``to``; only return records starting on or before this day, "dd/mm/yyyy".
 
     Returns:
-        List[schema.AvailabilityResult]: List of unavailability records.
+        List[dict]: Unavailability records; the next cursor is sent in the ``X-Next-Cursor`` header.
+
+    Raises:
+        HTTPException: If a date is invalid.
     """
-    return Leaves.get_all()
+    start, end = window(from_date, to_date)
+    return page(await run(Leaves.get_all, cursor, limit, fields, start, end, user_id=user_id))
 
-@app.post("/unavailability/")
-def add_unavailability(leave_data: schema.AvailabilityBase):
+@app.post("/unavailability/", response_model=schema.AvailabilityResult)
+async def add_unavailability(leave_data: schema.AvailabilityBase):
     """
     Add a new unavailability record.
 
@@ -98,12 +270,26 @@ def add_unavailability(leave_data: schema.AvailabilityBase):
         leave_data (schema.AvailabilityBase): Data for the new record.
 
     Returns:
-        AvailabilityResult: The created unavailability record.
+        schema.AvailabilityResult: The created unavailability record.
     """
-    return Leaves.add(leave_data)
+    return await run(Leaves.add, leave_data)
+
+@app.post("/unavailability/bulk", response_model=List[schema.BulkResult])
+async def add_unavailabilities(leave_data: List[schema.AvailabilityBase]):
+    """
+    Add several unavailability records in one request.
+
+    Args:
+        leave_data (List[schema.AvailabilityBase]): Data for the new records.
+
+    Returns:
+        List[schema.BulkResult]: The ID of each created record or the error of
+        each rejected one, in order.
+    """
+    return await run(Leaves.add_many, leave_data)
 
 @app.get("/unavailability/{leave_id}", response_model=schema.AvailabilityResult)
-def get_single_unavailability(leave_id: int):
+async def get_single_unavailability(leave_id: int):
     """
     Fetch a single unavailability record by ID.
 
@@ -116,37 +302,55 @@ def get_single_unavailability(leave_id: int):
     Raises:
         HTTPException: If the record is not found.
     """
-    leave = Leaves.get(leave_id)
+    leave = await run(Leaves.get, leave_id)
     if not leave:
         raise HTTPException(status_code=404, detail="Unavailability record not found")
     return leave
 
 @app.get("/user/{user_id}/unavailability/", response_model=List[schema.AvailabilityResult])
-def get_unavailability_by_user(user_id: int):
+async def get_unavailability_by_user(request: Request, user_id: int, from_date: Optional[str] = Query(None, alias="from"),
+                                     to_date: Optional[str] = Query(None, alias="to")):
     """
     Fetch unavailability records for a specific user.
 
     Args:
         user_id (int): ID of the user.
+        from_date (str, optional): ``from``; only return records ending on or after this day, "dd/mm/yyyy".
+        to_date (str, optional): ``to``; only return records starting on or before this day, "dd/mm/yyyy".
 
     Returns:
-        List[schema.AvailabilityResult]: List of unavailability records.
+        List[schema.AvailabilityResult]: List of unavailability records. Without
+        a window they are served through the cache, with an ETag for conditional requests.
+
+    Raises:
+        HTTPException: If a date is invalid.
     """
-    return Leaves.leaves_by_user(user_id)
+    if from_date or to_date:
+        return FastJSONResponse(await run(Leaves.availabilitys_by_user, user_id, *window(from_date, to_date)))
+    return await cached(request, Cache.key("unavailability", user_id),
+        lambda: Leaves.availabilitys_by_user(user_id))
 
 # Participant Routes
-@app.get("/participants/", response_model=List[schema.ParticipantResult])
-def get_all_participants():
+@app.get("/participants/")
+async def get_all_participants(cursor: Optional[int] = None, limit: int = DEFAULT_LIMIT, fields: Optional[str] = None,
+                         participant_id: Optional[int] = None, meeting_id: Optional[int] = None):
     """
-    Fetch all participants.
+    Fetch a page of participants, ordered by ID.
+
+    Args:
+        cursor (int, optional): The last ID of the previous page.
+        limit (int): Maximum number of records to return.
+        fields (str, optional): Comma separated fields to return, e.g. ``id,email``.
+        participant_id (int, optional): Only return rows of this user.
+        meeting_id (int, optional): Only return rows of this meeting.
 
     Returns:
-        List[schema.ParticipantResult]: List of participants.
+        List[dict]: Participants; the next cursor is sent in the ``X-Next-Cursor`` header.
     """
-    return Participants.get_all()
+    return page(await run(Participants.get_all, cursor, limit, fields, participant_id=participant_id, meeting_id=meeting_id))
 
 @app.get("/participants/{meeting_id}", response_model=List[schema.ParticipantResult])
-def get_participants_by_meeting(meeting_id: int):
+async def get_participants_by_meeting(meeting_id: int):
     """
     Fetch participants by meeting ID.
 
@@ -156,60 +360,136 @@ def get_participants_by_meeting(meeting_id: int):
     Returns:
         List[schema.ParticipantResult]: List of participants in the meeting.
     """
-    return Participants.participants_by_meeting(meeting_id)
+    return FastJSONResponse(await run(Participants.participants_by_meeting, meeting_id))
 
 @app.get("/participants/{participant_id}/meetings", response_model=List[schema.MeetingResult])
-def get_all_meetings(participant_id: int):
+async def get_all_meetings(participant_id: int, from_date: Optional[str] = Query(None, alias="from"),
+                           to_date: Optional[str] = Query(None, alias="to")):
     """
     Fetch all meetings for a participant.
 
     Args:
         participant_id (int): ID of the participant.
+        from_date (str, optional): ``from``; only return occurrences ending after this UTC day starts, "dd/mm/yyyy".
+        to_date (str, optional): ``to``; only return occurrences starting before this UTC day ends, "dd/mm/yyyy".
 
     Returns:
-        List[schema.MeetingResult]: List of meetings.
+        List[schema.MeetingResult]: List of meetings, one per occurrence, ordered by start.
+
+    Raises:
+        HTTPException: If a date is invalid or the participant is not found.
     """
-    return Participants.get_meetings(participant_id)
+    return await run(Participants.get_meetings, participant_id, *window(from_date, to_date))
 
 @app.post("/participants/")
-def add_participant(participant_data: schema.ParticipantBase):
+async def add_participant(participant_data: schema.ParticipantBase, conflicts: schema.ConflictMode = schema.ConflictMode.off):
     """
     Add a new participant.
 
     Args:
         participant_data (schema.ParticipantBase): Data for the new participant.
+        conflicts (schema.ConflictMode): ``flag`` to report or ``reject`` to refuse double-bookings.
+
+    Returns:
+        schema.ParticipantResult: The created participant, or with ``flag`` the
+        participant and its conflicts.
+    """
+    result = await run(Participants.add, participant_data, conflicts)
+    return result if isinstance(result, dict) else schema.ParticipantResult.from_orm(result)
+
+@app.post("/participants/bulk", response_model=List[schema.BulkResult])
+async def add_participants(participants_data: List[schema.ParticipantBase], conflicts: schema.ConflictMode = schema.ConflictMode.off):
+    """
+    Add several participants in one request.
+
+    Args:
+        participants_data (List[schema.ParticipantBase]): Data for the new participants.
+        conflicts (schema.ConflictMode): ``flag`` to report or ``reject`` to refuse double-bookings.
 
     Returns:
-        ParticipantResult: The created participant object.
+        List[schema.BulkResult]: The ID or error, and the conflicts, of each
+        participant, in order.
     """
-    return Participants.add(participant_data)
+    return await run(Participants.add_many, participants_data, conflicts)
 
 # Meeting Routes
-@app.get("/meetings/", response_model=List[schema.MeetingResult])
-def get_all_meetings():
+@app.get("/meetings/")
+async def get_all_meetings(cursor: Optional[int] = None, limit: int = DEFAULT_LIMIT, fields: Optional[str] = None,
+                     organizer: Optional[str] = None, date: Optional[str] = None,
+                     from_date: Optional[str] = Query(None, alias="from"), to_date: Optional[str] = Query(None, alias="to")):
     """
-    Fetch all meetings.
+    Fetch a page of meetings, ordered by ID.
+
+    Args:
+        cursor (int, optional): The last ID of the previous page.
+        limit (int): Maximum number of records to return.
+        fields (str, optional): Comma separated fields to return, e.g. ``id,email``.
+        organizer (str, optional): Only return meetings hosted by this email.
+        date (str, optional): Only return meetings on this date, in the organizer's timezone.
+        from_date (str, optional): ``from``; only return meetings running after this UTC day starts, "dd/mm/yyyy".
+        to_date (str, optional): ``to``; only return meetings running before this UTC day ends, "dd/mm/yyyy".
 
     Returns:
-        List[schema.MeetingResult]: List of meetings.
+        List[dict]: Meetings; the next cursor is sent in the ``X-Next-Cursor`` header.
+
+    Raises:
+        HTTPException: If a date is invalid.
     """
-    return Meetings.get_all()
+    start, end = window(from_date, to_date)
+    return page(await run(Meetings.get_all, cursor, limit, fields, start, end, organizer=organizer, date=date))
 
 @app.post("/meetings/")
-def add_meeting(meeting_data: schema.MeetingBase):
+async def add_meeting(meeting_data: schema.MeetingBase, conflicts: schema.ConflictMode = schema.ConflictMode.off):
     """
     Add a new meeting.
 
     Args:
         meeting_data (schema.MeetingBase): Data for the new meeting.
+        conflicts (schema.ConflictMode): ``flag`` to report or ``reject`` to refuse double-bookings.
+
+    Returns:
+        schema.MeetingResult: The created meeting, or with ``flag`` the meeting
+        and its conflicts.
+    """
+    result = await run(Meetings.add, meeting_data, conflicts)
+    return result if isinstance(result, dict) else schema.MeetingResult.from_orm(result)
+
+@app.post("/meetings/bulk", response_model=List[schema.BulkResult])
+async def add_meetings(meetings_data: List[schema.MeetingBase], conflicts: schema.ConflictMode = schema.ConflictMode.off):
+    """
+    Add several meetings in one request.
+
+    Args:
+        meetings_data (List[schema.MeetingBase]): Data for the new meetings.
+        conflicts (schema.ConflictMode): ``flag`` to report or ``reject`` to refuse double-bookings.
+
+    Returns:
+        List[schema.BulkResult]: The ID or error and the conflicts of each meeting, in order.
+    """
+    return await run(Meetings.add_many, meetings_data, conflicts)
+
+@app.get("/meetings/batch", response_model=List[schema.Meetings])
+async def get_meetings_with_participants(ids: str):
+    """
+    Fetch several meetings along with their participants.
+
+    Args:
+        ids (str): Comma separated meeting IDs, e.g. ``1,2,3``.
 
     Returns:
-        MeetingResult: The created meeting object.
+        List[schema.Meetings]: The requested meetings with participant details.
+
+    Raises:
+        HTTPException: If the IDs are not valid integers.
     """
-    return Meetings.add(meeting_data)
+    try:
+        meeting_ids = [int(meeting_id) for meeting_id in ids.split(",") if meeting_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Meeting IDs must be integers")
+    return await run(Meetings.getMeetingsWithParticipants, meeting_ids)
 
 @app.get("/meetings/{meeting_id}", response_model=schema.Meetings)
-def get_meeting_with_participants(meeting_id: int):
+async def get_meeting_with_participants(request: Request, meeting_id: int):
     """
     Fetch a meeting along with its participants.
 
@@ -217,12 +497,136 @@ def get_meeting_with_participants(meeting_id: int):
         meeting_id (int): ID of the meeting.
 
     Returns:
-        schema.Meetings: The requested meeting object with participant details.
+        schema.Meetings: The requested meeting object with participant details,
+        with an ETag for conditional requests.
 
     Raises:
         HTTPException: If the meeting is not found.
     """
-    meeting = Meetings.getMeetingWithParticipants(meeting_id)
-    if not meeting:
-        raise HTTPException(status_code=404, detail="Meeting not found")
-    return meeting
+    return await cached(request, Cache.key("meeting", meeting_id), lambda: Meetings.getMeetingWithParticipants(meeting_id))
+
+# Free/Busy Routes
+@app.post("/freebusy/", response_model=schema.FreeBusy)
+async def get_free_busy(query: schema.FreeBusyBase):
+    """
+    Compute the busy time and common free slots of a set of users.
+
+    Args:
+        query (schema.FreeBusyBase): Users, time window, slot duration and timezone.
+
+    Returns:
+        schema.FreeBusy: Busy intervals and free slots in the requested timezone.
+
+    Raises:
+        HTTPException: If the window is invalid or a user is not found.
+    """
+    return await run(FreeBusy.get, query)
+
+@app.post("/slots/", response_model=schema.SlotSuggestions)
+async def recommend_slots(query: schema.SlotSearch):
+    """
+    Recommend the best meeting times for a set of users.
+
+    Args:
+        query (schema.SlotSearch): Users, search window, duration, working hours and number of slots.
+
+    Returns:
+        schema.SlotSuggestions: Non-overlapping slots ranked by how many users are free
+        within everyone's local working hours.
+
+    Raises:
+        HTTPException: If the window is invalid or a user is not found.
+    """
+    return await run(Slots.get, query)
+
+# Export Routes
+@app.get("/export/{table}.{format}")
+async def export_table(table: schema.ExportTable, format: schema.ExportFormat, fields: Optional[str] = None):
+    """
+    Stream every row of a table as NDJSON or CSV.
+
+    Args:
+        table (schema.ExportTable): ``meetings``, ``participants`` or ``unavailability``.
+        format (schema.ExportFormat): ``ndjson`` or ``csv``.
+        fields (str, optional): Comma separated fields to export, e.g. ``id,title``.
+
+    Returns:
+        StreamingResponse: The rows, ordered by ID, streamed as they are read.
+
+    Raises:
+        HTTPException: If a requested field is unknown.
+    """
+    body, media_type = Export.export(table, format, fields)
+    return StreamingResponse(body, media_type=media_type, headers={"Content-Disposition": 'attachment; filename="%s.%s"' % (table.value, format.value)})
+
+# Sync Routes
+@app.get("/sync")
+async def sync(token: Optional[str] = None, limit: int = DEFAULT_LIMIT):
+    """
+    Fetch the users, meetings, participant rows and unavailability records
+    created, changed or deleted since the client's last sync.
+
+    Clients apply ``deleted`` before the changed rows, keep ``token`` for
+    the next sync and call again at once while ``more`` is true.
+
+    Args:
+        token (str, optional): The token of the previous sync; every row is returned without one.
+        limit (int): Maximum number of rows to return per table.
+
+    Returns:
+        dict: The changed rows by table, the deleted IDs by table, the next
+        ``token`` and ``more``.
+
+    Raises:
+        HTTPException: If the token is invalid or the limit is out of range.
+    """
+    return FastJSONResponse(await run(Sync.changes, token, limit))
+
+# Health Routes
+@app.get("/ready")
+async def ready():
+    """
+    Tell a load balancer whether this worker can serve requests.
+
+    Returns:
+        FastJSONResponse: The result of each check, with status 200 once the
+        worker has started and reaches the database, and 503 otherwise or
+        while it shuts down.
+    """
+    result = await run(Startup.check)
+    return FastJSONResponse(result, status_code=200 if result["ready"] else 503)
+
+# Metrics Routes
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Fetch the request metrics in the Prometheus text format.
+
+    These are summed over every worker when config.metrics has a
+    "multiprocess_dir", as it does under Gunicorn with several workers.
+
+    Returns:
+        PlainTextResponse: Requests, latency histograms, SQL statements and the time
+        spent in the database, timezone conversions, geocoding and serialization, by route.
+    """
+    return PlainTextResponse(Metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/pool")
+async def get_pool_metrics():
+    """
+    Fetch the connection pool metrics of this worker process.
+
+    Returns:
+        dict: Open and idle connections, checkouts and wait times of each pool.
+    """
+    return poolStats()
+
+@app.get("/metrics/cache")
+async def get_cache_metrics():
+    """
+    Fetch the response cache counters of this worker process.
+
+    Returns:
+        dict: Hits, misses and invalidations, and the cache backend.
+    """
+    return Cache.stats()
@@ -0,0 +1,9 @@
+""" Agenda Model """
+
+from masoniteorm.models import Model
+
+
+class Agenda(Model):
+    """Agenda Model"""
+
+    __table__ = "agenda"
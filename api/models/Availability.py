@@ -6,4 +6,4 @@ from masoniteorm.models import Model
 class Availability(Model):
     """Availability Model"""
 
-    pass
+    __table__ = "availabilitys"
@@ -0,0 +1,9 @@
+""" Outbox Model """
+
+from masoniteorm.models import Model
+
+
+class Outbox(Model):
+    """Outbox Model"""
+
+    __table__ = "outbox"
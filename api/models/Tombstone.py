@@ -0,0 +1,10 @@
+""" Tombstone Model """
+
+from masoniteorm.models import Model
+
+
+class Tombstone(Model):
+    """Tombstone Model"""
+
+    __table__ = "tombstones"
+    __timestamps__ = False
@@ -1,12 +1,12 @@
 from pydantic import BaseModel
 from typing import Optional, List
+from enum import Enum
 
-class UserBase(BaseModel):
+class UserProfile(BaseModel):
     first_name: str
     middle_name: str
     surname: str
     email: str
-    password: str
     cellphone: str
     gender: str
     city: str
@@ -14,11 +14,22 @@ class UserBase(BaseModel):
     zipcode: str
     timezone: str
 
-class UserResult(UserBase):
+class UserBase(UserProfile):
+    password: str
+
+class UserResult(UserProfile):
     id: int
     class Config:
         orm_mode = True
 
+class Login(BaseModel):
+    email: str
+    password: str
+
+class LoginResult(BaseModel):
+    id: int
+    email: str
+
 class ParticipantBase(BaseModel):
     participant_id : int
     meeting_id : int
@@ -44,6 +55,8 @@ class MeetingBase(BaseModel):
     date: str
     time: str
     organizer: str
+    duration: int = 60
+    recurrence: Optional[str] = None
 class MeetingResult(MeetingBase):
     id: int
     class Config:
@@ -55,6 +68,8 @@ class Meetings(BaseModel):
     date: str
     time: str
     organizer: str
+    duration: int = 60
+    recurrence: Optional[str] = None
     participants: List[UserResult] = []
 
 class UserMeetings(BaseModel):
@@ -65,4 +80,74 @@ class UserMeetings(BaseModel):
     state: str
     timezone: str
     hosted: List[Meetings] = []
-    participated: List[Meetings] = []
\ No newline at end of file
+    participated: List[Meetings] = []
+
+class FreeBusyBase(BaseModel):
+    user_ids: List[int]
+    start_date: str
+    start_time: str
+    end_date: str
+    end_time: str
+    duration: int
+    timezone: str
+
+class Slot(BaseModel):
+    date: str
+    time: str
+    end_date: str
+    end_time: str
+
+class FreeBusy(BaseModel):
+    timezone: str
+    busy: List[Slot] = []
+    free: List[Slot] = []
+
+class ConflictMode(str, Enum):
+    off = "off"
+    flag = "flag"
+    reject = "reject"
+
+class Conflict(BaseModel):
+    user_id: int
+    meeting_id: Optional[int] = None
+    availability_id: Optional[int] = None
+
+class ExportTable(str, Enum):
+    meetings = "meetings"
+    participants = "participants"
+    unavailability = "unavailability"
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+class BulkResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+    conflicts: List[Conflict] = []
+
+class SlotSearch(BaseModel):
+    user_ids: List[int]
+    start_date: str
+    start_time: str
+    end_date: str
+    end_time: str
+    duration: int
+    timezone: str
+    work_start: str = "09:00"
+    work_end: str = "17:00"
+    weekdays_only: bool = True
+    step: int = 15
+    top: int = 5
+
+class SlotSuggestion(Slot):
+    free: int
+    in_hours: int
+    outside_minutes: int
+    busy_user_ids: List[int] = []
+
+class SlotSuggestions(BaseModel):
+    timezone: str
+    participants: int
+    slots: List[SlotSuggestion] = []
@@ -0,0 +1,53 @@
+"""
+Fill in users.timezone from the offline timezone table.
+
+Run from the api directory:
+
+    python -m scripts.backfill_timezones [--all]
+
+Only the offline table in config.timezones is used; rows whose location is
+not in the table are left untouched and reported.
+"""
+
+import argparse
+from config.database import DB
+from models.User import User
+from crud.Timezone import getTimeZone
+
+def backfill(overwrite=False, chunk_size=1000):
+    """
+    Resolve and store the timezone of existing users.
+
+    Args:
+        overwrite (bool): Recompute the timezone of every user, not only empty ones.
+        chunk_size (int): Number of users read per batch.
+
+    Returns:
+        tuple: The number of users updated and the number left unresolved.
+    """
+    query = User.select("id", "city", "state", "zipcode", "timezone")
+    if not overwrite:
+        query = query.where("timezone", "").or_where_null("timezone")
+    updates = {}
+    unresolved = 0
+    for users in query.chunk(chunk_size):
+        for user in users:
+            try:
+                zone = getTimeZone(user.city, user.state, user.zipcode)
+            except ValueError:
+                unresolved += 1
+                continue
+            if zone != user.timezone:
+                updates.setdefault(zone, []).append(user.id)
+    with DB.transaction():
+        for zone, ids in updates.items():
+            for start in range(0, len(ids), chunk_size):
+                User.where_in("id", ids[start:start + chunk_size]).update({"timezone": zone})
+    return sum(len(ids) for ids in updates.values()), unresolved
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill in users.timezone without using the network.")
+    parser.add_argument("--all", action="store_true", help="recompute the timezone of every user")
+    args = parser.parse_args()
+    updated, unresolved = backfill(overwrite=args.all)
+    print("Updated " + str(updated) + " users, " + str(unresolved) + " unresolved.")
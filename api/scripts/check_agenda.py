@@ -0,0 +1,26 @@
+"""
+Check that the agenda table matches the meetings, users and participants tables.
+
+Run from the api directory:
+
+    python -m scripts.check_agenda [--chunk-size 10000]
+
+Reports the agenda rows that are missing or should not exist, with a sample
+of each, and exits with status 1 if there are any. Fix them with
+scripts.rebuild_agenda.
+"""
+
+import argparse
+import sys
+from crud import Agenda
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the agenda with the base tables.")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="meeting IDs compared at once")
+    args = parser.parse_args()
+    report = Agenda.check(args.chunk_size)
+    for kind in ("missing", "unexpected"):
+        print(str(report[kind]) + " " + kind + " rows")
+        for row in report[kind + "_rows"]:
+            print("    " + ", ".join("%s=%s" % item for item in zip(Agenda.COLUMNS, row)))
+    sys.exit(1 if report["missing"] or report["unexpected"] else 0)
@@ -0,0 +1,134 @@
+"""
+Check that the hot queries in crud/ are served by an index.
+
+Run from the api directory, against a migrated SQLite database:
+
+    python -m scripts.check_query_plans [--database db.sqlite3]
+
+Each query is built with the same query builder calls as crud/ and run
+through EXPLAIN QUERY PLAN. A query fails the check when any step of its plan
+scans a table (or a whole index) instead of searching it. Exits with status 1
+if any query fails. tests/test_query_plans.py runs the same check.
+"""
+
+import argparse
+import sqlite3
+import sys
+from datetime import datetime
+from config.database import DATABASES
+from models.Meeting import Meeting as MeetingModel
+from models.Participant import Participant
+from models.Availability import Availability
+from models.User import User
+from models.Agenda import Agenda
+from models.Outbox import Outbox
+from models.Tombstone import Tombstone
+from crud import Recurrence
+from crud.FreeBusy import SERIES_COLUMNS, leavesDuring
+
+def hotQueries():
+    """
+    Build the queries that run on every user, meeting and booking request.
+
+    Returns:
+        List[tuple]: The name and query builder of each query.
+    """
+    window = ("2024-01-01 00:00:00", "2024-01-08 00:00:00")
+    start, end = (datetime.fromisoformat(bound) for bound in window)
+    return [
+        ("users by email", User.where("email", "a@example.com")),
+        ("meetings hosted by a user", MeetingModel.where("organizer", "a@example.com")),
+        ("meetings hosted in a window", MeetingModel.select("organizer", "starts_at", "duration")
+            .where_in("organizer", ["a@example.com", "b@example.com"]).where_null("recurrence")
+            .where("starts_at", ">=", window[0]).where("starts_at", "<", window[1])),
+        ("participant rows of a user", Participant.where("participant_id", 1)),
+        ("participant rows of a meeting", Participant.where("meeting_id", 1)),
+        ("participant rows of several meetings", Participant.where_in("meeting_id", [1, 2, 3])),
+        ("meetings attended in a window", MeetingModel.select("meetings.starts_at", "meetings.duration", "participants.participant_id")
+            .join("participants", "meetings.id", "=", "participants.meeting_id")
+            .where_in("participants.participant_id", [1, 2]).where_null("meetings.recurrence")
+            .where("meetings.starts_at", ">=", window[0]).where("meetings.starts_at", "<", window[1])),
+        ("series hosted in a window", Recurrence.series(MeetingModel.select(*SERIES_COLUMNS, "meetings.organizer")
+            .where_in("meetings.organizer", ["a@example.com", "b@example.com"]), start, end, "meetings")),
+        ("series attended in a window", Recurrence.series(MeetingModel.select(*SERIES_COLUMNS, "participants.participant_id")
+            .join("participants", "meetings.id", "=", "participants.meeting_id")
+            .where_in("participants.participant_id", [1, 2]), start, end, "meetings")),
+        ("hosted conflicts", MeetingModel.select("id").where("organizer", "a@example.com").where_null("recurrence")
+            .where("starts_at", ">=", window[0]).where("starts_at", "<", window[1]).where("ends_at", ">", window[0])),
+        ("attended conflicts", Participant.select("meeting_id").where("participant_id", 1)
+            .where("starts_at", ">=", window[0]).where("starts_at", "<", window[1]).where("ends_at", ">", window[0])),
+        ("meetings in a window", MeetingModel.select("id").where_null("recurrence").where("starts_at", ">=", window[0])
+            .where("starts_at", "<", window[1]).where("ends_at", ">", window[0]).order_by("id").limit(101)),
+        ("agenda of a user in a window", Agenda.select("meeting_id", "starts_at").where("user_id", 1).where("role", "participant")
+            .where("starts_at", "<", window[1]).where_null("recurrence").where("starts_at", ">=", window[0]).where("ends_at", ">", window[0])),
+        ("agenda series of a user in a window", Agenda.select("meeting_id", "starts_at").where("user_id", 1).where("role", "participant")
+            .where("starts_at", "<", window[1]).where_not_null("recurrence")
+            .where(lambda builder: builder.where_null("ends_at").or_where("ends_at", ">", window[0]))),
+        ("agenda rows of a meeting", Agenda.where_between("meeting_id", 1, 10000)),
+        ("unavailability of a user", Availability.where("user_id", 1)),
+        ("unavailability conflicting with a booking", leavesDuring(Availability.where("user_id", 1), start, end)),
+        ("unavailability of several users in a window", leavesDuring(Availability.where_in("user_id", [1, 2, 3]), start, end)),
+        ("unavailability of a user in a window", Availability.where("user_id", 1).where("ends_on", ">=", "2024-01-01").where("starts_on", "<=", "2024-01-14")),
+        ("events of a user after a cursor", Outbox.select("id", "kind").where("user_id", 1).where("id", ">", 100).order_by("id").limit(100)),
+        ("users changed after a sync token", User.select("id", "updated_at").where("updated_at", "<=", window[1]).where("updated_at", ">=", window[0])
+            .where(lambda builder: builder.where("updated_at", ">", window[0]).or_where("id", ">", 100)).order_by("updated_at").order_by("id").limit(101)),
+        ("meetings changed after a sync token", MeetingModel.select("id", "updated_at").where("updated_at", "<=", window[1]).where("updated_at", ">=", window[0])
+            .where(lambda builder: builder.where("updated_at", ">", window[0]).or_where("id", ">", 100)).order_by("updated_at").order_by("id").limit(101)),
+        ("participant rows changed after a sync token", Participant.select("id", "updated_at").where("updated_at", "<=", window[1]).where("updated_at", ">=", window[0])
+            .where(lambda builder: builder.where("updated_at", ">", window[0]).or_where("id", ">", 100)).order_by("updated_at").order_by("id").limit(101)),
+        ("unavailability changed after a sync token", Availability.select("id", "updated_at").where("updated_at", "<=", window[1]).where("updated_at", ">=", window[0])
+            .where(lambda builder: builder.where("updated_at", ">", window[0]).or_where("id", ">", 100)).order_by("updated_at").order_by("id").limit(101)),
+        ("deletions after a sync token", Tombstone.select("id", "record_id").where("id", ">", 100).order_by("id").limit(101)),
+        ("unsettled events", Outbox.select("id").where("created_at", ">", window[0])),
+        ("events to prune", Outbox.where("created_at", "<", window[0]).where("id", "<", 100)),
+    ]
+
+def unindexed(plan):
+    """
+    Find the plan steps that read a whole table or index.
+
+    Args:
+        plan (List[tuple]): Rows of EXPLAIN QUERY PLAN.
+
+    Returns:
+        List[str]: The details of the offending steps.
+    """
+    return [row[-1] for row in plan if row[-1].startswith("SCAN") and "CONSTANT ROW" not in row[-1]]
+
+def explain(connection, builder):
+    """
+    Get the query plan of a query.
+
+    Args:
+        connection (sqlite3.Connection): A connection to the database.
+        builder (QueryBuilder): The query.
+
+    Returns:
+        List[tuple]: Rows of EXPLAIN QUERY PLAN.
+    """
+    return connection.execute("EXPLAIN QUERY PLAN " + builder.to_qmark().replace("'?'", "?"), builder._bindings).fetchall()
+
+def check(database):
+    """
+    Run EXPLAIN QUERY PLAN for every hot query.
+
+    Args:
+        database (str): Path of the SQLite database.
+
+    Returns:
+        bool: True if every query searches an index.
+    """
+    connection = sqlite3.connect(database)
+    passed = True
+    for name, builder in hotQueries():
+        steps = unindexed(explain(connection, builder))
+        print(("FAIL " if steps else "ok   ") + name + (": " + "; ".join(steps) if steps else ""))
+        passed = passed and not steps
+    connection.close()
+    return passed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that hot queries use an index.")
+    parser.add_argument("--database", default=DATABASES["sqlite"]["database"])
+    args = parser.parse_args()
+    sys.exit(0 if check(args.database) else 1)
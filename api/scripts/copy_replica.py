@@ -0,0 +1,46 @@
+"""
+Copy the SQLite database to its replica files, for trying out read replicas.
+
+Run from the api directory, next to a server started with the same
+API_SQLITE_REPLICAS:
+
+    API_SQLITE_REPLICAS=replica.sqlite3 python -m scripts.copy_replica [--every 2]
+
+Each copy is an online backup of a consistent snapshot, so the server can
+keep writing meanwhile. With --every the copy is repeated every that many
+seconds, which stands in for the lag of real replication; keep it under
+"settle_seconds" of config/sync.py.
+"""
+
+import argparse
+import sqlite3
+import time
+from config.database import DATABASES
+
+def copy(source, targets):
+    """
+    Copy a SQLite database over other files.
+
+    Args:
+        source (str): The primary's file.
+        targets (List[str]): The replicas' files.
+    """
+    with sqlite3.connect(source) as primary:
+        for target in targets:
+            with sqlite3.connect(target) as replica:
+                primary.backup(replica)
+
+if __name__ == "__main__":
+    settings = DATABASES["sqlite"]
+    parser = argparse.ArgumentParser(description="Copy the SQLite database to its replica files.")
+    parser.add_argument("--every", type=float, help="repeat every this many seconds")
+    args = parser.parse_args()
+    targets = [replica["database"] for replica in settings["replicas"]["hosts"]]
+    if not targets:
+        parser.error("Set API_SQLITE_REPLICAS to the replica files.")
+    while True:
+        copy(settings["database"], targets)
+        print("Copied " + settings["database"] + " to " + ", ".join(targets) + ".")
+        if not args.every:
+            break
+        time.sleep(args.every)
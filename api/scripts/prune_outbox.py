@@ -0,0 +1,20 @@
+"""
+Delete change events older than the retention period from the outbox.
+
+Run from the api directory, e.g. daily:
+
+    python -m scripts.prune_outbox [--days 7]
+
+The default is "retention_days" of config/events.py. Clients resuming from
+a pruned event are sent a reset message and reload their state.
+"""
+
+import argparse
+from config.events import EVENTS
+from crud import Outbox
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete old change events.")
+    parser.add_argument("--days", type=int, default=EVENTS["retention_days"], help="days of events to keep")
+    args = parser.parse_args()
+    print("Deleted " + str(Outbox.prune(args.days)) + " events.")
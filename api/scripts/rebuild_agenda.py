@@ -0,0 +1,17 @@
+"""
+Regenerate the agenda table from the meetings, users and participants tables.
+
+Run from the api directory:
+
+    python -m scripts.rebuild_agenda
+
+The table is emptied and refilled with two INSERT ... SELECT statements in
+one transaction. Bookings are written to the agenda as they are made, so
+this is only needed after editing the base tables by hand or when
+scripts.check_agenda reports differences.
+"""
+
+from crud import Agenda
+
+if __name__ == "__main__":
+    print("Wrote " + str(Agenda.rebuild()) + " agenda rows.")
@@ -0,0 +1,129 @@
+"""
+Fixtures shared by the tests.
+
+Run from the api directory:
+
+    python -m pytest tests
+
+The tests run against a throwaway SQLite database (not db.sqlite3), created
+by running databases/migrations once per session.
+"""
+
+import itertools
+import random
+import pytest
+from benchmarks import generate
+from benchmarks.suite import QUERIES, countQueries
+
+SEQUENCE = itertools.count(1)
+
+@pytest.fixture(scope="session")
+def database():
+    """
+    Migrate a new SQLite database and count the statements sent to it.
+
+    Returns:
+        str: The path of the database.
+    """
+    path = generate.configure()
+    countQueries()
+    return path
+
+@pytest.fixture
+def queries():
+    """
+    Count the statements run by a call.
+
+    Returns:
+        Callable: Calls its arguments and returns the number of statements run.
+    """
+    def count(function, *args, **kwargs):
+        before = QUERIES["count"]
+        function(*args, **kwargs)
+        return QUERIES["count"] - before
+    return count
+
+@pytest.fixture
+def client(database, monkeypatch):
+    """
+    Call the API in this process, hashing passwords in the database pool
+    instead of starting a process pool.
+
+    Returns:
+        TestClient: A client of ``main.app``, started up.
+    """
+    from fastapi.testclient import TestClient
+    from config.passwords import PASSWORDS
+    import main
+    monkeypatch.setitem(PASSWORDS, "mode", "thread")
+    with TestClient(main.app) as client:
+        yield client
+
+def userData(**fields):
+    """
+    Build the body of a new user with a unique email.
+
+    Args:
+        **fields: Values replacing the defaults.
+
+    Returns:
+        dict: The body of ``POST /users/``.
+    """
+    return dict({"first_name": "Test", "middle_name": "", "surname": "User", "email": "api%d@example.com" % next(SEQUENCE),
+        "password": "secret", "cellphone": "5550100", "gender": "f", "city": "Chicago", "state": "IL", "zipcode": "60601",
+        "timezone": "America/Chicago"}, **fields)
+
+@pytest.fixture
+def users():
+    """Insert users; see ``addUsers``."""
+    return addUsers
+
+@pytest.fixture
+def meetings():
+    """Insert meetings; see ``addMeetings``."""
+    return addMeetings
+
+def addUsers(count):
+    """
+    Insert users with unique emails.
+
+    Args:
+        count (int): Number of users.
+
+    Returns:
+        List[User]: The new users, in ID order.
+    """
+    from crud import Bulk
+    from models.User import User
+    rows = list(generate.users(count, random.Random(0), "x"))
+    for row in rows:
+        row["email"] = "test%d@example.com" % next(SEQUENCE)
+    Bulk.insert(User, rows)
+    return list(User.where_in("email", [row["email"] for row in rows]).order_by("id").get())
+
+def addMeetings(host, count, participants):
+    """
+    Insert meetings hosted by a user, each attended by the same users.
+
+    Args:
+        host (User): The organizer.
+        count (int): Number of meetings.
+        participants (List[User]): The users attending every meeting.
+
+    Returns:
+        List[int]: The IDs of the new meetings.
+    """
+    from crud import Bulk
+    from models.Meeting import Meeting
+    from models.Participant import Participant
+    rows = list(generate.meetings(count, [host.timezone], 30, 0, random.Random(0)))
+    titles = []
+    for row in rows:
+        row["organizer"] = host.email
+        row["title"] = "Test %d" % next(SEQUENCE)
+        titles.append(row["title"])
+    Bulk.insert(Meeting, rows)
+    meetings = list(Meeting.select("id", "starts_at", "ends_at").where_in("title", titles).get())
+    Bulk.insert(Participant, [{"participant_id": user.id, "meeting_id": meeting.id, "starts_at": meeting.starts_at, "ends_at": meeting.ends_at}
+        for meeting in meetings for user in participants])
+    return [meeting.id for meeting in meetings]
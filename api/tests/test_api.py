@@ -0,0 +1,143 @@
+"""
+Check that records created through the API can be read back.
+"""
+
+import asyncio
+import json
+import threading
+from crud import Outbox
+from tests.conftest import userData
+
+def test_add_user(client):
+    data = userData()
+
+    created = client.post("/users/", json=data)
+
+    assert created.status_code == 200, created.text
+    user = created.json()
+    assert user["email"] == data["email"] and "password" not in user
+    assert client.get("/users/%d" % user["id"]).json() == user
+    assert client.post("/users/", json=data).status_code == 400
+
+def test_add_unavailability(client):
+    user = client.post("/users/", json=userData()).json()
+    data = {"start_date": "01/02/2024", "end_date": "02/02/2024", "reason": "trip", "user_id": user["id"]}
+
+    created = client.post("/unavailability/", json=data)
+
+    assert created.status_code == 200, created.text
+    leave = created.json()
+    assert leave == dict(data, id=leave["id"])
+    assert client.get("/unavailability/%d" % leave["id"]).json() == leave
+
+def meetingData(host, **fields):
+    return dict({"title": "Planning", "date": "15/01/2024", "time": "10:00", "organizer": host["email"], "duration": 30}, **fields)
+
+def test_add_meeting(client):
+    host = client.post("/users/", json=userData()).json()
+
+    created = client.post("/meetings/", json=meetingData(host))
+
+    assert created.status_code == 200, created.text
+    meeting = created.json()
+    assert meeting == dict(meetingData(host), id=meeting["id"], recurrence=None)
+    hosted = client.get("/users/%d/meetings" % host["id"]).json()["hosted"]
+    assert [(entry["meeting_id"], entry["date"], entry["time"]) for entry in hosted] == [(meeting["id"], "15/01/2024", "10:00")]
+
+def test_add_meetings(client):
+    host = client.post("/users/", json=userData()).json()
+
+    results = client.post("/meetings/bulk", json=[meetingData(host), meetingData(host, duration=0), meetingData(host, time="14:00")])
+
+    assert results.status_code == 200, results.text
+    assert [result["error"] for result in results.json()] == [None, "Invalid meeting duration.", None]
+    ids = [result["id"] for result in results.json()]
+    assert client.get("/meetings/%d" % ids[2]).json()["time"] == "14:00"
+
+def test_add_participant(client):
+    host, guest = (client.post("/users/", json=userData()).json() for _ in range(2))
+    meeting = client.post("/meetings/", json=meetingData(host)).json()
+
+    created = client.post("/participants/", json={"participant_id": guest["id"], "meeting_id": meeting["id"]})
+
+    assert created.status_code == 200, created.text
+    participant = created.json()
+    assert participant == {"participant_id": guest["id"], "meeting_id": meeting["id"], "id": participant["id"]}
+    assert [user["id"] for user in client.get("/meetings/%d" % meeting["id"]).json()["participants"]] == [guest["id"]]
+    participated = client.get("/users/%d/meetings" % guest["id"]).json()["participated"]
+    assert [(entry["meeting_id"], entry["date"], entry["time"]) for entry in participated] == [(meeting["id"], "15/01/2024", "10:00")]
+
+def readEvents(user_id, count):
+    """
+    Read the first messages of a user's event stream, then disconnect.
+
+    The stream never ends, so the app is called directly instead of through
+    the client, which waits for the whole body.
+
+    Args:
+        user_id (int): The ID of the user.
+        count (int): Number of messages to read, including ``ready``.
+
+    Returns:
+        List[dict]: The ``id``, ``event`` and ``data`` of each message.
+    """
+    import main
+    messages = []
+    requested = asyncio.Event()
+    done = asyncio.Event()
+
+    async def receive():
+        if not requested.is_set():
+            requested.set()
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            fields = dict(line.split(": ", 1) for line in message["body"].decode().splitlines() if ": " in line)
+            messages.append({"id": int(fields["id"]), "event": fields["event"], "data": json.loads(fields["data"])})
+            if len(messages) == count:
+                done.set()
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/users/%d/events" % user_id, "raw_path": b"", "query_string": b"after=0", "root_path": "", "headers": [],
+        "client": ("test", 1), "server": ("test", 80)}
+    asyncio.run(asyncio.wait_for(main.app(scope, receive, send), 10))
+    return messages
+
+def test_created_records_are_streamed(client, monkeypatch):
+    monkeypatch.setattr(Outbox, "cutoff", lambda: "9999-12-31 23:59:59")
+    host, guest = (client.post("/users/", json=userData()).json() for _ in range(2))
+    meeting = client.post("/meetings/", json=meetingData(host)).json()
+    participant, = client.post("/participants/bulk", json=[{"participant_id": guest["id"], "meeting_id": meeting["id"]}]).json()
+    leave, = client.post("/unavailability/bulk", json=[{"start_date": "01/02/2024", "end_date": "02/02/2024", "reason": "trip", "user_id": guest["id"]}]).json()
+
+    ready, *events = readEvents(guest["id"], 4)
+
+    assert ready["event"] == "ready"
+    assert [(event["event"], event["data"]["entity_id"]) for event in events] == [
+        ("user.created", guest["id"]), ("participant.added", participant["id"]), ("unavailability.created", leave["id"])]
+    assert events[1]["data"]["payload"]["meeting_id"] == meeting["id"]
+
+def test_concurrent_bookings_of_a_user_do_not_both_pass_the_conflict_check(client):
+    from concurrent.futures import ThreadPoolExecutor
+    from fastapi import HTTPException
+    from crud import Participant as Participants
+    import schema
+    first_host, second_host, guest = (client.post("/users/", json=userData()).json() for _ in range(3))
+    meeting_ids = [client.post("/meetings/", json=meetingData(host)).json()["id"] for host in (first_host, second_host)]
+    barrier = threading.Barrier(len(meeting_ids))
+
+    def book(meeting_id):
+        barrier.wait()
+        try:
+            Participants.add(schema.ParticipantBase(participant_id=guest["id"], meeting_id=meeting_id), schema.ConflictMode.reject)
+            return 200
+        except HTTPException as error:
+            return error.status_code
+
+    with ThreadPoolExecutor(len(meeting_ids)) as executor:
+        statuses = sorted(executor.map(book, meeting_ids))
+
+    assert statuses == [200, 409]
@@ -0,0 +1,19 @@
+"""
+Check that a response built across a write is not cached.
+"""
+
+from crud import Cache
+
+def test_response_invalidated_while_building_is_not_stored():
+    cache_key = Cache.key("user", "building")
+
+    def build():
+        Cache.invalidate(cache_key)
+        return {"name": "old"}
+
+    etag, body = Cache.read(cache_key, build)
+
+    assert body == {"name": "old"}
+    assert Cache.getStore().get(cache_key) is None
+    assert Cache.read(cache_key, lambda: {"name": "new"})[1] == {"name": "new"}
+    assert Cache.getStore().get(cache_key) is not None
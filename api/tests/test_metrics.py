@@ -0,0 +1,27 @@
+"""
+Check that GET /metrics sums the totals of every worker sharing a metrics directory.
+"""
+
+import json
+from crud import Metrics
+from config.metrics import METRICS
+
+def test_render_sums_the_flushed_totals_of_every_worker(tmp_path, monkeypatch):
+    monkeypatch.setitem(METRICS, "multiprocess_dir", str(tmp_path))
+    monkeypatch.setattr(Metrics, "ROUTES", {})
+    other = Metrics.RouteStats()
+    other.responses[200] = 2
+    other.latency.observe(0.02)
+    other.latency.observe(0.02)
+    other.seconds["db"] = 0.5
+    (tmp_path / "1.json").write_text(json.dumps([dict(other.state(), method="GET", route="/users/")]))
+
+    record = dict(Metrics.newRecord(), queries=3, db=0.25)
+    Metrics.observe("GET", "/users/", 200, 0.02, record)
+    Metrics.observe("GET", "/users/", 404, 0.02, record)
+    text = Metrics.render()
+
+    assert 'api_requests_total{method="GET",route="/users/",status="200"} 3' in text
+    assert 'api_requests_total{method="GET",route="/users/",status="404"} 1' in text
+    assert 'api_request_duration_seconds_count{method="GET",route="/users/"} 4' in text
+    assert 'api_db_seconds_total{method="GET",route="/users/"} 1.0' in text
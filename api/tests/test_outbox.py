@@ -0,0 +1,19 @@
+"""
+Check that event streams hold back events that may not have committed yet.
+"""
+
+import datetime
+from crud import Outbox
+
+def test_events_after_an_unsettled_event_are_held_back(database, users):
+    user, = users(1)
+    now = datetime.datetime.utcnow().replace(microsecond=0)
+    old, new = str(now - datetime.timedelta(minutes=1)), str(now)
+    Outbox.add([dict(Outbox.event(user.id, "user.updated", user.id, {}), created_at=created) for created in (old, new, old)])
+    first, second, third = Outbox.read(user.id)
+
+    events, held = Outbox.settled([first, second, third], Outbox.cutoff())
+
+    assert [entry["id"] for entry in events] == [first["id"]]
+    assert held
+    assert Outbox.start(Outbox.cutoff()) < second["id"]
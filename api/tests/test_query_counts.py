@@ -0,0 +1,22 @@
+"""
+Check that reads take a fixed number of queries, however many rows they return.
+"""
+
+from crud import User as Users
+
+def test_meeting_info_queries_do_not_grow_with_meetings(database, queries, users, meetings):
+    small_host, large_host, *guests = users(5)
+    meetings(small_host, 5, guests)
+    meetings(large_host, 50, guests)
+
+    small = queries(Users.getMeetingInfo, small_host.id)
+    large = queries(Users.getMeetingInfo, large_host.id)
+
+    assert small == large
+
+def test_meeting_info_queries_do_not_grow_with_attended_meetings(database, queries, users, meetings):
+    host, small_guest, large_guest = users(3)
+    meetings(host, 5, [small_guest, large_guest])
+    meetings(host, 45, [large_guest])
+
+    assert queries(Users.getMeetingInfo, small_guest.id) == queries(Users.getMeetingInfo, large_guest.id)
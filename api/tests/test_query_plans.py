@@ -0,0 +1,18 @@
+"""
+Check that the hot queries in crud/ are served by an index.
+
+The queries and the check are those of scripts/check_query_plans.py, run
+against the migrated test database.
+"""
+
+import sqlite3
+import pytest
+from scripts.check_query_plans import explain, hotQueries, unindexed
+
+@pytest.mark.parametrize("name, builder", hotQueries(), ids=[name for name, builder in hotQueries()])
+def test_query_searches_an_index(database, name, builder):
+    connection = sqlite3.connect(database)
+    try:
+        assert unindexed(explain(connection, builder)) == []
+    finally:
+        connection.close()
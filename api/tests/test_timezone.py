@@ -0,0 +1,25 @@
+"""
+Check timezone lookups and that times are returned in the format they are read in.
+"""
+
+import asyncio
+import time
+from crud.Timezone import fromUTC, getDate
+
+def test_from_utc_writes_dates_as_they_are_read():
+    date, time = fromUTC(["2024-01-15 16:00:00"], "America/Chicago")[0].split(",")
+
+    assert (date, time) == ("15/01/2024", "10:00")
+    assert str(getDate(date)) == "2024-01-15"
+
+def test_slow_geocoding_times_out_in_its_own_pool(monkeypatch):
+    from config.executors import EXECUTORS
+    from config.timezones import TIMEZONES
+    from crud import Timezone
+    monkeypatch.setitem(EXECUTORS["geocoder"], "timeout", 0.1)
+    monkeypatch.setitem(TIMEZONES["geocoder"], "enabled", True)
+    monkeypatch.setattr(Timezone, "geocodeTimeZone", lambda key: time.sleep(1))
+
+    zones = asyncio.run(Timezone.findTimeZones([("Chicago", "IL", "60601"), ("Nowhere", "Atlantis", None)]))
+
+    assert zones == ["America/Chicago", None]